@@ -2,58 +2,345 @@
 RFI API Endpoints
 Task 2.7
 """
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+import mimetypes
+import shutil
+import uuid
+from datetime import date
+from pathlib import Path, PurePosixPath
+from typing import AsyncIterator, BinaryIO, List, Any, Literal, Optional, Tuple, Union
+from fastapi import (
+    APIRouter, Depends, File, Header, HTTPException, status, Query, Request, Response,
+    UploadFile
+)
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile as StarletteUploadFile
+from pydantic import TypeAdapter
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app.api.dependencies import get_db, get_current_active_user, get_current_superuser
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.etag import etag_matches, not_modified, set_etag, variant, weak_etag
+from app.core.events import broker as event_broker, sse_stream
+from app.core.jobs import job_file, job_owner, job_store
+from app.core.ranges import (
+    RangeFileResponse, RangeNotSatisfiable, content_disposition, if_range_matches,
+    parse_range, range_headers, range_not_satisfiable
+)
+from app.core.responses import PydanticJSONResponse, default_response_class
 from app.crud import rfi as crud_rfi
-from app.schemas.rfi import RFI, RFICreate, RFIUpdate, RFISearchFilters
+from app.crud import rfi_attachment as crud_attachment
+from app.schemas.rfi import (
+    RFI,
+    RFIAttachmentInfo,
+    RFIBulkReasonRequest,
+    RFIBulkRequest,
+    RFIBulkResult,
+    RFICreate,
+    RFIFullTextHit,
+    RFIListItem,
+    RFIListPage,
+    RFIUpdate,
+    RFIPage,
+    RFISearchFilters,
+    RFISearchHit,
+)
+from app.schemas.job import JobStatus
+from app.services import (
+    attachment_images, attachment_storage, rfi_attachments, rfi_export, rfi_forms, rfi_import,
+    rfi_jobs, rfi_search
+)
 from app.schemas.user import User
 
 router = APIRouter()
 
+PAGINATE_PATTERN = "^(offset|cursor)$"
+EXPORT_FORMAT_PATTERN = "^(csv|xlsx|ndjson)$"
+
+# بدنه JSON لیست‌ها مستقیم با pydantic-core ساخته می‌شود
+RFI_LIST = TypeAdapter(List[RFI])
+JSONResponseClass = default_response_class()
+
+# فایل پیوست‌ها و نسخه‌های تصویری (ATTACHMENT_*)؛ pool آن‌ها هنگام خاموشی بسته می‌شود
+attachment_store = rfi_attachments.attachment_store
+image_pipeline = rfi_attachments.image_pipeline
+
+# پیوست‌ها محتوا-آدرس‌دهی شده‌اند و تغییر نمی‌کنند
+ATTACHMENT_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+# فرم چاپی RFI در process pool رندر می‌شود (RFI_FORM_*)؛ همان pool کارهای فرم
+form_renderer = rfi_jobs.form_renderer
+
+FIELDS_DESCRIPTION = (
+    "Comma-separated RFI fields to return (sparse fieldset), or `compact` "
+    "for the list view columns. id_RFI is always included."
+)
+
+# پاسخ‌های لیست مستقیم Response برمی‌گردانند؛ این مدل فقط مستند OpenAPI است
+# (RFIListItem/RFIListPage برای fields=compact)
+LIST_RESPONSE_MODEL = Union[List[RFI], RFIPage, List[RFIListItem], RFIListPage]
+
+
+def _keyset_args(
+    paginate: str, cursor: Optional[str]
+) -> Tuple[bool, Optional[crud_rfi.KeysetPosition]]:
+    """
+    تشخیص حالت صفحه‌بندی و باز کردن cursor
+    """
+    if paginate != "cursor" and cursor is None:
+        return False, None
+    if cursor is None:
+        return True, None
+    try:
+        return True, crud_rfi.decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _cursor_page(rfis: List[Any], limit: int) -> RFIPage:
+    """
+    ساخت صفحه keyset از limit+1 ردیف خوانده‌شده
+    """
+    next_cursor = None
+    if len(rfis) > limit:
+        next_cursor = crud_rfi.encode_cursor(rfis[limit - 1])
+    return RFIPage(items=rfis[:limit], next_cursor=next_cursor)
+
+
+def _list_fields(fields: Optional[str], keyset: bool) -> Optional[List[str]]:
+    """
+    ستون‌های پارامتر fields (خطای 400 برای فیلد ناشناخته)
+    """
+    if fields is None:
+        return None
+    try:
+        return crud_rfi.parse_list_fields(fields, keyset=keyset)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+
+
+def _sparse_content(
+    rows: List[Any], fields: List[str], limit: int, keyset: bool
+) -> Union[List[dict], dict]:
+    """
+    محتوای JSON پاسخ sparse fieldset (لیست یا صفحه keyset)
+    """
+    if not keyset:
+        return crud_rfi.rows_as_dicts(rows, fields)
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = crud_rfi.encode_cursor(rows[limit - 1])
+    return {
+        "items": crud_rfi.rows_as_dicts(rows[:limit], fields),
+        "next_cursor": next_cursor,
+    }
+
+
+def _list_response(
+    rows: List[Any], fields: Optional[List[str]], limit: int, keyset: bool
+) -> Any:
+    """
+    پاسخ endpoint های لیست: مدل‌های کامل یا Row های sparse بدون اعتبارسنجی مجدد
+
+    Full RFIs are validated once and dumped by pydantic-core, instead of
+    FastAPI's response_model validate -> dump_python -> encode chain.
+    """
+    if fields is not None:
+        return JSONResponseClass(_sparse_content(rows, fields, limit, keyset))
+    if keyset:
+        return PydanticJSONResponse(_cursor_page(rows, limit))
+    return PydanticJSONResponse(
+        RFI_LIST.validate_python(rows, from_attributes=True), adapter=RFI_LIST
+    )
+
+
+def _save_upload(source: BinaryIO, path: Path) -> None:
+    """کپی فایل آپلودشده در پوشه داده کارهای پس‌زمینه"""
+    with open(path, "wb") as output:
+        shutil.copyfileobj(source, output, 1024 * 1024)
+
+
+def _bulk_result(outcomes: dict) -> RFIBulkResult:
+    """
+    ساخت پاسخ عملیات گروهی
+    """
+    return RFIBulkResult(
+        updated=sum(1 for o in outcomes.values() if o == crud_rfi.BULK_UPDATED),
+        results=[
+            {"id_RFI": rfi_id, "outcome": outcome}
+            for rfi_id, outcome in outcomes.items()
+        ],
+    )
+
+
+def _serialize(rfis: List[Any]) -> List[dict]:
+    """
+    تبدیل RFIها به JSON برای ذخیره در کش
+    """
+    return RFI_LIST.dump_python(
+        RFI_LIST.validate_python(rfis, from_attributes=True), mode="json"
+    )
+
 
 @router.post("/", response_model=RFI, status_code=status.HTTP_201_CREATED)
-def create_rfi(
+async def create_rfi(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     rfi_in: RFICreate,
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     """
     ایجاد RFI جدید
     """
-    # بررسی تکراری نبودن شماره RFI
-    existing_rfi = crud_rfi.rfi.get_by_rfi_no(db, rfi_no=rfi_in.RFI_no)
-    if existing_rfi:
+    # بررسی تکراری نبودن شماره RFI (بدون کش؛ نتیجه منفی کش‌شده ممکن است کهنه باشد)
+    duplicate = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"RFI with number {rfi_in.RFI_no} already exists"
+    )
+    if await crud_rfi.get_rfi_by_no(db, rfi_no=rfi_in.RFI_no):
+        raise duplicate
+
+    # the unique index settles a race with a concurrent create
+    try:
+        rfi = await crud_rfi.create_rfi(db, rfi_in=rfi_in)
+    except IntegrityError:
+        await db.rollback()
+        raise duplicate
+    return rfi
+
+
+@router.post("/import", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def import_rfis(
+    *,
+    file: UploadFile = File(..., description="RFI register (.xlsx or .csv)"),
+    batch_size: int = Query(rfi_import.DEFAULT_BATCH_SIZE, ge=1, le=10000),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    ورود دسته‌ای RFI از فایل اکسل یا CSV (کار پس‌زمینه)
+
+    The first row must hold column names matching the RFI fields. The file
+    is stored and imported by a background worker; poll `/jobs/{id}`.
+    The job's result is the import report: rows are validated,
+    de-duplicated on RFI_no and inserted in batches, and rejected rows
+    are listed with their row number.
+    """
+    filename = file.filename or ""
+    try:
+        suffix = rfi_import.file_type(filename)
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"RFI with number {rfi_in.RFI_no} already exists"
+            detail=str(e)
         )
-    
-    rfi = crud_rfi.rfi.create(db, obj_in=rfi_in)
-    return rfi
+    upload = job_file(uuid.uuid4().hex, f".upload{suffix}")
+    await run_in_threadpool(_save_upload, file.file, upload)
+    return await job_store.submit(
+        rfi_jobs.IMPORT_JOB,
+        rfi_jobs.import_params(upload, filename, batch_size),
+        owner=job_owner(current_user),
+    )
 
 
-@router.get("/", response_model=List[RFI])
-def read_rfis(
-    db: Session = Depends(get_db),
+@router.post("/bulk/approve", response_model=RFIBulkResult)
+async def bulk_approve_rfis(
+    *,
+    db: AsyncSession = Depends(get_db),
+    bulk_in: RFIBulkRequest,
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    تایید گروهی RFIها (نیاز به دسترسی بازرس)
+
+    Only pending RFIs are approved; every id is reported as updated,
+    not_found or already_closed.
+    """
+    outcomes = await crud_rfi.bulk_transition(
+        db,
+        rfi_ids=bulk_in.ids,
+        action="approve",
+        inspector=current_user.full_name or current_user.username
+    )
+    return _bulk_result(outcomes)
+
+
+@router.post("/bulk/reject", response_model=RFIBulkResult)
+async def bulk_reject_rfis(
+    *,
+    db: AsyncSession = Depends(get_db),
+    bulk_in: RFIBulkReasonRequest,
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    رد گروهی RFIها (نیاز به دسترسی بازرس)
+    """
+    outcomes = await crud_rfi.bulk_transition(
+        db,
+        rfi_ids=bulk_in.ids,
+        action="reject",
+        reason=bulk_in.reason,
+        inspector=current_user.full_name or current_user.username
+    )
+    return _bulk_result(outcomes)
+
+
+@router.post("/bulk/cancel", response_model=RFIBulkResult)
+async def bulk_cancel_rfis(
+    *,
+    db: AsyncSession = Depends(get_db),
+    bulk_in: RFIBulkReasonRequest,
+    current_user: User = Depends(get_current_superuser)
+) -> Any:
+    """
+    کنسل کردن گروهی RFIها (فقط برای Admin)
+    """
+    outcomes = await crud_rfi.bulk_transition(
+        db, rfi_ids=bulk_in.ids, action="cancel", reason=bulk_in.reason
+    )
+    return _bulk_result(outcomes)
+
+
+@router.get("/", response_model=LIST_RESPONSE_MODEL)
+async def read_rfis(
+    db: AsyncSession = Depends(get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    paginate: str = Query("offset", pattern=PAGINATE_PATTERN),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     """
     دریافت لیست RFIها
+
+    - **paginate=cursor** or a **cursor** switches to keyset pagination
+      ordered by (RFI_date, id_RFI) and returns `{items, next_cursor}`
+    - **fields** selects only the given columns (`compact` for the list
+      view); items then contain just those keys
     """
-    rfis = crud_rfi.rfi.get_multi(db, skip=skip, limit=limit)
-    return rfis
+    keyset, after = _keyset_args(paginate, cursor)
+    columns = _list_fields(fields, keyset)
+    if keyset:
+        rfis = await crud_rfi.get_multi(
+            db, limit=limit + 1, after=after, keyset=True, fields=columns
+        )
+    else:
+        rfis = await crud_rfi.get_multi(db, skip=skip, limit=limit, fields=columns)
+    return _list_response(rfis, columns, limit, keyset)
 
 
-@router.get("/search", response_model=List[RFI])
-def search_rfis(
+@router.get("/search", response_model=LIST_RESPONSE_MODEL)
+async def search_rfis(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     rfi_no: str = Query(None),
     tag_no: str = Query(None),
     status: str = Query(None),
@@ -63,11 +350,16 @@ def search_rfis(
     id_loc: int = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    paginate: str = Query("offset", pattern=PAGINATE_PATTERN),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     """
     جستجوی پیشرفته RFIها
     """
+    keyset, after = _keyset_args(paginate, cursor)
+    columns = _list_fields(fields, keyset)
     filters = RFISearchFilters(
         RFI_no=rfi_no,
         tag_no=tag_no,
@@ -78,62 +370,408 @@ def search_rfis(
         id_loc=id_loc
     )
     
-    rfis = crud_rfi.rfi.get_multi_with_filters(
-        db, filters=filters, skip=skip, limit=limit
+    filter_args = dict(
+        rfi_no=filters.RFI_no,
+        tag_no=filters.tag_no,
+        status=filters.status,
+        step=filters.step,
+        id_pre=filters.id_pre,
+        id_dis=filters.id_dis,
+        id_loc=filters.id_loc,
+    )
+    if keyset:
+        rfis = await crud_rfi.get_multi_with_filters(
+            db, limit=limit + 1, after=after, keyset=True, fields=columns,
+            **filter_args
+        )
+    else:
+        rfis = await crud_rfi.get_multi_with_filters(
+            db, skip=skip, limit=limit, fields=columns, **filter_args
+        )
+    return _list_response(rfis, columns, limit, keyset)
+
+
+@router.get("/fuzzy", response_model=List[RFISearchHit])
+async def fuzzy_search_rfis(
+    *,
+    db: AsyncSession = Depends(get_db),
+    q: str = Query(..., min_length=2, max_length=100),
+    fields: List[str] = Query(
+        list(crud_rfi.FUZZY_SEARCH_COLUMNS),
+        description="rfi_no, tag_no, equipment_name, applicant"
+    ),
+    limit: int = Query(20, ge=1, le=200),
+    threshold: float = Query(rfi_search.DEFAULT_THRESHOLD, ge=0.05, le=1.0),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    جستجوی تقریبی RFIها (شماره، تگ، تجهیز، درخواست‌دهنده)
+
+    Ranked by trigram similarity, so partial and misspelled tag numbers
+    still match. Served by the pg_trgm GIN indexes on PostgreSQL.
+    """
+    unknown = set(fields) - set(crud_rfi.FUZZY_SEARCH_COLUMNS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported search fields: {', '.join(sorted(unknown))}"
+        )
+    hits = await rfi_search.fuzzy_search(
+        db, q, fields=fields, limit=limit, threshold=threshold
+    )
+    return [
+        RFISearchHit(**RFI.model_validate(rfi).model_dump(), score=round(score, 4))
+        for rfi, score in hits
+    ]
+
+
+@router.get("/fulltext", response_model=List[RFIFullTextHit])
+async def fulltext_search_rfis(
+    *,
+    db: AsyncSession = Depends(get_db),
+    q: str = Query(..., min_length=2, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=200),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    جستجوی متن کامل در توضیحات و یادداشت‌ها (فارسی و انگلیسی)
+
+    Searches note (including rejection reasons) and equipment_name, ranked
+    by ts_rank, with `<mark>`-highlighted snippets. Supports web search
+    syntax: `"exact phrase"`, `or`, `-exclude`.
+    """
+    hits = await rfi_search.fulltext_search(db, q, skip=skip, limit=limit)
+    return [
+        RFIFullTextHit(
+            **RFI.model_validate(rfi).model_dump(),
+            rank=round(rank, 6),
+            snippet=snippet
+        )
+        for rfi, rank, snippet in hits
+    ]
+
+
+@router.get("/events")
+async def stream_rfi_events(
+    id_pre: Optional[int] = Query(None),
+    id_dis: Optional[int] = Query(None),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: User = Depends(get_current_active_user)
+) -> StreamingResponse:
+    """
+    جریان رویدادهای RFI (Server-Sent Events) به جای polling
+
+    Pushes `rfi.created`, `rfi.updated`, `rfi.moved`, `rfi.approved`,
+    `rfi.rejected`, `rfi.cancelled` and `rfi.deleted` events, optionally
+    only for one project (**id_pre**) and/or discipline (**id_dis**).
+    Reconnecting clients send `Last-Event-ID` and get the missed events
+    replayed; if they are no longer buffered a `resync` event tells the
+    client to reload `/rfis/pending`.
+    """
+    filters = {
+        name: value
+        for name, value in (("id_pre", id_pre), ("id_dis", id_dis))
+        if value is not None
+    }
+    after = None
+    if last_event_id:
+        # شناسه نامعتبر => resync
+        after = int(last_event_id) if last_event_id.isdigit() else -1
+    return StreamingResponse(
+        sse_stream(
+            event_broker, filters, after, heartbeat=settings.EVENTS_HEARTBEAT_SECONDS
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return rfis
 
 
-@router.get("/pending", response_model=List[RFI])
-def read_pending_rfis(
-    db: Session = Depends(get_db),
+@router.get("/pending", response_model=LIST_RESPONSE_MODEL)
+async def read_pending_rfis(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    paginate: str = Query("offset", pattern=PAGINATE_PATTERN),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     """
     دریافت RFIهای در انتظار بازرسی
+
+    Carries a weak ETag from the change counter of all RFIs and the
+    paging and fields parameters; a matching `If-None-Match` gets
+    `304 Not Modified` without a query.
     """
-    rfis = crud_rfi.rfi.get_pending_inspections(db, skip=skip, limit=limit)
-    return rfis
+    keyset, after = _keyset_args(paginate, cursor)
+    columns = _list_fields(fields, keyset)
+    counter = await cache.change_counter(crud_rfi.project_scope(None))
+    etag = None if counter is None else weak_etag(
+        "pending", counter, variant(paginate, skip, limit, cursor, columns)
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    key = cache.key(
+        "pending", paginate, skip, limit, cursor, columns and ",".join(columns),
+        scope=crud_rfi.project_scope(None), version=counter
+    )
+
+    async def load() -> Any:
+        if keyset:
+            rfis = await crud_rfi.get_pending_inspections(
+                db, limit=limit + 1, after=after, keyset=True, fields=columns
+            )
+        else:
+            rfis = await crud_rfi.get_pending_inspections(
+                db, skip=skip, limit=limit, fields=columns
+            )
+        if columns is not None:
+            return _sparse_content(rfis, columns, limit, keyset)
+        if keyset:
+            return _cursor_page(rfis, limit).model_dump(mode="json")
+        return _serialize(rfis)
+
+    # محتوای کش از قبل JSON است؛ اعتبارسنجی دوباره response_model لازم نیست
+    response = JSONResponseClass(await cache.get_or_set_async("pending", key, load))
+    set_etag(response, etag)
+    return response
+
+
+def export_filters(
+    rfi_no: Optional[str] = Query(None),
+    tag_no: Optional[str] = Query(None),
+    equipment_name: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    id_pre: Optional[int] = Query(None),
+    id_dis: Optional[int] = Query(None),
+    applicant: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+) -> dict:
+    """فیلترهای خروجی (همان فیلترهای /search)"""
+    return dict(
+        rfi_no=rfi_no,
+        tag_no=tag_no,
+        equipment_name=equipment_name,
+        status=status,
+        id_pre=id_pre,
+        id_dis=id_dis,
+        applicant=applicant,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
+@router.get("/export")
+async def export_rfis(
+    export_format: str = Query("csv", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    filters: dict = Depends(export_filters),
+    current_user: User = Depends(get_current_active_user)
+) -> StreamingResponse:
+    """
+    خروجی کامل RFIها (CSV / XLSX / NDJSON)
+
+    Uses the same filters as /search and streams every matching row
+    without paging. For large registers use `POST /export`, which runs
+    in the background.
+    """
+    body = rfi_export.stream_export(export_format, **filters)
+    filename = f"rfis_{date.today().isoformat()}.{export_format}"
+    return StreamingResponse(
+        body,
+        media_type=rfi_export.MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/export", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def submit_export_job(
+    export_format: str = Query("csv", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    filters: dict = Depends(export_filters),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    خروجی کامل RFIها در پس‌زمینه
+
+    Same formats and filters as `GET /export`. Poll `/jobs/{id}` for
+    progress and download the file from `/jobs/{id}/result`.
+    """
+    return await job_store.submit(
+        rfi_jobs.EXPORT_JOB,
+        rfi_jobs.export_params(export_format, **filters),
+        owner=job_owner(current_user),
+    )
+
+
+@router.post("/forms", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def submit_forms_job(
+    id_pre: Optional[int] = Query(None, description="Project"),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    فرم‌های چاپی یک پروژه یا بازه تاریخ در یک PDF
+
+    Renders the inspection form of every RFI of the project and/or RFI_date
+    range in the background and merges them into one PDF. Poll
+    `/jobs/{id}` for progress and download it from `/jobs/{id}/result`.
+    """
+    if id_pre is None and date_from is None and date_to is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Specify a project (id_pre) or a date range"
+        )
+    return await job_store.submit(
+        rfi_jobs.FORMS_JOB,
+        rfi_jobs.export_params("pdf", id_pre=id_pre, date_from=date_from, date_to=date_to),
+        owner=job_owner(current_user),
+    )
 
 
 @router.get("/statistics")
-def get_rfi_statistics(
-    db: Session = Depends(get_db),
+async def get_rfi_statistics(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     project_id: int = Query(None),
+    group_by: Optional[str] = Query(
+        None, pattern="^(project|discipline|contractor|month)$"
+    ),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     """
     آمار RFIها
+
+    - **project_id**: Restrict the counters to one project
+    - **group_by**: Break the counters down by project, discipline,
+      contractor or month of RFI_date
+
+    Carries a weak ETag from the project's change counter and group_by;
+    a matching `If-None-Match` gets `304 Not Modified` without a query.
     """
-    stats = crud_rfi.rfi.get_statistics(db, project_id=project_id)
+    scope = crud_rfi.project_scope(project_id)
+    counter = await cache.change_counter(scope)
+    etag = None if counter is None else weak_etag(
+        "statistics", scope, counter, variant(group_by)
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    key = cache.key("statistics", group_by, scope=scope, version=counter)
+    stats = await cache.get_or_set_async(
+        "statistics",
+        key,
+        lambda: crud_rfi.get_statistics(db, project_id=project_id, group_by=group_by),
+    )
+    set_etag(response, etag)
     return stats
 
 
+@router.get("/by-no/{rfi_no}", response_model=RFI)
+async def read_rfi_by_no(
+    *,
+    db: AsyncSession = Depends(get_db),
+    rfi_no: str,
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    دریافت RFI با شماره (از کش)
+    """
+    rfi = await crud_rfi.get_rfi_by_no_cached(db, rfi_no=rfi_no)
+    if not rfi:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="RFI not found"
+        )
+    return rfi
+
+
 @router.get("/{id_rfi}", response_model=RFI)
-def read_rfi(
+async def read_rfi(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     id_rfi: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     """
     دریافت اطلاعات یک RFI
+
+    Carries a weak ETag from the row version. With `If-None-Match` only
+    the version is read first, and an unchanged RFI gets
+    `304 Not Modified`.
     """
-    rfi = crud_rfi.rfi.get(db, id=id_rfi)
+    if request.headers.get("if-none-match"):
+        version = await crud_rfi.get_rfi_version(db, rfi_id=id_rfi)
+        if version is not None:
+            etag = weak_etag("rfi", id_rfi, version)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+    rfi = await crud_rfi.get_rfi(db, rfi_id=id_rfi)
     if not rfi:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="RFI not found"
         )
+    set_etag(response, weak_etag("rfi", id_rfi, rfi.row_version))
     return rfi
 
 
+@router.get("/{id_rfi}/form.{form_format}")
+async def read_rfi_form(
+    *,
+    db: AsyncSession = Depends(get_db),
+    id_rfi: int,
+    form_format: Literal["pdf", "docx"],
+    request: Request,
+    download: bool = Query(False, description="Send as attachment instead of inline"),
+    current_user: User = Depends(get_current_active_user)
+) -> Response:
+    """
+    فرم چاپی RFI برای امضا (PDF یا Word)
+
+    The form is rendered in the form process pool. Carries a weak ETag
+    from the row version, so an unchanged RFI gets `304 Not Modified`
+    without rendering.
+    """
+    if request.headers.get("if-none-match"):
+        version = await crud_rfi.get_rfi_version(db, rfi_id=id_rfi)
+        if version is not None:
+            etag = weak_etag("form", form_format, id_rfi, version)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+    rfi = await crud_rfi.get_rfi(db, rfi_id=id_rfi)
+    if not rfi:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="RFI not found"
+        )
+    record = rfi_forms.form_record(rfi)
+    content = await form_renderer.render(record, form_format)
+    response = Response(
+        content,
+        media_type=rfi_forms.MEDIA_TYPES[form_format],
+        headers={
+            "Content-Disposition": content_disposition(
+                rfi_forms.form_filename(record, form_format),
+                "attachment" if download else "inline",
+            )
+        },
+    )
+    set_etag(response, weak_etag("form", form_format, id_rfi, rfi.row_version))
+    return response
+
+
 @router.put("/{id_rfi}", response_model=RFI)
-def update_rfi(
+async def update_rfi(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     id_rfi: int,
     rfi_in: RFIUpdate,
     current_user: User = Depends(get_current_active_user)
@@ -141,29 +779,27 @@ def update_rfi(
     """
     به‌روزرسانی RFI
     """
-    rfi = crud_rfi.rfi.get(db, id=id_rfi)
+    rfi = await crud_rfi.update_rfi(db, rfi_id=id_rfi, rfi_in=rfi_in)
     if not rfi:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="RFI not found"
         )
-    
-    rfi = crud_rfi.rfi.update(db, db_obj=rfi, obj_in=rfi_in)
     return rfi
 
 
 @router.post("/{id_rfi}/approve", response_model=RFI)
-def approve_rfi(
+async def approve_rfi(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     id_rfi: int,
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     """
     تایید RFI (نیاز به دسترسی بازرس)
     """
-    rfi = crud_rfi.rfi.approve_rfi(
-        db, id_rfi=id_rfi, inspector=current_user.full_name or current_user.username
+    rfi = await crud_rfi.approve_rfi(
+        db, rfi_id=id_rfi, inspector=current_user.full_name or current_user.username
     )
     if not rfi:
         raise HTTPException(
@@ -174,9 +810,9 @@ def approve_rfi(
 
 
 @router.post("/{id_rfi}/reject", response_model=RFI)
-def reject_rfi(
+async def reject_rfi(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     id_rfi: int,
     reason: str = Query(..., min_length=1),
     current_user: User = Depends(get_current_active_user)
@@ -184,9 +820,9 @@ def reject_rfi(
     """
     رد RFI (نیاز به دسترسی بازرس)
     """
-    rfi = crud_rfi.rfi.reject_rfi(
+    rfi = await crud_rfi.reject_rfi(
         db,
-        id_rfi=id_rfi,
+        rfi_id=id_rfi,
         reason=reason,
         inspector=current_user.full_name or current_user.username
     )
@@ -199,9 +835,9 @@ def reject_rfi(
 
 
 @router.post("/{id_rfi}/cancel", response_model=RFI)
-def cancel_rfi(
+async def cancel_rfi(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     id_rfi: int,
     reason: str = Query(..., min_length=1),
     current_user: User = Depends(get_current_superuser)
@@ -209,7 +845,7 @@ def cancel_rfi(
     """
     کنسل کردن RFI (فقط برای Admin)
     """
-    rfi = crud_rfi.rfi.cancel_rfi(db, id_rfi=id_rfi, reason=reason)
+    rfi = await crud_rfi.cancel_rfi(db, rfi_id=id_rfi, reason=reason)
     if not rfi:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -219,19 +855,292 @@ def cancel_rfi(
 
 
 @router.delete("/{id_rfi}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_rfi(
+async def delete_rfi(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     id_rfi: int,
     current_user: User = Depends(get_current_superuser)
 ) -> None:
     """
     حذف RFI (فقط برای Admin)
+
+    Its attachments go with it (ON DELETE CASCADE); their files are
+    removed once no other RFI's attachment shares the content.
     """
-    rfi = crud_rfi.rfi.get(db, id=id_rfi)
-    if not rfi:
+    hashes = await crud_attachment.get_attachment_hashes(db, rfi_id=id_rfi)
+    if not await crud_rfi.delete_rfi(db, rfi_id=id_rfi):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="RFI not found"
+        )
+    for sha256 in hashes:
+        await _release_blob(db, sha256)
+
+
+async def _upload_chunks(upload: UploadFile, chunk_size: int) -> AsyncIterator[bytes]:
+    while chunk := await upload.read(chunk_size):
+        yield chunk
+
+
+def _attachment_filename(filename: Optional[str]) -> Optional[str]:
+    """نام فایل بدون مسیر (کلاینت‌ها گاهی مسیر کامل می‌فرستند)"""
+    if not filename:
+        return None
+    name = PurePosixPath(filename.replace("\\", "/")).name.strip()
+    return name[:255] or None
+
+
+def _attachment_media_type(content_type: Optional[str], filename: str) -> str:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if not media_type or media_type == "application/octet-stream":
+        media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    return media_type[:100]
+
+
+async def _release_blob(db: AsyncSession, sha256: str) -> None:
+    """حذف فایل و نسخه‌های تصویری محتوایی که دیگر ارجاعی ندارد"""
+    if await crud_attachment.release_blob(db, store=attachment_store, sha256=sha256):
+        await image_pipeline.delete(sha256)
+
+
+async def _get_attachment_or_404(db: AsyncSession, id_rfi: int, id_att: int):
+    attachment = await crud_attachment.get_attachment(db, rfi_id=id_rfi, attachment_id=id_att)
+    if not attachment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment not found"
+        )
+    return attachment
+
+
+@router.post(
+    "/{id_rfi}/attachments",
+    response_model=RFIAttachmentInfo,
+    status_code=status.HTTP_201_CREATED,
+)
+async def upload_rfi_attachment(
+    *,
+    db: AsyncSession = Depends(get_db),
+    id_rfi: int,
+    request: Request,
+    filename: Optional[str] = Query(
+        None, max_length=255, description="File name for a raw (non-multipart) body"
+    ),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    آپلود پیوست RFI (عکس بازرسی، گزارش PDF و ...)
+
+    The body is either the file itself (its own `Content-Type`, name in
+    `?filename=`) or a multipart form with a `file` field. The content is
+    hashed and written to storage chunk by chunk, never held in memory,
+    and identical content is stored once.
+    """
+    if await crud_rfi.get_rfi_version(db, rfi_id=id_rfi) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="RFI not found"
         )
-    crud_rfi.rfi.remove(db, id=id_rfi)
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > settings.ATTACHMENT_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Attachment exceeds {settings.ATTACHMENT_MAX_BYTES} bytes"
+        )
+
+    async def store(
+        name: Optional[str], chunks: AsyncIterator[bytes]
+    ) -> attachment_storage.StoredBlob:
+        if not name:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A file name is required"
+            )
+        try:
+            return await attachment_store.save(chunks, max_size=settings.ATTACHMENT_MAX_BYTES)
+        except attachment_storage.AttachmentTooLarge as e:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=str(e)
+            )
+
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        # python-multipart spools file parts to disk beyond 1 MB
+        async with request.form(max_files=1) as form:
+            upload = form.get("file")
+            if not isinstance(upload, StarletteUploadFile):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Multipart upload needs a 'file' field"
+                )
+            name = _attachment_filename(filename or upload.filename)
+            content_type = upload.content_type
+            blob = await store(name, _upload_chunks(upload, attachment_store.chunk_size))
+    else:
+        name = _attachment_filename(filename)
+        blob = await store(name, request.stream())
+
+    try:
+        return await crud_attachment.create_attachment(
+            db,
+            store=attachment_store,
+            rfi_id=id_rfi,
+            blob=blob,
+            filename=name,
+            content_type=_attachment_media_type(content_type, name),
+            uploaded_by=getattr(current_user, "username", None),
+        )
+    except crud_attachment.BlobRemoved as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{e}; retry the upload"
+        )
+
+
+@router.get("/{id_rfi}/attachments", response_model=List[RFIAttachmentInfo])
+async def read_rfi_attachments(
+    *,
+    db: AsyncSession = Depends(get_db),
+    id_rfi: int,
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    فهرست پیوست‌های یک RFI
+    """
+    return await crud_attachment.get_attachments(db, rfi_id=id_rfi)
+
+
+@router.get("/{id_rfi}/attachments/{id_att}")
+async def download_rfi_attachment(
+    *,
+    db: AsyncSession = Depends(get_db),
+    id_rfi: int,
+    id_att: int,
+    request: Request,
+    download: bool = Query(False, description="Send as attachment instead of inline"),
+    current_user: User = Depends(get_current_active_user)
+) -> Response:
+    """
+    دریافت فایل پیوست
+
+    Supports `Range` (one byte range, `206 Partial Content`) with
+    `If-Range`, and `If-None-Match` against the strong ETag (the content
+    hash). Local files are sent with `sendfile` when the server supports
+    the ASGI zero-copy extension.
+    """
+    attachment = await _get_attachment_or_404(db, id_rfi, id_att)
+    etag = f'"{attachment.sha256}"'
+    if etag_matches(request, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": ATTACHMENT_CACHE_CONTROL},
+        )
+
+    size = attachment.size
+    try:
+        byte_range = (
+            parse_range(request.headers.get("range"), size)
+            if if_range_matches(request, etag) else None
+        )
+    except RangeNotSatisfiable:
+        return range_not_satisfiable(size)
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": ATTACHMENT_CACHE_CONTROL,
+        "Content-Disposition": content_disposition(
+            attachment.filename, "attachment" if download else "inline"
+        ),
+    }
+    key = attachment_storage.blob_key(attachment.sha256)
+    path = attachment_store.local_path(key)
+    if path is not None:
+        return RangeFileResponse(
+            path,
+            size=size,
+            byte_range=byte_range,
+            media_type=attachment.content_type,
+            headers=headers,
+        )
+
+    start, end = byte_range or (0, size - 1)
+    status_code, length_headers = range_headers(byte_range, size)
+    return StreamingResponse(
+        attachment_store.iter_range(key, start, end),
+        status_code=status_code,
+        media_type=attachment.content_type,
+        headers={**headers, **length_headers},
+    )
+
+
+@router.get("/{id_rfi}/attachments/{id_att}/{rendition}")
+async def read_rfi_attachment_rendition(
+    *,
+    db: AsyncSession = Depends(get_db),
+    id_rfi: int,
+    id_att: int,
+    rendition: Literal["thumb", "web"],
+    request: Request,
+    current_user: User = Depends(get_current_active_user)
+) -> Response:
+    """
+    پیش‌نمایش (thumb) یا نسخه وب (web) عکس پیوست
+
+    A JPEG no larger than `ATTACHMENT_THUMB_PX` / `ATTACHMENT_WEB_PX`,
+    without EXIF metadata. It is rendered on the first request and then
+    served from the rendition cache; `If-None-Match` gets
+    `304 Not Modified`.
+    """
+    attachment = await _get_attachment_or_404(db, id_rfi, id_att)
+    if attachment.content_type not in attachment_images.IMAGE_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Attachment is not an image"
+        )
+    headers = {
+        "ETag": f'"{attachment.sha256}-{rendition}"',
+        "Cache-Control": ATTACHMENT_CACHE_CONTROL,
+    }
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+        path = await image_pipeline.rendition(
+            attachment.sha256, rendition, size=attachment.size
+        )
+    except attachment_images.NotAnImage as e:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=str(e)
+        )
+    stem = PurePosixPath(attachment.filename).stem
+    headers["Content-Disposition"] = content_disposition(f"{stem}_{rendition}.jpg", "inline")
+    return RangeFileResponse(
+        path,
+        size=(await run_in_threadpool(path.stat)).st_size,
+        media_type=attachment_images.RENDITION_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+@router.delete("/{id_rfi}/attachments/{id_att}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_rfi_attachment(
+    *,
+    db: AsyncSession = Depends(get_db),
+    id_rfi: int,
+    id_att: int,
+    current_user: User = Depends(get_current_superuser)
+) -> None:
+    """
+    حذف پیوست (فقط برای Admin)
+
+    The stored file and its image renditions are removed once no other
+    attachment shares its content.
+    """
+    attachment = await _get_attachment_or_404(db, id_rfi, id_att)
+    sha256 = attachment.sha256
+    if await crud_attachment.delete_attachment(
+        db, store=attachment_store, attachment=attachment
+    ):
+        await image_pipeline.delete(sha256)
@@ -1,202 +1,823 @@
 ﻿"""
 CRUD operations for RFI
 """
-from typing import List, Optional
+import base64
+import binascii
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
 from datetime import date
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import (
+    Row,
+    Select,
+    and_,
+    or_,
+    func,
+    insert,
+    literal,
+    literal_column,
+    select,
+    tuple_,
+    update,
+)
 
+from app.core.cache import cache
+from app.core.events import broker as event_broker
 from app.models.rfi import GeneralRFI
-from app.schemas.rfi import RFICreate, RFIUpdate
+from app.schemas.rfi import RFI, RFICreate, RFIUpdate
 
+# کلید صفحه‌بندی keyset: (RFI_date, id_RFI)
+KeysetPosition = Tuple[date, int]
 
-def create_rfi(db: Session, *, rfi_in: RFICreate) -> GeneralRFI:
+# نتیجه لیست: اشیای ORM یا Row های sparse fieldset
+RFIRows = Union[List[GeneralRFI], List[Row]]
+
+# ستون‌های قابل انتخاب در sparse fieldset (فیلدهای schema RFI)
+LIST_FIELD_COLUMNS = {name: getattr(GeneralRFI, name) for name in RFI.model_fields}
+
+# ستون‌های خروجی (بدون شمارنده داخلی row_version)
+EXPORT_COLUMNS = [
+    column for column in GeneralRFI.__table__.columns if column.key != "row_version"
+]
+
+# نمای فشرده لیست؛ همه در idx_rfi_date_id_cover / idx_rfi_pending
+COMPACT_LIST_FIELDS = (
+    "id_RFI", "RFI_no", "RFI_date", "id_pre", "status", "step", "tag_no",
+)
+
+
+def encode_cursor(rfi: Union[GeneralRFI, Row]) -> str:
+    """ساخت cursor مات از آخرین ردیف یک صفحه"""
+    raw = f"{rfi.RFI_date.isoformat()}|{rfi.id_RFI}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> KeysetPosition:
+    """
+    بازگرداندن cursor به (RFI_date, id_RFI)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        date_part, id_part = raw.split("|", 1)
+        return date.fromisoformat(date_part), int(id_part)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def parse_list_fields(fields: str, *, keyset: bool = False) -> List[str]:
+    """
+    تبدیل پارامتر fields به لیست ستون‌ها
+
+    ``compact`` selects ``COMPACT_LIST_FIELDS``. id_RFI is always
+    selected, and RFI_date too in keyset mode because the next cursor is
+    built from it.
+
+    Raises:
+        ValueError: If a field is not in ``LIST_FIELD_COLUMNS``
+    """
+    if fields == "compact":
+        names = list(COMPACT_LIST_FIELDS)
+    else:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in LIST_FIELD_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    required = ["id_RFI", "RFI_date"] if keyset else ["id_RFI"]
+    return list(dict.fromkeys(required + names))
+
+
+def _pending_clause():
+    """شرط RFI های در انتظار بازرسی"""
+    return and_(
+        GeneralRFI.acc == False,
+        GeneralRFI.rej == False,
+        GeneralRFI.cancel == False
+    )
+
+
+def _list_select(fields: Optional[Sequence[str]]) -> Select:
+    """
+    select کامل ORM یا فقط ستون‌های درخواستی
+
+    With ``fields`` the statement returns plain ``Row`` tuples, skipping
+    ORM instance construction and identity-map bookkeeping.
+    """
+    if fields is None:
+        return select(GeneralRFI)
+    return select(*(LIST_FIELD_COLUMNS[name] for name in fields))
+
+
+def rows_as_dicts(rows: Iterable[Row], fields: Sequence[str]) -> List[dict]:
+    """
+    تبدیل مستقیم Row های sparse fieldset به dict قابل JSON
+
+    Dates become ISO strings, as in the ``RFI`` schema's JSON output;
+    no ORM instance or Pydantic model is built.
+    """
+    return [
+        {
+            name: value.isoformat() if isinstance(value, date) else value
+            for name, value in zip(fields, row)
+        }
+        for row in rows
+    ]
+
+
+async def _paginate(
+    db: AsyncSession,
+    stmt: Select,
+    *,
+    skip: int,
+    limit: int,
+    after: Optional[KeysetPosition],
+    keyset: bool,
+    fields: Optional[Sequence[str]] = None,
+) -> RFIRows:
+    """
+    اعمال صفحه‌بندی offset یا keyset روی select و اجرای آن
+
+    In keyset mode rows are ordered by (RFI_date, id_RFI) and the next page
+    starts strictly after ``after``, so the database seeks straight to the
+    page through the index instead of scanning and discarding skipped rows.
+    When ``stmt`` was built by ``_list_select(fields)`` pass the same
+    ``fields`` so the rows come back as ``Row`` tuples.
+    """
+    if not keyset:
+        stmt = stmt.offset(skip).limit(limit)
+    else:
+        stmt = stmt.order_by(GeneralRFI.RFI_date, GeneralRFI.id_RFI)
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(GeneralRFI.RFI_date, GeneralRFI.id_RFI) > tuple_(*after)
+            )
+        stmt = stmt.limit(limit)
+    result = await db.execute(stmt)
+    if fields is not None:
+        return list(result.all())
+    return list(result.scalars().all())
+
+
+def project_scope(id_pre: Optional[int]) -> str:
+    """نام scope کش برای یک پروژه"""
+    return "all" if id_pre is None else f"project:{id_pre}"
+
+
+def rfi_no_cache_key(rfi_no: str) -> str:
+    """کلید کش جستجوی RFI با شماره"""
+    return cache.key("rfi_no", rfi_no)
+
+
+async def invalidate_rfi_cache(
+    *, rfi_no: str, id_pre: Optional[int], previous_id_pre: Optional[int] = None
+) -> None:
+    """
+    باطل کردن کلیدهای کش یک RFI
+
+    Bumps the version of the RFI's project scope (and the previous project
+    if it moved) plus the cross-project ``all`` scope, and drops the
+    ``get_rfi_by_no`` entry for its number.
+    """
+    scopes = {"all", project_scope(id_pre), project_scope(previous_id_pre)}
+    await cache.bump(*scopes)
+    await cache.delete(rfi_no_cache_key(rfi_no))
+
+
+def _event_data(rfi, **overrides) -> dict:
+    """محتوای رویداد RFI (فیلدهای قابل فیلتر: id_pre و id_dis)"""
+    data = {
+        "id_RFI": rfi.id_RFI,
+        "RFI_no": rfi.RFI_no,
+        "id_pre": rfi.id_pre,
+        "id_dis": rfi.id_dis,
+        "status": rfi.status,
+    }
+    data.update(overrides)
+    return data
+
+
+async def publish_rfi_event(event_type: str, rfi, **overrides) -> None:
+    """
+    انتشار رویداد تغییر RFI برای GET /rfis/events
+
+    Called after commit; a broker failure is logged and never fails the
+    write.
+    """
+    await event_broker.publish(f"rfi.{event_type}", _event_data(rfi, **overrides))
+
+
+async def create_rfi(db: AsyncSession, *, rfi_in: RFICreate) -> GeneralRFI:
     """ایجاد RFI جدید"""
     db_obj = GeneralRFI(**rfi_in.model_dump())
     db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    await invalidate_rfi_cache(rfi_no=db_obj.RFI_no, id_pre=db_obj.id_pre)
+    await publish_rfi_event("created", db_obj)
     return db_obj
 
 
-def get_rfi(db: Session, *, rfi_id: int) -> Optional[GeneralRFI]:
+async def get_existing_rfi_nos(
+    db: AsyncSession, *, rfi_nos: Iterable[str]
+) -> Set[str]:
+    """
+    شماره‌های RFI موجود در دیتابیس از بین یک مجموعه
+
+    One set-based ``RFI_no IN (...)`` lookup served by the unique index.
+    """
+    rfi_nos = list(rfi_nos)
+    if not rfi_nos:
+        return set()
+    result = await db.execute(
+        select(GeneralRFI.RFI_no).where(GeneralRFI.RFI_no.in_(rfi_nos))
+    )
+    return set(result.scalars())
+
+
+async def bulk_create_rfis(db: AsyncSession, *, rows: List[dict]) -> int:
+    """
+    درج دسته‌ای RFI ها
+
+    Rows are validated ``RFICreate`` dumps. They are inserted with a single
+    executemany ``INSERT`` (multi-row VALUES batches) and one commit, with
+    no per-row refresh.
+    """
+    if not rows:
+        return 0
+    await db.execute(insert(GeneralRFI), rows)
+    await db.commit()
+    await _invalidate_created(rows)
+    return len(rows)
+
+
+async def create_rfis_one_by_one(
+    db: AsyncSession, *, rows: List[dict]
+) -> List[Optional[IntegrityError]]:
+    """
+    درج تک‌به‌تک RFI ها پس از شکست درج دسته‌ای
+
+    Each row is inserted and committed on its own, so one row that
+    violates a constraint (unknown foreign key, an ``RFI_no`` inserted
+    concurrently) is rolled back alone. Returns, per row, None or the
+    ``IntegrityError`` that rejected it.
+    """
+    outcomes: List[Optional[IntegrityError]] = []
+    for row in rows:
+        try:
+            await db.execute(insert(GeneralRFI), [row])
+            await db.commit()
+            outcomes.append(None)
+        except IntegrityError as e:
+            await db.rollback()
+            outcomes.append(e)
+    await _invalidate_created([row for row, error in zip(rows, outcomes) if error is None])
+    return outcomes
+
+
+async def _invalidate_created(rows: List[dict]) -> None:
+    """باطل کردن کش پس از درج دسته‌ای"""
+    if not rows:
+        return
+    await cache.bump("all", *{project_scope(row.get("id_pre")) for row in rows})
+    await cache.delete(*(rfi_no_cache_key(row["RFI_no"]) for row in rows))
+
+
+async def get_rfi(db: AsyncSession, *, rfi_id: int) -> Optional[GeneralRFI]:
     """دریافت RFI با ID"""
-    return db.query(GeneralRFI).filter(GeneralRFI.id_RFI == rfi_id).first()
+    return await db.get(GeneralRFI, rfi_id)
 
 
-def get_rfi_by_no(db: Session, *, rfi_no: str) -> Optional[GeneralRFI]:
+async def get_rfi_version(db: AsyncSession, *, rfi_id: int) -> Optional[int]:
+    """نسخه ردیف RFI (بدون بارگذاری کل ردیف) برای بررسی ETag"""
+    result = await db.execute(
+        select(GeneralRFI.row_version).where(GeneralRFI.id_RFI == rfi_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_rfi_by_no(db: AsyncSession, *, rfi_no: str) -> Optional[GeneralRFI]:
     """دریافت RFI با شماره"""
-    return db.query(GeneralRFI).filter(GeneralRFI.RFI_no == rfi_no).first()
+    result = await db.execute(
+        select(GeneralRFI).where(GeneralRFI.RFI_no == rfi_no)
+    )
+    return result.scalars().first()
 
 
-def get_rfis_by_tag(db: Session, *, tag_no: str) -> List[GeneralRFI]:
-    """دریافت لیست RFI های یک تگ"""
-    return db.query(GeneralRFI).filter(GeneralRFI.tag_no == tag_no).all()
+async def get_rfi_by_no_cached(db: AsyncSession, *, rfi_no: str) -> Optional[dict]:
+    """
+    دریافت RFI با شماره از کش
+
+    Returns the serialized RFI (or None when it does not exist); both
+    outcomes are cached until a write touches that RFI number.
+    """
+    async def load() -> Optional[dict]:
+        db_obj = await get_rfi_by_no(db, rfi_no=rfi_no)
+        if db_obj is None:
+            return None
+        return RFI.model_validate(db_obj).model_dump(mode="json")
+
+    return await cache.get_or_set_async("rfi_no", rfi_no_cache_key(rfi_no), load)
 
 
-def get_multi(
-    db: Session, *, skip: int = 0, limit: int = 100
-) -> List[GeneralRFI]:
-    """دریافت لیست RFI ها"""
-    return db.query(GeneralRFI).offset(skip).limit(limit).all()
+async def get_rfis_by_tag(db: AsyncSession, *, tag_no: str) -> List[GeneralRFI]:
+    """دریافت لیست RFI های یک تگ"""
+    result = await db.execute(
+        select(GeneralRFI).where(GeneralRFI.tag_no == tag_no)
+    )
+    return list(result.scalars().all())
 
 
-def get_multi_with_filters(
-    db: Session,
+async def get_multi(
+    db: AsyncSession,
     *,
     skip: int = 0,
     limit: int = 100,
+    after: Optional[KeysetPosition] = None,
+    keyset: bool = False,
+    fields: Optional[Sequence[str]] = None,
+) -> RFIRows:
+    """دریافت لیست RFI ها (با fields فقط همان ستون‌ها به صورت Row)"""
+    return await _paginate(
+        db, _list_select(fields), skip=skip, limit=limit, after=after,
+        keyset=keyset, fields=fields
+    )
+
+
+def filter_clauses(
+    *,
     rfi_no: Optional[str] = None,
     tag_no: Optional[str] = None,
     equipment_name: Optional[str] = None,
     status: Optional[str] = None,
+    step: Optional[str] = None,
     id_pre: Optional[int] = None,
     id_dis: Optional[int] = None,
+    id_loc: Optional[int] = None,
     applicant: Optional[str] = None,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
-) -> List[GeneralRFI]:
-    """جستجوی پیشرفته RFI"""
-    query = db.query(GeneralRFI)
-    
+) -> list:
+    """شرط‌های WHERE جستجوی پیشرفته RFI"""
+    clauses = []
     if rfi_no:
-        query = query.filter(GeneralRFI.RFI_no.ilike(f"%{rfi_no}%"))
+        clauses.append(GeneralRFI.RFI_no.ilike(f"%{rfi_no}%"))
     if tag_no:
-        query = query.filter(GeneralRFI.tag_no.ilike(f"%{tag_no}%"))
+        clauses.append(GeneralRFI.tag_no.ilike(f"%{tag_no}%"))
     if equipment_name:
-        query = query.filter(GeneralRFI.equipment_name.ilike(f"%{equipment_name}%"))
+        clauses.append(GeneralRFI.equipment_name.ilike(f"%{equipment_name}%"))
     if status:
-        query = query.filter(GeneralRFI.status == status)
+        clauses.append(GeneralRFI.status == status)
+    if step:
+        clauses.append(GeneralRFI.step == step)
     if id_pre:
-        query = query.filter(GeneralRFI.id_pre == id_pre)
+        clauses.append(GeneralRFI.id_pre == id_pre)
     if id_dis:
-        query = query.filter(GeneralRFI.id_dis == id_dis)
+        clauses.append(GeneralRFI.id_dis == id_dis)
+    if id_loc:
+        clauses.append(GeneralRFI.id_loc == id_loc)
     if applicant:
-        query = query.filter(GeneralRFI.Applicant.ilike(f"%{applicant}%"))
+        clauses.append(GeneralRFI.Applicant.ilike(f"%{applicant}%"))
     if date_from:
-        query = query.filter(GeneralRFI.RFI_date >= date_from)
+        clauses.append(GeneralRFI.RFI_date >= date_from)
     if date_to:
-        query = query.filter(GeneralRFI.RFI_date <= date_to)
-    
-    return query.offset(skip).limit(limit).all()
+        clauses.append(GeneralRFI.RFI_date <= date_to)
+    return clauses
 
 
-def get_pending_inspections(
-    db: Session, *, skip: int = 0, limit: int = 100
-) -> List[GeneralRFI]:
-    """دریافت RFI های در انتظار بازرسی"""
-    return (
-        db.query(GeneralRFI)
-        .filter(
-            and_(
-                GeneralRFI.acc == False,
-                GeneralRFI.rej == False,
-                GeneralRFI.cancel == False
-            )
-        )
+async def get_multi_with_filters(
+    db: AsyncSession,
+    *,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[KeysetPosition] = None,
+    keyset: bool = False,
+    fields: Optional[Sequence[str]] = None,
+    **filters,
+) -> RFIRows:
+    """جستجوی پیشرفته RFI"""
+    stmt = _list_select(fields).where(*filter_clauses(**filters))
+    return await _paginate(
+        db, stmt, skip=skip, limit=limit, after=after, keyset=keyset,
+        fields=fields
+    )
+
+
+# ستون‌های قابل جستجوی تقریبی (pg_trgm)
+FUZZY_SEARCH_COLUMNS = {
+    "rfi_no": GeneralRFI.RFI_no,
+    "tag_no": GeneralRFI.tag_no,
+    "equipment_name": GeneralRFI.equipment_name,
+    "applicant": GeneralRFI.Applicant,
+}
+
+
+async def fuzzy_search(
+    db: AsyncSession,
+    *,
+    q: str,
+    fields: Iterable[str],
+    limit: int = 20,
+    threshold: float = 0.3,
+) -> List[Tuple[GeneralRFI, float]]:
+    """
+    جستجوی تقریبی RFI با pg_trgm (PostgreSQL)
+
+    Rows match when any field is trigram-similar to ``q`` (``%`` with
+    ``pg_trgm.similarity_threshold`` set for this transaction) or contains
+    it; both predicates are served by the GIN trigram indexes. Results are
+    ordered by the best ``similarity()`` across the fields.
+    """
+    columns = [FUZZY_SEARCH_COLUMNS[field] for field in fields]
+    score = func.greatest(*(func.similarity(column, q) for column in columns))
+
+    await db.execute(
+        select(func.set_config("pg_trgm.similarity_threshold", str(threshold), True))
+    )
+    stmt = (
+        select(GeneralRFI, score.label("score"))
+        .where(or_(
+            *(column.op("%")(q) for column in columns),
+            *(column.ilike(f"%{q}%") for column in columns),
+        ))
+        .order_by(score.desc(), GeneralRFI.id_RFI)
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return [(row[0], float(row.score or 0.0)) for row in result]
+
+
+# ستون tsvector تولیدشده (alembic 8b2d4e6f1a93) - عمداً در مدل map نشده
+# تا select(GeneralRFI) آن را نخواند
+SEARCH_VECTOR = literal_column('"Tbl_RFI".search_vector')
+
+FULLTEXT_HEADLINE_OPTIONS = (
+    "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5"
+)
+
+
+def _fulltext_query(q: str):
+    """tsquery انگلیسی (با ریشه‌یابی) OR ساده (فارسی)"""
+    return func.websearch_to_tsquery(literal_column("'english'::regconfig"), q).op("||")(
+        func.websearch_to_tsquery(literal_column("'simple'::regconfig"), q)
+    )
+
+
+async def fulltext_search(
+    db: AsyncSession, *, q: str, skip: int = 0, limit: int = 20
+) -> List[Tuple[GeneralRFI, float, Optional[str]]]:
+    """
+    جستجوی متن کامل در note و equipment_name (PostgreSQL)
+
+    Matches through the GIN index on ``search_vector`` and orders by
+    ``ts_rank``. ``ts_headline`` is expensive, so snippets are built only
+    for the rows of the requested page.
+    """
+    query = _fulltext_query(q)
+    rank = func.ts_rank(SEARCH_VECTOR, query)
+    page = (
+        select(GeneralRFI.id_RFI, rank.label("rank"))
+        .where(SEARCH_VECTOR.op("@@")(query))
+        .order_by(rank.desc(), GeneralRFI.id_RFI)
         .offset(skip)
         .limit(limit)
-        .all()
+        .subquery()
+    )
+    snippet = func.ts_headline(
+        literal_column("'simple'::regconfig"),
+        func.concat_ws(" | ", GeneralRFI.equipment_name, GeneralRFI.note),
+        _fulltext_query(q),
+        FULLTEXT_HEADLINE_OPTIONS,
+    )
+    stmt = (
+        select(GeneralRFI, page.c.rank, snippet.label("snippet"))
+        .join(page, page.c.id_RFI == GeneralRFI.id_RFI)
+        .order_by(page.c.rank.desc(), GeneralRFI.id_RFI)
+    )
+    result = await db.execute(stmt)
+    return [(row[0], float(row.rank), row.snippet) for row in result]
+
+
+async def count_rfis(db: AsyncSession, **filters) -> int:
+    """تعداد RFIهای منطبق با فیلترها (برای گزارش پیشرفت خروجی)"""
+    result = await db.execute(
+        select(func.count()).select_from(GeneralRFI).where(*filter_clauses(**filters))
+    )
+    return result.scalar_one()
+
+
+async def stream_rows(
+    db: AsyncSession, *, yield_per: int = 1000, **filters
+) -> AsyncIterator[Row]:
+    """
+    خواندن جریانی ردیف‌های RFI برای خروجی
+
+    Selects the table columns as plain ``Row`` tuples (no ORM hydration)
+    through a server-side cursor, fetching ``yield_per`` rows at a time.
+    """
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .where(*filter_clauses(**filters))
+        .order_by(GeneralRFI.id_RFI)
+    )
+    result = await db.stream(stmt.execution_options(yield_per=yield_per))
+    async for partition in result.partitions():
+        for row in partition:
+            yield row
+
+
+async def get_pending_inspections(
+    db: AsyncSession,
+    *,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[KeysetPosition] = None,
+    keyset: bool = False,
+    fields: Optional[Sequence[str]] = None,
+) -> RFIRows:
+    """دریافت RFI های در انتظار بازرسی"""
+    stmt = _list_select(fields).where(_pending_clause())
+    return await _paginate(
+        db, stmt, skip=skip, limit=limit, after=after, keyset=keyset,
+        fields=fields
     )
 
 
-def update_rfi(
-    db: Session, *, rfi_id: int, rfi_in: RFIUpdate
+async def update_rfi(
+    db: AsyncSession, *, rfi_id: int, rfi_in: RFIUpdate
 ) -> Optional[GeneralRFI]:
     """به‌روزرسانی RFI"""
-    db_obj = get_rfi(db, rfi_id=rfi_id)
+    db_obj = await get_rfi(db, rfi_id=rfi_id)
     if not db_obj:
         return None
     
+    previous_id_pre = db_obj.id_pre
     update_data = rfi_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_obj, field, value)
     
     db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    await invalidate_rfi_cache(
+        rfi_no=db_obj.RFI_no, id_pre=db_obj.id_pre, previous_id_pre=previous_id_pre
+    )
+    await publish_rfi_event("updated", db_obj)
+    if previous_id_pre != db_obj.id_pre:
+        # مشترکین پروژه قبلی هم باید خروج RFI را ببینند
+        await publish_rfi_event("moved", db_obj, id_pre=previous_id_pre, to_id_pre=db_obj.id_pre)
     return db_obj
 
 
-def approve_rfi(db: Session, *, rfi_id: int) -> Optional[GeneralRFI]:
+async def approve_rfi(
+    db: AsyncSession, *, rfi_id: int, inspector: Optional[str] = None
+) -> Optional[GeneralRFI]:
     """تایید RFI"""
-    db_obj = get_rfi(db, rfi_id=rfi_id)
+    db_obj = await get_rfi(db, rfi_id=rfi_id)
     if not db_obj:
         return None
     
     db_obj.acc = True
     db_obj.rej = False
     db_obj.status = "Approved"
+    if inspector:
+        db_obj.inspctr = inspector
     
     db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    await invalidate_rfi_cache(rfi_no=db_obj.RFI_no, id_pre=db_obj.id_pre)
+    await publish_rfi_event("approved", db_obj)
     return db_obj
 
 
-def reject_rfi(
-    db: Session, *, rfi_id: int, reason: str
+async def reject_rfi(
+    db: AsyncSession, *, rfi_id: int, reason: str, inspector: Optional[str] = None
 ) -> Optional[GeneralRFI]:
     """رد RFI"""
-    db_obj = get_rfi(db, rfi_id=rfi_id)
+    db_obj = await get_rfi(db, rfi_id=rfi_id)
     if not db_obj:
         return None
     
     db_obj.rej = True
     db_obj.acc = False
     db_obj.status = "Rejected"
+    if inspector:
+        db_obj.inspctr = inspector
     db_obj.note = f"Rejected: {reason}" + (f" | {db_obj.note}" if db_obj.note else "")
     
     db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    await invalidate_rfi_cache(rfi_no=db_obj.RFI_no, id_pre=db_obj.id_pre)
+    await publish_rfi_event("rejected", db_obj)
     return db_obj
 
 
-def cancel_rfi(db: Session, *, rfi_id: int) -> Optional[GeneralRFI]:
+async def cancel_rfi(
+    db: AsyncSession, *, rfi_id: int, reason: Optional[str] = None
+) -> Optional[GeneralRFI]:
     """کنسل کردن RFI"""
-    db_obj = get_rfi(db, rfi_id=rfi_id)
+    db_obj = await get_rfi(db, rfi_id=rfi_id)
     if not db_obj:
         return None
     
     db_obj.cancel = True
     db_obj.status = "Cancelled"
+    if reason:
+        db_obj.note = f"Cancelled: {reason}" + (f" | {db_obj.note}" if db_obj.note else "")
     
     db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    await invalidate_rfi_cache(rfi_no=db_obj.RFI_no, id_pre=db_obj.id_pre)
+    await publish_rfi_event("cancelled", db_obj)
     return db_obj
 
 
-def delete_rfi(db: Session, *, rfi_id: int) -> bool:
+# نتیجه هر شناسه در عملیات گروهی
+BULK_UPDATED = "updated"
+BULK_NOT_FOUND = "not_found"
+BULK_ALREADY_CLOSED = "already_closed"
+
+BULK_ACTIONS = ("approve", "reject", "cancel")
+BULK_EVENT_TYPES = {"approve": "approved", "reject": "rejected", "cancel": "cancelled"}
+
+
+def _bulk_values(
+    action: str, reason: Optional[str], inspector: Optional[str]
+) -> dict:
+    """مقادیر SET برای هر نوع عملیات گروهی"""
+    if action == "approve":
+        values = {"acc": True, "rej": False, "status": "Approved"}
+    elif action == "reject":
+        values = {"rej": True, "acc": False, "status": "Rejected"}
+    elif action == "cancel":
+        values = {"cancel": True, "status": "Cancelled"}
+    else:
+        raise ValueError(f"Unsupported bulk action: {action}")
+
+    if inspector and action in ("approve", "reject"):
+        values["inspctr"] = inspector
+    if reason and action in ("reject", "cancel"):
+        prefix = "Rejected" if action == "reject" else "Cancelled"
+        # the previous note is kept after the reason as far as it fits
+        values["note"] = func.substr(
+            literal(f"{prefix}: {reason}") + func.coalesce(literal(" | ") + GeneralRFI.note, ""),
+            1,
+            GeneralRFI.note.type.length,
+        )
+    return values
+
+
+async def bulk_transition(
+    db: AsyncSession,
+    *,
+    rfi_ids: List[int],
+    action: str,
+    reason: Optional[str] = None,
+    inspector: Optional[str] = None,
+) -> Dict[int, str]:
+    """
+    تایید/رد/کنسل گروهی RFI ها
+
+    Applies one set-based ``UPDATE ... WHERE id_RFI IN (...) RETURNING``
+    to the pending RFIs among ``rfi_ids`` and commits once. Ids that were
+    not updated are classified with a single lookup as not found or
+    already closed (approved, rejected or cancelled).
+    """
+    ids = list(dict.fromkeys(rfi_ids))
+    if not ids:
+        return {}
+
+    stmt = (
+        update(GeneralRFI)
+        .where(GeneralRFI.id_RFI.in_(ids), _pending_clause())
+        .values(**_bulk_values(action, reason, inspector))
+        .returning(
+            GeneralRFI.id_RFI, GeneralRFI.RFI_no, GeneralRFI.id_pre,
+            GeneralRFI.id_dis, GeneralRFI.status,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    updated = (await db.execute(stmt)).all()
+
+    outcomes = {row.id_RFI: BULK_UPDATED for row in updated}
+    remaining = [rfi_id for rfi_id in ids if rfi_id not in outcomes]
+    if remaining:
+        result = await db.execute(
+            select(GeneralRFI.id_RFI).where(GeneralRFI.id_RFI.in_(remaining))
+        )
+        existing = set(result.scalars())
+        for rfi_id in remaining:
+            outcomes[rfi_id] = (
+                BULK_ALREADY_CLOSED if rfi_id in existing else BULK_NOT_FOUND
+            )
+    await db.commit()
+
+    if updated:
+        await cache.bump("all", *{project_scope(row.id_pre) for row in updated})
+        await cache.delete(*(rfi_no_cache_key(row.RFI_no) for row in updated))
+        for row in updated:
+            await publish_rfi_event(BULK_EVENT_TYPES[action], row)
+    return {rfi_id: outcomes[rfi_id] for rfi_id in ids}
+
+
+async def delete_rfi(db: AsyncSession, *, rfi_id: int) -> bool:
     """حذف RFI"""
-    db_obj = get_rfi(db, rfi_id=rfi_id)
+    db_obj = await get_rfi(db, rfi_id=rfi_id)
     if not db_obj:
         return False
     
-    db.delete(db_obj)
-    db.commit()
+    rfi_no, id_pre = db_obj.RFI_no, db_obj.id_pre
+    data = _event_data(db_obj)
+    await db.delete(db_obj)
+    await db.commit()
+    await invalidate_rfi_cache(rfi_no=rfi_no, id_pre=id_pre)
+    await event_broker.publish("rfi.deleted", data)
     return True
 
 
-def get_statistics(db: Session) -> dict:
-    """دریافت آمار RFI"""
-    total = db.query(func.count(GeneralRFI.id_RFI)).scalar()
-    approved = db.query(func.count(GeneralRFI.id_RFI)).filter(GeneralRFI.acc == True).scalar()
-    rejected = db.query(func.count(GeneralRFI.id_RFI)).filter(GeneralRFI.rej == True).scalar()
-    cancelled = db.query(func.count(GeneralRFI.id_RFI)).filter(GeneralRFI.cancel == True).scalar()
-    pending = db.query(func.count(GeneralRFI.id_RFI)).filter(
-        and_(
-            GeneralRFI.acc == False,
-            GeneralRFI.rej == False,
-            GeneralRFI.cancel == False
-        )
-    ).scalar()
-    
+# ستون گروه‌بندی برای هر نوع تفکیک آمار
+STATISTICS_GROUP_COLUMNS = {
+    "project": GeneralRFI.id_pre,
+    "discipline": GeneralRFI.id_dis,
+    "contractor": GeneralRFI.id_com,
+    "month": func.date_trunc(literal_column("'month'"), GeneralRFI.RFI_date),
+}
+
+
+def _status_counts(row) -> dict:
+    """تبدیل یک ردیف شمارش به دیکشنری آمار"""
     return {
-        "total": total,
-        "approved": approved,
-        "rejected": rejected,
-        "cancelled": cancelled,
-        "pending": pending
+        "total": row.total,
+        "approved": row.approved,
+        "rejected": row.rejected,
+        "cancelled": row.cancelled,
+        "pending": row.pending,
+    }
+
+
+async def get_statistics(
+    db: AsyncSession,
+    *,
+    project_id: Optional[int] = None,
+    group_by: Optional[str] = None,
+) -> dict:
+    """
+    دریافت آمار RFI
+
+    All counters are computed in a single scan with ``COUNT(*) FILTER``.
+    When ``group_by`` is one of ``STATISTICS_GROUP_COLUMNS`` the breakdown
+    and the overall totals come from the same ``GROUP BY ROLLUP`` query.
+    """
+    columns = [
+        func.count(GeneralRFI.id_RFI).label("total"),
+        func.count(GeneralRFI.id_RFI).filter(GeneralRFI.acc == True).label("approved"),
+        func.count(GeneralRFI.id_RFI).filter(GeneralRFI.rej == True).label("rejected"),
+        func.count(GeneralRFI.id_RFI).filter(GeneralRFI.cancel == True).label("cancelled"),
+        func.count(GeneralRFI.id_RFI).filter(_pending_clause()).label("pending"),
+    ]
+
+    project_clauses = []
+    if project_id is not None:
+        project_clauses.append(GeneralRFI.id_pre == project_id)
+
+    if group_by is None:
+        result = await db.execute(select(*columns).where(*project_clauses))
+        return _status_counts(result.one())
+
+    if group_by not in STATISTICS_GROUP_COLUMNS:
+        raise ValueError(f"Unsupported group_by: {group_by}")
+
+    key = STATISTICS_GROUP_COLUMNS[group_by]
+    stmt = (
+        select(key.label("key"), func.grouping(key).label("is_total"), *columns)
+        .where(*project_clauses)
+        .group_by(func.rollup(key))
+        .order_by(key)
+    )
+    rows = (await db.execute(stmt)).all()
+
+    stats = {
+        "total": 0,
+        "approved": 0,
+        "rejected": 0,
+        "cancelled": 0,
+        "pending": 0,
     }
+    groups = []
+    for row in rows:
+        if row.is_total:
+            stats.update(_status_counts(row))
+            continue
+        group_key = row.key
+        if group_by == "month" and group_key is not None:
+            group_key = group_key.strftime("%Y-%m")
+        groups.append({"key": group_key, **_status_counts(row)})
+
+    stats["group_by"] = group_by
+    stats["groups"] = groups
+    return stats
@@ -0,0 +1,163 @@
+"""
+CRUD operations for RFI attachments
+
+Attachments that share content share one blob in storage. Writers of a
+blob's references take ``blob_lock`` on its SHA-256: an upload checks,
+under the lock, that its blob is still there before inserting its row,
+and ``release_blob`` counts the references and deletes an unreferenced
+blob under the same lock, so a delete can never remove the blob of an
+upload that is about to be recorded.
+"""
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.rfi import RFIAttachment
+from app.services.attachment_storage import StorageBackend, StoredBlob, blob_key
+
+
+class BlobRemoved(Exception):
+    """The uploaded content was deleted from storage before its row was written"""
+
+
+# قفل درون‌پردازه برای پایگاه‌داده‌های بدون advisory lock (SQLite در تست‌ها)
+_local_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _advisory_key(sha256: str) -> int:
+    """bigint کلید pg_advisory_xact_lock از ۶۴ بیت اول هش"""
+    return int.from_bytes(bytes.fromhex(sha256[:16]), "big", signed=True)
+
+
+@asynccontextmanager
+async def blob_lock(db: AsyncSession, sha256: str) -> AsyncIterator[None]:
+    """
+    قفل ارجاع‌های یک blob
+
+    On PostgreSQL this is a transaction-level advisory lock, shared by all
+    workers and released by the commit or rollback that ends the block's
+    transaction; other databases get an in-process lock.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(_advisory_key(sha256))))
+        yield
+        return
+    lock = _local_locks.get(sha256)
+    if lock is None:
+        lock = _local_locks[sha256] = asyncio.Lock()
+    async with lock:
+        yield
+
+
+async def _reference_count(db: AsyncSession, sha256: str) -> int:
+    result = await db.execute(
+        select(func.count()).select_from(RFIAttachment).where(RFIAttachment.sha256 == sha256)
+    )
+    return result.scalar_one()
+
+
+async def create_attachment(
+    db: AsyncSession,
+    *,
+    store: StorageBackend,
+    rfi_id: int,
+    blob: StoredBlob,
+    filename: str,
+    content_type: str,
+    uploaded_by: Optional[str] = None,
+) -> RFIAttachment:
+    """
+    ثبت پیوست برای فایلی که در storage ذخیره شده است
+
+    A blob this upload created is removed again when the row cannot be
+    written.
+
+    Raises:
+        BlobRemoved: If the last attachment sharing the content was
+            deleted, together with the blob, after ``store.save``
+    """
+    db_obj = RFIAttachment(
+        id_RFI=rfi_id,
+        filename=filename,
+        content_type=content_type,
+        size=blob.size,
+        sha256=blob.sha256,
+        uploaded_by=uploaded_by,
+    )
+    try:
+        async with blob_lock(db, blob.sha256):
+            if not await store.exists(blob.key):
+                raise BlobRemoved("Attachment content was removed concurrently")
+            db.add(db_obj)
+            await db.commit()
+    except BaseException:
+        await db.rollback()
+        if blob.created:
+            await release_blob(db, store=store, sha256=blob.sha256)
+        raise
+    await db.refresh(db_obj)
+    return db_obj
+
+
+async def get_attachments(db: AsyncSession, *, rfi_id: int) -> List[RFIAttachment]:
+    """پیوست‌های یک RFI به ترتیب آپلود"""
+    result = await db.execute(
+        select(RFIAttachment)
+        .where(RFIAttachment.id_RFI == rfi_id)
+        .order_by(RFIAttachment.created_at, RFIAttachment.id_att)
+    )
+    return list(result.scalars().all())
+
+
+async def get_attachment_hashes(db: AsyncSession, *, rfi_id: int) -> Set[str]:
+    """هش محتوای پیوست‌های یک RFI (برای آزاد کردن blob ها پس از حذف RFI)"""
+    result = await db.execute(
+        select(RFIAttachment.sha256).where(RFIAttachment.id_RFI == rfi_id).distinct()
+    )
+    return set(result.scalars())
+
+
+async def get_attachment(
+    db: AsyncSession, *, rfi_id: int, attachment_id: int
+) -> Optional[RFIAttachment]:
+    """دریافت یک پیوست؛ None اگر متعلق به این RFI نباشد"""
+    attachment = await db.get(RFIAttachment, attachment_id)
+    if attachment is None or attachment.id_RFI != rfi_id:
+        return None
+    return attachment
+
+
+async def release_blob(db: AsyncSession, *, store: StorageBackend, sha256: str) -> bool:
+    """
+    حذف blob اگر دیگر پیوستی به آن ارجاع ندهد
+
+    Returns True when the blob was deleted.
+    """
+    async with blob_lock(db, sha256):
+        try:
+            unreferenced = await _reference_count(db, sha256) == 0
+            if unreferenced:
+                await store.delete(blob_key(sha256))
+        finally:
+            # پایان تراکنش، advisory lock را آزاد می‌کند
+            await db.commit()
+    return unreferenced
+
+
+async def delete_attachment(
+    db: AsyncSession, *, store: StorageBackend, attachment: RFIAttachment
+) -> bool:
+    """
+    حذف پیوست
+
+    Returns True when no other attachment referred to the same content
+    and its blob was removed from storage.
+    """
+    sha256 = attachment.sha256
+    await db.delete(attachment)
+    await db.commit()
+    return await release_blob(db, store=store, sha256=sha256)
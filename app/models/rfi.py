@@ -2,7 +2,10 @@
 RFI (Request For Inspection) Model
 مدل درخواست بازرسی
 """
-from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey, Index
+from sqlalchemy import (
+    BigInteger, Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Index, and_, func,
+    literal_column
+)
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
@@ -13,7 +16,7 @@ class GeneralRFI(Base):
     __table_args__ = {"schema": "QC"}
 
     # Primary Key
-    id_RFI = Column(Integer, primary_key=True, index=True)
+    id_RFI = Column(Integer, primary_key=True)
 
     # RFI Information
     RFI_no = Column(String(50), unique=True, index=True, nullable=False)
@@ -61,6 +64,12 @@ class GeneralRFI(Base):
     note = Column(String(500))
     attachment = Column(String(200))
 
+    # نسخه ردیف؛ با هر UPDATE یک واحد زیاد می‌شود (ETag)
+    row_version = Column(
+        Integer, nullable=False, default=1, server_default="1",
+        onupdate=literal_column("row_version") + 1
+    )
+
     # Relationships
     project = relationship("Project", foreign_keys=[id_pre], backref="rfis")
 
@@ -68,8 +77,51 @@ class GeneralRFI(Base):
         return f"<GeneralRFI(id={self.id_RFI}, RFI_no='{self.RFI_no}', status='{self.status}')>"
 
 
-# Create indexes
-Index('idx_rfi_no', GeneralRFI.RFI_no)
-Index('idx_rfi_tag', GeneralRFI.tag_no)
-Index('idx_rfi_date', GeneralRFI.RFI_date)
+# Create indexes (alembic revision 5e9b2c7a4f18)
+# RFI_no and tag_no are already indexed through index=True
+_LIST_INCLUDE = ['RFI_no', 'tag_no', 'status', 'step', 'id_pre']
+_PENDING = and_(GeneralRFI.acc == False, GeneralRFI.rej == False, GeneralRFI.cancel == False)
+
 Index('idx_rfi_status', GeneralRFI.status)
+Index('idx_rfi_project_status_date', GeneralRFI.id_pre, GeneralRFI.status, GeneralRFI.RFI_date)
+Index('idx_rfi_date_id_cover', GeneralRFI.RFI_date, GeneralRFI.id_RFI,
+      postgresql_include=_LIST_INCLUDE + ['acc', 'rej', 'cancel'])
+# RFI های در انتظار بازرسی
+Index('idx_rfi_pending', GeneralRFI.RFI_date, GeneralRFI.id_RFI,
+      postgresql_where=_PENDING, sqlite_where=_PENDING,
+      postgresql_include=_LIST_INCLUDE)
+
+# pg_trgm GIN indexes for fuzzy search (alembic revision 3c1f9a2b7d40)
+Index('idx_rfi_no_trgm', GeneralRFI.RFI_no,
+      postgresql_using='gin', postgresql_ops={'RFI_no': 'gin_trgm_ops'})
+Index('idx_rfi_tag_trgm', GeneralRFI.tag_no,
+      postgresql_using='gin', postgresql_ops={'tag_no': 'gin_trgm_ops'})
+Index('idx_rfi_equipment_trgm', GeneralRFI.equipment_name,
+      postgresql_using='gin', postgresql_ops={'equipment_name': 'gin_trgm_ops'})
+Index('idx_rfi_applicant_trgm', GeneralRFI.Applicant,
+      postgresql_using='gin', postgresql_ops={'Applicant': 'gin_trgm_ops'})
+
+
+class RFIAttachment(Base):
+    """پیوست RFI؛ فایل در storage با کلید SHA-256 محتوا (alembic revision c4f8e2a6b1d7)"""
+    __tablename__ = "Tbl_RFI_Attachment"
+    __table_args__ = {"schema": "QC"}
+
+    id_att = Column(Integer, primary_key=True)
+    id_RFI = Column(
+        Integer, ForeignKey("QC.Tbl_RFI.id_RFI", ondelete="CASCADE"), nullable=False
+    )
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(100), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    uploaded_by = Column(String(100))
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<RFIAttachment(id={self.id_att}, id_RFI={self.id_RFI}, filename='{self.filename}')>"
+
+
+# پیوست‌های هر RFI به ترتیب آپلود؛ sha256 برای شمارش ارجاع‌ها هنگام حذف
+Index('idx_rfi_attachment_rfi', RFIAttachment.id_RFI, RFIAttachment.created_at)
+Index('idx_rfi_attachment_sha256', RFIAttachment.sha256)
@@ -1,8 +1,8 @@
 ﻿"""
 RFI Schemas
 """
-from datetime import date
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 from pydantic import BaseModel, Field, validator
 
 
@@ -88,14 +88,105 @@ class RFI(RFIBase):
         from_attributes = True
 
 
+class RFISearchHit(RFI):
+    """Schema for a ranked search result"""
+    score: float
+
+
+class RFIFullTextHit(RFI):
+    """Schema for a full-text search result with a highlighted snippet"""
+    rank: float
+    snippet: Optional[str] = None
+
+
+class RFIPage(BaseModel):
+    """Schema for a keyset-paginated page of RFIs"""
+    items: List[RFI]
+    next_cursor: Optional[str] = None
+
+
+class RFIListItem(BaseModel):
+    """Schema for a compact RFI list row (fields=compact)"""
+    id_RFI: int
+    RFI_no: str
+    RFI_date: date
+    id_pre: Optional[int] = None
+    status: Optional[str] = None
+    step: Optional[str] = None
+    tag_no: Optional[str] = None
+
+
+class RFIListPage(BaseModel):
+    """Schema for a keyset-paginated page of compact RFI rows"""
+    items: List[RFIListItem]
+    next_cursor: Optional[str] = None
+
+
+class RFIAttachmentInfo(BaseModel):
+    """Schema for an RFI attachment's metadata"""
+    id_att: int
+    id_RFI: int
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    uploaded_by: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class RFIImportError(BaseModel):
+    """Schema for a rejected row of an RFI import"""
+    row: int
+    RFI_no: Optional[str] = None
+    errors: List[str]
+
+
+class RFIImportResult(BaseModel):
+    """Schema for the outcome of an RFI import"""
+    total_rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    duration_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    errors: List[RFIImportError] = []
+
+
+class RFIBulkRequest(BaseModel):
+    """Schema for a bulk workflow transition"""
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class RFIBulkReasonRequest(RFIBulkRequest):
+    """Schema for a bulk transition that records a reason"""
+    # prefixed with "Cancelled: " / "Rejected: " into the 500-character note
+    reason: str = Field(..., min_length=1, max_length=489)
+
+
+class RFIBulkOutcome(BaseModel):
+    """Schema for the outcome of one id in a bulk transition"""
+    id_RFI: int
+    outcome: str
+
+
+class RFIBulkResult(BaseModel):
+    """Schema for the result of a bulk transition"""
+    updated: int
+    results: List[RFIBulkOutcome]
+
+
 class RFISearchFilters(BaseModel):
     """Schema for RFI search filters"""
     RFI_no: Optional[str] = None
     tag_no: Optional[str] = None
     equipment_name: Optional[str] = None
     status: Optional[str] = None
+    step: Optional[str] = None
     id_pre: Optional[int] = None
     id_dis: Optional[int] = None
+    id_loc: Optional[int] = None
     Applicant: Optional[str] = None
     date_from: Optional[date] = None
     date_to: Optional[date] = None
@@ -0,0 +1,3 @@
+"""
+RFI services package
+"""
@@ -0,0 +1,275 @@
+"""
+Image renditions of RFI attachments (thumbnail, web size)
+پیش‌نمایش و نسخه سبک عکس‌های پیوست RFI
+
+Inspection photos arrive as 8–12 MP phone JPEGs of several MB. Lists and
+the web UI get small renditions instead:
+
+- generated lazily on the first request, in a process pool (Pillow);
+  JPEG sources are decoded at a reduced DCT scale (``draft``) first
+- EXIF orientation applied, then all EXIF (GPS, device, timestamps)
+  dropped; the ICC profile is kept so colours stay right
+- downscaled to fit ``max_px`` and re-encoded as progressive JPEG at
+  the rendition's quality
+
+Renditions are files keyed by the original's SHA-256 in a disk cache with
+a size cap; a hit refreshes the file's mtime and the least recently used
+files are evicted when the cap is exceeded. The original blob is never
+modified.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+from starlette.concurrency import run_in_threadpool
+
+from app.services.attachment_storage import StorageBackend, blob_key
+from app.services.process_pool import ProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Formats Pillow decodes that phones and scanners produce
+IMAGE_TYPES = {
+    "image/jpeg", "image/png", "image/webp", "image/gif", "image/bmp", "image/tiff",
+}
+RENDITION_MEDIA_TYPE = "image/jpeg"
+
+# Evict down to this fraction of the cap, so eviction does not run on every write
+EVICT_TO = 0.9
+# A hit refreshes the LRU time at most this often (seconds)
+TOUCH_INTERVAL = 60
+
+
+class NotAnImage(ValueError):
+    """The attachment could not be decoded as an image"""
+
+
+@dataclass(frozen=True)
+class Rendition:
+    name: str
+    max_px: int
+    quality: int
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """RGB for JPEG; transparency becomes white"""
+    if image.mode in ("RGBA", "LA", "P", "PA"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    if image.mode != "RGB":
+        return image.convert("RGB")
+    return image
+
+
+def render_rendition(source: str, destination: str, max_px: int, quality: int) -> Tuple[int, int]:
+    """
+    Write the rendition of the image at source to destination (pool worker)
+
+    Returns the rendition's (width, height).
+    """
+    try:
+        with Image.open(source) as image:
+            # JPEG: let libjpeg decode at 1/2, 1/4 or 1/8 scale (≥ max_px)
+            image.draft("RGB", (max_px, max_px))
+            # a CMYK profile does not describe the RGB output
+            icc_profile = None if image.mode == "CMYK" else image.info.get("icc_profile")
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_px, max_px), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            image = _flatten(image)
+            # no exif= argument: the metadata is not written
+            image.save(
+                destination,
+                "JPEG",
+                quality=quality,
+                optimize=True,
+                progressive=True,
+                icc_profile=icc_profile,
+            )
+            return image.size
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        # the message reaches the client: no storage paths
+        raise NotAnImage("Attachment is not a readable image") from None
+
+
+class RenditionCache:
+    """
+    Rendition files under ``<root>/<rendition>/<ab>/<sha256>.jpg``
+
+    The total size is counted once from disk (on the first write) and then
+    kept up to date; several processes sharing the directory each evict by
+    their own count, and an eviction pass recounts from disk.
+    """
+
+    def __init__(self, root: "os.PathLike[str] | str", max_bytes: int):
+        self.root = Path(root)
+        self.tmp_dir = self.root / ".tmp"
+        self.max_bytes = max_bytes
+        self._used: Optional[int] = None
+
+    def path(self, sha256: str, rendition: str) -> Path:
+        return self.root / rendition / sha256[:2] / f"{sha256}.jpg"
+
+    def get(self, sha256: str, rendition: str) -> Optional[Path]:
+        """Path of a cached rendition, marked as recently used; None on a miss"""
+        path = self.path(sha256, rendition)
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        if time.time() - mtime > TOUCH_INTERVAL:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                return None
+        return path
+
+    def temp_path(self) -> str:
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=self.tmp_dir, suffix=".jpg")
+        os.close(fd)
+        return name
+
+    def _files(self):
+        for directory, _, names in os.walk(self.root):
+            if Path(directory) == self.tmp_dir:
+                continue
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    yield path, os.stat(path)
+                except FileNotFoundError:
+                    continue
+
+    def commit(self, temp_path: str, sha256: str, rendition: str) -> Path:
+        """Move a finished rendition into place and enforce the size cap"""
+        path = self.path(sha256, rendition)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+        if self._used is None:
+            self._used = sum(stat.st_size for _, stat in self._files())
+        else:
+            self._used += size
+        if self._used > self.max_bytes:
+            self.evict()
+        return path
+
+    def evict(self) -> int:
+        """Delete least recently used renditions down to EVICT_TO of the cap"""
+        files = sorted(self._files(), key=lambda item: item[1].st_mtime)
+        used = sum(stat.st_size for _, stat in files)
+        removed = 0
+        for path, stat in files:
+            if used <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            used -= stat.st_size
+            removed += 1
+        self._used = used
+        if removed:
+            logger.info("Evicted %d renditions, %d bytes cached", removed, used)
+        return removed
+
+    def delete(self, sha256: str, renditions) -> None:
+        """Remove the renditions of a deleted original"""
+        for rendition in renditions:
+            path = self.path(sha256, rendition)
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            if self._used is not None:
+                self._used -= size
+
+
+class ImagePipeline:
+    """
+    Lazily generated, cached renditions of image attachments
+
+    Concurrent requests for the same missing rendition share one render.
+    """
+
+    def __init__(
+        self,
+        storage: StorageBackend,
+        cache: RenditionCache,
+        renditions: Dict[str, Rendition],
+        *,
+        workers: int = 2,
+    ):
+        self.storage = storage
+        self.cache = cache
+        self.renditions = renditions
+        self.pool = ProcessPool(workers)
+        self._pending: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def rendition(self, sha256: str, name: str, *, size: int) -> Path:
+        """Path of the rendition of the blob with this hash and size, rendering it if needed"""
+        spec = self.renditions[name]
+        path = await run_in_threadpool(self.cache.get, sha256, name)
+        if path is not None:
+            return path
+
+        key = (sha256, name)
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._render(sha256, spec, size))
+            self._pending[key] = future
+            future.add_done_callback(lambda _: self._pending.pop(key, None))
+        # shielded: one client going away does not cancel the others' render
+        return await asyncio.shield(future)
+
+    async def _download(self, key: str, size: int) -> str:
+        """Copy a blob without a local path (S3) to a temporary file"""
+        temp_path = await run_in_threadpool(self.cache.temp_path)
+        with open(temp_path, "wb") as file:
+            async for chunk in self.storage.iter_range(key, 0, size - 1):
+                await run_in_threadpool(file.write, chunk)
+        return temp_path
+
+    async def _render(self, sha256: str, spec: Rendition, size: int) -> Path:
+        key = blob_key(sha256)
+        source = self.storage.local_path(key)
+        download = None if source is not None else await self._download(key, size)
+        destination = await run_in_threadpool(self.cache.temp_path)
+        try:
+            await self.pool.run(
+                render_rendition, str(source or download), destination, spec.max_px, spec.quality
+            )
+            return await run_in_threadpool(self.cache.commit, destination, sha256, spec.name)
+        finally:
+            for temp_path in (download, destination):
+                if temp_path is not None:
+                    await run_in_threadpool(Path(temp_path).unlink, True)
+
+    async def delete(self, sha256: str) -> None:
+        await run_in_threadpool(self.cache.delete, sha256, list(self.renditions))
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def create_pipeline(config: Any, storage: StorageBackend) -> ImagePipeline:
+    """Image pipeline from the ATTACHMENT_* settings"""
+    quality = config.ATTACHMENT_RENDITION_QUALITY
+    return ImagePipeline(
+        storage,
+        RenditionCache(config.ATTACHMENT_RENDITION_ROOT, config.ATTACHMENT_RENDITION_MAX_BYTES),
+        {
+            "thumb": Rendition("thumb", config.ATTACHMENT_THUMB_PX, quality),
+            "web": Rendition("web", config.ATTACHMENT_WEB_PX, quality),
+        },
+        workers=config.ATTACHMENT_IMAGE_WORKERS,
+    )
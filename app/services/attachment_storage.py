@@ -0,0 +1,280 @@
+"""
+Content-addressed storage for RFI attachments
+ذخیره‌سازی پیوست‌های RFI بر اساس هش محتوا
+
+Blobs are keyed by the SHA-256 of their content (``ab/cd/abcd…``), so a
+photo or report uploaded twice is stored once. An upload is hashed and
+written chunk by chunk to a temporary file; only when the last chunk is in
+and the key is known is the file moved into place (local) or uploaded
+(S3), so a failed or oversized upload never leaves a partial blob.
+
+``S3Storage`` takes any client with boto3's S3 method signatures
+(``head_object``, ``upload_fileobj``, ``get_object``, ``delete_object``),
+e.g. ``boto3.client("s3", endpoint_url=...)`` for MinIO or an in-memory
+stand-in in tests.
+"""
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class AttachmentTooLarge(ValueError):
+    """The upload exceeded the configured size limit"""
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    """Result of saving an upload; created is False for a deduplicated blob"""
+    key: str
+    sha256: str
+    size: int
+    created: bool
+
+
+def blob_key(sha256: str) -> str:
+    """Storage key of a blob: two fan-out levels keep directories small"""
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def _write(file: BinaryIO, digest, data: bytes) -> None:
+    # hashlib releases the GIL for large buffers; both run off the event loop
+    digest.update(data)
+    file.write(data)
+
+
+async def spool(
+    chunks: AsyncIterator[bytes],
+    file: BinaryIO,
+    *,
+    max_size: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Tuple[str, int]:
+    """
+    Write chunks to file while hashing them; returns (sha256, size)
+
+    Small network chunks are gathered into chunk_size writes so each
+    thread hop moves a useful amount of data.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    buffer = bytearray()
+    async for chunk in chunks:
+        size += len(chunk)
+        if max_size is not None and size > max_size:
+            raise AttachmentTooLarge(f"Attachment exceeds {max_size} bytes")
+        buffer += chunk
+        if len(buffer) >= chunk_size:
+            data, buffer = buffer, bytearray()
+            await run_in_threadpool(_write, file, digest, data)
+    if buffer:
+        await run_in_threadpool(_write, file, digest, buffer)
+    await run_in_threadpool(file.flush)
+    return digest.hexdigest(), size
+
+
+class StorageBackend:
+    """Interface of an attachment store"""
+
+    chunk_size = DEFAULT_CHUNK_SIZE
+
+    async def save(
+        self, chunks: AsyncIterator[bytes], *, max_size: Optional[int] = None
+    ) -> StoredBlob:
+        raise NotImplementedError
+
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Filesystem path of a blob when it can be served directly"""
+        return None
+
+    def iter_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Bytes start..end (inclusive) of a blob"""
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    """
+    Blobs under a directory on the local filesystem
+
+    Temporary files live in ``<root>/.tmp`` so the final ``os.replace``
+    stays on one filesystem and is atomic.
+    """
+
+    def __init__(self, root: "os.PathLike[str] | str", *, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.root = Path(root)
+        self.tmp_dir = self.root / ".tmp"
+        self.chunk_size = chunk_size
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def _open_temp(self) -> BinaryIO:
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=self.tmp_dir, delete=False)
+
+    def _commit(self, temp_path: str, key: str) -> bool:
+        path = self._path(key)
+        if path.exists():
+            os.unlink(temp_path)
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_path, path)
+        return True
+
+    async def save(
+        self, chunks: AsyncIterator[bytes], *, max_size: Optional[int] = None
+    ) -> StoredBlob:
+        file = await run_in_threadpool(self._open_temp)
+        try:
+            sha256, size = await spool(
+                chunks, file, max_size=max_size, chunk_size=self.chunk_size
+            )
+            await run_in_threadpool(os.fsync, file.fileno())
+            await run_in_threadpool(file.close)
+            key = blob_key(sha256)
+            created = await run_in_threadpool(self._commit, file.name, key)
+        except BaseException:
+            file.close()
+            await run_in_threadpool(Path(file.name).unlink, True)
+            raise
+        return StoredBlob(key=key, sha256=sha256, size=size, created=created)
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self._path(key).is_file)
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return self._path(key)
+
+    async def iter_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        file = await run_in_threadpool(open, self._path(key), "rb")
+        try:
+            await run_in_threadpool(file.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await run_in_threadpool(file.read, min(self.chunk_size, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            file.close()
+
+    async def delete(self, key: str) -> None:
+        await run_in_threadpool(self._path(key).unlink, True)
+
+
+def _is_not_found(error: Exception) -> bool:
+    """botocore ClientError (or look-alike) for a missing object"""
+    response = getattr(error, "response", None) or {}
+    code = str(response.get("Error", {}).get("Code", ""))
+    return code in ("404", "NoSuchKey", "NotFound")
+
+
+class S3Storage(StorageBackend):
+    """
+    Blobs in an S3-compatible bucket
+
+    The upload is spooled to a local temporary file first: the key is the
+    content hash, known only after the last byte, and an existing key
+    skips the upload altogether. boto3 calls are blocking and run in the
+    threadpool.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        bucket: str,
+        *,
+        prefix: str = "",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _head(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except Exception as e:
+            if _is_not_found(e):
+                return False
+            raise
+        return True
+
+    async def save(
+        self, chunks: AsyncIterator[bytes], *, max_size: Optional[int] = None
+    ) -> StoredBlob:
+        file = await run_in_threadpool(tempfile.TemporaryFile)
+        try:
+            sha256, size = await spool(
+                chunks, file, max_size=max_size, chunk_size=self.chunk_size
+            )
+            key = blob_key(sha256)
+            created = not await run_in_threadpool(self._head, key)
+            if created:
+                await run_in_threadpool(file.seek, 0)
+                await run_in_threadpool(
+                    self.client.upload_fileobj, file, self.bucket, self._object_key(key)
+                )
+        finally:
+            await run_in_threadpool(file.close)
+        return StoredBlob(key=key, sha256=sha256, size=size, created=created)
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self._head, key)
+
+    async def iter_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        if end < start:
+            return
+        response = await run_in_threadpool(
+            self.client.get_object,
+            Bucket=self.bucket,
+            Key=self._object_key(key),
+            Range=f"bytes={start}-{end}",
+        )
+        body = response["Body"]
+        try:
+            while True:
+                chunk = await run_in_threadpool(body.read, self.chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            body.close()
+
+    async def delete(self, key: str) -> None:
+        await run_in_threadpool(
+            self.client.delete_object, Bucket=self.bucket, Key=self._object_key(key)
+        )
+
+
+def create_storage(config: Any) -> StorageBackend:
+    """Attachment store from the ATTACHMENT_* settings"""
+    chunk_size = config.ATTACHMENT_CHUNK_BYTES
+    if config.ATTACHMENT_STORAGE == "s3":
+        import boto3  # optional: only needed for S3 storage
+
+        client = boto3.client("s3", endpoint_url=config.ATTACHMENT_S3_ENDPOINT_URL)
+        return S3Storage(
+            client,
+            config.ATTACHMENT_S3_BUCKET,
+            prefix=config.ATTACHMENT_S3_PREFIX,
+            chunk_size=chunk_size,
+        )
+    return LocalStorage(config.ATTACHMENT_ROOT, chunk_size=chunk_size)
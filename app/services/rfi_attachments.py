@@ -0,0 +1,17 @@
+"""
+Attachment storage of the RFI API
+ذخیره‌سازی پیوست‌های RFI و نسخه‌های تصویری آن‌ها
+
+The blob store (local or S3) and the image rendition pipeline are
+created once here from the ATTACHMENT_* settings; the endpoints serve
+through them and the app closes the pipeline's process pool on
+shutdown.
+"""
+from app.core.config import settings
+from app.services import attachment_images, attachment_storage
+
+# فایل پیوست‌ها (محلی یا S3) بر اساس تنظیمات ATTACHMENT_*
+attachment_store = attachment_storage.create_storage(settings)
+
+# پیش‌نمایش و نسخه وب عکس‌ها؛ در اولین درخواست ساخته و روی دیسک کش می‌شوند
+image_pipeline = attachment_images.create_pipeline(settings, attachment_store)
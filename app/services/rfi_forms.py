@@ -0,0 +1,525 @@
+"""
+Printable RFI inspection forms (PDF / DOCX)
+فرم چاپی درخواست بازرسی برای امضای QC
+
+Templates are parsed once per process and cached:
+
+- PDF: the A4 page with its frame, title and bilingual labels is drawn
+  once with Pillow; a form is a copy of that page with the values drawn
+  in, saved as a bilevel (CCITT G4) PDF page.
+- DOCX: the template (``RFI_FORM_DOCX_TEMPLATE`` or a built-in default
+  made with python-docx) is split around its ``{{field}}`` placeholders;
+  a form is the escaped values joined into those segments and zipped
+  with the template's other parts.
+
+``FormRenderer`` fans rendering out over a process pool (the templates
+are warmed in each child) and merges batches into one PDF with PyPDF2.
+Records passed to the pool are plain dicts of strings (``form_record``).
+"""
+import asyncio
+import functools
+import io
+import logging
+import re
+import zipfile
+from dataclasses import dataclass, field
+from datetime import date
+from typing import (
+    Any, AsyncIterator, Awaitable, BinaryIO, Callable, Dict, List, Optional, Tuple
+)
+from xml.sax.saxutils import escape
+
+from PIL import Image, ImageDraw, ImageFont, features
+from PyPDF2 import PdfReader, PdfWriter
+from starlette.concurrency import run_in_threadpool
+
+from app.services.process_pool import ProcessPool
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+DEFAULT_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+# (field, English label, Persian label) in form order
+FORM_FIELDS: List[Tuple[str, str, str]] = [
+    ("RFI_no", "RFI No.", "شماره RFI"),
+    ("RFI_date", "RFI date", "تاریخ RFI"),
+    ("inspection_date", "Inspection date", "تاریخ بازرسی"),
+    ("id_pre", "Project", "پروژه"),
+    ("tag_no", "Tag No.", "شماره تگ"),
+    ("equipment_name", "Equipment", "تجهیز"),
+    ("Applicant", "Applicant", "درخواست‌کننده"),
+    ("Performer", "Performer", "مجری"),
+    ("inspctr", "Inspector", "بازرس"),
+    ("status", "Status", "وضعیت"),
+    ("step", "Step", "مرحله"),
+    ("result", "Result", "نتیجه"),
+    ("service", "Service", "وضعیت سرویس"),
+    ("note", "Note", "توضیحات"),
+]
+
+# (field, English role, Persian role) of the signature boxes
+SIGNATURES: List[Tuple[str, str, str]] = [
+    ("Contractor", "Contractor", "پیمانکار"),
+    ("QC", "QC", "کنترل کیفیت"),
+    ("TPI", "TPI", "بازرس شخص ثالث"),
+    ("HeadQC", "Head of QC", "سرپرست QC"),
+]
+
+# Derived from the status flags rather than read from a column
+DERIVED_FIELDS = ("result", "service")
+RECORD_FIELDS = [
+    name for name, _, _ in FORM_FIELDS + SIGNATURES if name not in DERIVED_FIELDS
+]
+
+PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+_RTL = re.compile("[\u0590-\u08ff\ufb1d-\ufdff\ufe70-\ufefc]")
+
+TITLE = "Request for Inspection (RFI)"
+TITLE_FA = "فرم درخواست بازرسی"
+
+
+@dataclass(frozen=True)
+class FormOptions:
+    """Template settings; hashable so that parsed templates are cached per value"""
+    font_path: Optional[str] = DEFAULT_FONT
+    dpi: int = 150
+    docx_template: Optional[str] = None
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _result(rfi: Any) -> str:
+    if getattr(rfi, "cancel", False):
+        return "Cancelled"
+    if getattr(rfi, "acc", False):
+        return "Accepted"
+    if getattr(rfi, "rej", False):
+        return "Rejected"
+    return "Pending"
+
+
+def _service(rfi: Any) -> str:
+    states = [
+        label for attribute, label in (
+            ("out_of_service", "Out of service"),
+            ("in_service", "In service"),
+            ("ready_to_service", "Ready to service"),
+        )
+        if getattr(rfi, attribute, False)
+    ]
+    return ", ".join(states)
+
+
+def form_record(rfi: Any) -> Dict[str, str]:
+    """Display strings of an RFI (ORM object or Row) for the form"""
+    record = {name: _text(getattr(rfi, name, None)) for name in RECORD_FIELDS}
+    record["result"] = _result(rfi)
+    record["service"] = _service(rfi)
+    return record
+
+
+def form_filename(record: Dict[str, str], form_format: str) -> str:
+    return f"RFI_{record.get('RFI_no') or 'form'}.{form_format}"
+
+
+# ---------------------------------------------------------------------------
+# PDF (Pillow)
+# ---------------------------------------------------------------------------
+
+A4_MM = (210, 297)
+MARGIN_MM = 15
+ROW_MM = 9
+NOTE_ROW_MM = 30
+LABEL_MM = 62
+SIGNATURE_MM = 38
+
+
+# Measured word widths kept per process (names, tags and note words repeat)
+WIDTH_CACHE_SIZE = 10000
+
+# Grey levels to black/white for the bilevel page
+_THRESHOLD = [255 if level > 160 else 0 for level in range(256)]
+
+
+@dataclass
+class _PdfTemplate:
+    page: Image.Image
+    font: Any
+    raqm: bool
+    boxes: Dict[str, Tuple[int, int, int, int]]
+    line_height: int
+    widths: Dict[str, float] = field(default_factory=dict)
+
+    def length(self, text: str) -> float:
+        """Advance width of text in pixels, memoized (getlength is slow for some fonts)"""
+        width = self.widths.get(text)
+        if width is None:
+            if len(self.widths) >= WIDTH_CACHE_SIZE:
+                self.widths.clear()
+            width = self.widths[text] = self.font.getlength(text)
+        return width
+
+
+def _load_font(path: Optional[str], size: int, raqm: bool):
+    if path:
+        layout = ImageFont.Layout.RAQM if raqm else ImageFont.Layout.BASIC
+        try:
+            return ImageFont.truetype(path, size, layout_engine=layout)
+        except OSError:
+            logger.warning("Form font %s not found, using Pillow's default font", path)
+    return ImageFont.load_default(size)
+
+
+def _draw_text(draw, xy, text: str, font, raqm: bool, anchor: str = "lm") -> None:
+    # Persian needs shaping (libraqm); without it only Latin text is drawn well
+    if raqm and _RTL.search(text):
+        draw.text(xy, text, fill=0, font=font, anchor=anchor, direction="rtl")
+    else:
+        draw.text(xy, text, fill=0, font=font, anchor=anchor)
+
+
+def _fit(text: str, length: Callable[[str], float], width: int) -> str:
+    """text, or its longest prefix with an ellipsis that fits in width"""
+    if length(text) <= width:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if length(text[:middle] + "…") <= width:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low] + "…"
+
+
+def _wrap(text: str, length: Callable[[str], float], width: int, max_lines: int) -> List[str]:
+    """Greedy word wrap from cached word widths (kerning across words is ignored)"""
+    space = length(" ")
+    lines: List[str] = []
+    for paragraph in text.splitlines() or [""]:
+        words: List[str] = []
+        line_width = 0.0
+        for word in paragraph.split():
+            word_width = length(word)
+            if words and line_width + space + word_width > width:
+                lines.append(" ".join(words))
+                words, line_width = [], 0.0
+            line_width += word_width + (space if words else 0)
+            words.append(word)
+        lines.append(" ".join(words))
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] = _fit(lines[-1] + " …", length, width)
+    return [_fit(line, length, width) for line in lines]
+
+
+@functools.lru_cache(maxsize=4)
+def _pdf_template(options: FormOptions) -> _PdfTemplate:
+    """The blank form page (frame, title, labels) and the value boxes"""
+    px = lambda mm: round(mm * options.dpi / 25.4)
+    pt = lambda size: round(size * options.dpi / 72)
+    raqm = features.check("raqm")
+    title_font = _load_font(options.font_path, pt(15), raqm)
+    label_font = _load_font(options.font_path, pt(8.5), raqm)
+    font = _load_font(options.font_path, pt(10), raqm)
+
+    width, height = px(A4_MM[0]), px(A4_MM[1])
+    page = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    left, right = px(MARGIN_MM), width - px(MARGIN_MM)
+    line = max(1, px(0.3))
+
+    y = px(MARGIN_MM)
+    _draw_text(draw, (left, y + px(5)), TITLE, title_font, raqm)
+    if raqm:
+        _draw_text(draw, (right, y + px(5)), TITLE_FA, title_font, raqm, anchor="rm")
+    y += px(14)
+
+    boxes: Dict[str, Tuple[int, int, int, int]] = {}
+    label_right = left + px(LABEL_MM)
+    for name, label, label_fa in FORM_FIELDS:
+        row_height = px(NOTE_ROW_MM if name == "note" else ROW_MM)
+        draw.rectangle((left, y, right, y + row_height), outline=0, width=line)
+        draw.line((label_right, y, label_right, y + row_height), fill=0, width=line)
+        middle = y + px(ROW_MM) // 2
+        _draw_text(draw, (left + px(2), middle), label, label_font, raqm)
+        if raqm:
+            _draw_text(draw, (label_right - px(2), middle), label_fa, label_font, raqm, anchor="rm")
+        boxes[name] = (label_right + px(2.5), y, right - px(2.5), y + row_height)
+        y += row_height
+
+    y += px(8)
+    box_width = (right - left) // len(SIGNATURES)
+    for index, (name, role, role_fa) in enumerate(SIGNATURES):
+        x0 = left + index * box_width
+        x1 = x0 + box_width
+        draw.rectangle((x0, y, x1, y + px(SIGNATURE_MM)), outline=0, width=line)
+        _draw_text(draw, (x0 + px(2), y + px(4)), role, label_font, raqm)
+        if raqm:
+            _draw_text(draw, (x1 - px(2), y + px(4)), role_fa, label_font, raqm, anchor="rm")
+        boxes[name] = (x0 + px(2), y + px(8), x1 - px(2), y + px(14))
+        _draw_text(
+            draw, (x0 + px(2), y + px(SIGNATURE_MM - 5)), "Signature / Date", label_font, raqm
+        )
+
+    return _PdfTemplate(page, font, raqm, boxes, line_height=round(pt(10) * 1.3))
+
+
+def render_pdf(record: Dict[str, str], options: FormOptions) -> bytes:
+    """One form as a single-page PDF"""
+    template = _pdf_template(options)
+    page = template.page.copy()
+    draw = ImageDraw.Draw(page)
+    font = template.font
+    for name, (x0, y0, x1, y1) in template.boxes.items():
+        value = record.get(name, "")
+        if not value:
+            continue
+        width = x1 - x0
+        if name == "note":
+            lines = _wrap(value, template.length, width, (y1 - y0) // template.line_height)
+            for number, text in enumerate(lines):
+                top = y0 + template.line_height // 4 + number * template.line_height
+                _draw_text(draw, (x0, top), text, font, template.raqm, anchor="la")
+        else:
+            text = _fit(value, template.length, width)
+            _draw_text(draw, (x0, (y0 + y1) // 2), text, font, template.raqm)
+
+    output = io.BytesIO()
+    # Bilevel pages are stored CCITT G4 compressed: a few tens of KB per form
+    page.point(_THRESHOLD, mode="1").save(
+        output, format="PDF", resolution=options.dpi
+    )
+    return output.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# DOCX (python-docx template, placeholder substitution)
+# ---------------------------------------------------------------------------
+
+_XML_PARTS = re.compile(r"word/(document|header\d*|footer\d*)\.xml$")
+
+
+@dataclass
+class _DocxTemplate:
+    # (name, compress_type, literal data, or segments split around placeholders)
+    parts: List[Tuple[str, int, Optional[bytes], Optional[List[str]]]]
+
+
+def _iter_paragraphs(container):
+    yield from container.paragraphs
+    for table in container.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                yield from _iter_paragraphs(cell)
+
+
+def _join_split_placeholders(document) -> None:
+    """
+    Word often splits ``{{field}}`` over several runs; such paragraphs are
+    collapsed into their first run so the placeholder is one text node
+    """
+    containers = [document]
+    for section in document.sections:
+        containers += [section.header, section.footer]
+    for container in containers:
+        for paragraph in _iter_paragraphs(container):
+            runs = paragraph.runs
+            if "{{" not in paragraph.text or len(runs) < 2:
+                continue
+            found = len(PLACEHOLDER.findall(paragraph.text))
+            if sum(len(PLACEHOLDER.findall(run.text)) for run in runs) == found:
+                continue
+            runs[0].text = paragraph.text
+            for run in runs[1:]:
+                run.text = ""
+
+
+def _default_docx():
+    from docx import Document
+    from docx.shared import Pt
+
+    document = Document()
+    document.add_heading(f"{TITLE} / {TITLE_FA}", level=1)
+    table = document.add_table(rows=0, cols=2)
+    table.style = "Table Grid"
+    for name, label, label_fa in FORM_FIELDS:
+        cells = table.add_row().cells
+        cells[0].text = f"{label} / {label_fa}"
+        cells[1].text = f"{{{{{name}}}}}"
+    document.add_paragraph()
+    signatures = document.add_table(rows=3, cols=len(SIGNATURES))
+    signatures.style = "Table Grid"
+    for index, (name, role, role_fa) in enumerate(SIGNATURES):
+        signatures.cell(0, index).text = f"{role} / {role_fa}"
+        signatures.cell(1, index).text = f"{{{{{name}}}}}"
+        signatures.cell(2, index).text = "Signature / Date\n\n"
+    for paragraph in _iter_paragraphs(document):
+        for run in paragraph.runs:
+            run.font.size = Pt(10)
+    return document
+
+
+@functools.lru_cache(maxsize=4)
+def _docx_template(options: FormOptions) -> _DocxTemplate:
+    from docx import Document
+
+    if options.docx_template:
+        document = Document(options.docx_template)
+        _join_split_placeholders(document)
+    else:
+        document = _default_docx()
+    source = io.BytesIO()
+    document.save(source)
+
+    parts = []
+    with zipfile.ZipFile(source) as archive:
+        for info in archive.infolist():
+            data = archive.read(info)
+            if _XML_PARTS.match(info.filename):
+                segments = PLACEHOLDER.split(data.decode("utf-8"))
+                parts.append((info.filename, info.compress_type, None, segments))
+            else:
+                parts.append((info.filename, info.compress_type, data, None))
+    return _DocxTemplate(parts)
+
+
+def render_docx(record: Dict[str, str], options: FormOptions) -> bytes:
+    """One form as a Word document; unknown placeholders are left empty"""
+    template = _docx_template(options)
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w") as archive:
+        for name, compress_type, data, segments in template.parts:
+            if segments is not None:
+                data = "".join(
+                    escape(record.get(segment, "")) if index % 2 else segment
+                    for index, segment in enumerate(segments)
+                ).encode("utf-8")
+            archive.writestr(zipfile.ZipInfo(name, (1980, 1, 1, 0, 0, 0)), data, compress_type)
+    return output.getvalue()
+
+
+RENDERERS: Dict[str, Callable[[Dict[str, str], FormOptions], bytes]] = {
+    "pdf": render_pdf,
+    "docx": render_docx,
+}
+
+
+def render_form(record: Dict[str, str], form_format: str, options: FormOptions) -> bytes:
+    return RENDERERS[form_format](record, options)
+
+
+def warm_templates(options: FormOptions) -> None:
+    """Parse both templates (process pool initializer)"""
+    _pdf_template(options)
+    _docx_template(options)
+
+
+def append_pdfs(writer: PdfWriter, documents: List[bytes]) -> int:
+    """Append the pages of each PDF to writer; returns the number of pages added"""
+    pages = 0
+    for data in documents:
+        for page in PdfReader(io.BytesIO(data)).pages:
+            writer.add_page(page)
+            pages += 1
+    return pages
+
+
+# ---------------------------------------------------------------------------
+# Process pool
+# ---------------------------------------------------------------------------
+
+class FormRenderer:
+    """
+    Renders forms off the event loop
+
+    With ``workers=0`` forms are rendered on the threadpool of the current
+    process; otherwise a pool of ``workers`` processes (spawned on first
+    use, templates warmed by the initializer) renders them in parallel.
+    """
+
+    def __init__(self, options: FormOptions, *, workers: int = 2, batch_size: int = 32):
+        self.options = options
+        self.batch_size = batch_size
+        self.pool = ProcessPool(workers, initializer=warm_templates, initargs=(options,))
+
+    async def render(self, record: Dict[str, str], form_format: str) -> bytes:
+        return await self.pool.run(render_form, record, form_format, self.options)
+
+    async def render_many(self, records: List[Dict[str, str]], form_format: str) -> List[bytes]:
+        """Render records concurrently, results in input order"""
+        return list(await asyncio.gather(*(self.render(record, form_format) for record in records)))
+
+    async def render_merged(
+        self,
+        records: AsyncIterator[Dict[str, str]],
+        output: BinaryIO,
+        *,
+        on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> Tuple[int, int]:
+        """
+        Render every record to PDF and write one merged document
+
+        Records are rendered ``batch_size`` at a time; the next batch is
+        rendered while the previous one is merged. Returns (forms, pages).
+        """
+        writer = PdfWriter()
+        forms = pages = 0
+        pending: Optional[asyncio.Future] = None
+
+        async def merge(batch: asyncio.Future) -> None:
+            nonlocal forms, pages
+            documents = await batch
+            pages += await run_in_threadpool(append_pdfs, writer, documents)
+            forms += len(documents)
+            if on_progress is not None:
+                await on_progress(forms)
+
+        try:
+            batch: List[Dict[str, str]] = []
+            async for record in records:
+                batch.append(record)
+                if len(batch) == self.batch_size:
+                    previous = pending
+                    pending = asyncio.ensure_future(self.render_many(batch, "pdf"))
+                    batch = []
+                    if previous is not None:
+                        await merge(previous)
+            if pending is not None:
+                await merge(pending)
+                pending = None
+            if batch:
+                await merge(asyncio.ensure_future(self.render_many(batch, "pdf")))
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+        await run_in_threadpool(writer.write, output)
+        return forms, pages
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def create_renderer(config: Any) -> FormRenderer:
+    """Form renderer from the RFI_FORM_* settings"""
+    return FormRenderer(
+        FormOptions(
+            font_path=config.RFI_FORM_FONT,
+            dpi=config.RFI_FORM_DPI,
+            docx_template=config.RFI_FORM_DOCX_TEMPLATE,
+        ),
+        workers=config.RFI_FORM_WORKERS,
+        batch_size=config.RFI_FORM_BATCH_SIZE,
+    )
@@ -0,0 +1,240 @@
+﻿"""
+Bulk RFI import from Excel/CSV registers
+ورود دسته‌ای RFI از فایل اکسل یا CSV
+"""
+import csv
+import io
+import time
+from datetime import datetime
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from openpyxl import load_workbook
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.crud import rfi as crud_rfi
+from app.schemas.rfi import RFICreate, RFIImportError, RFIImportResult
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# Header (lower-case) -> RFICreate field name
+_FIELD_BY_HEADER = {name.lower(): name for name in RFICreate.model_fields}
+
+
+def _normalize_header(header: Any) -> Optional[str]:
+    if header is None:
+        return None
+    return _FIELD_BY_HEADER.get(str(header).strip().lower())
+
+
+def _normalize_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _rows_from_header(rows: Iterator[tuple]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Map raw rows to {field: value} using the first row as header"""
+    try:
+        header = next(rows)
+    except StopIteration:
+        return
+    fields = [_normalize_header(cell) for cell in header]
+
+    for row_number, row in enumerate(rows, start=2):
+        record = {}
+        for field, value in zip(fields, row):
+            value = _normalize_value(value)
+            if field is not None and value is not None:
+                record[field] = value
+        if record:
+            yield row_number, record
+
+
+def iter_xlsx_rows(file: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Stream rows of the first worksheet (openpyxl read-only mode)"""
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        yield from _rows_from_header(sheet.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def iter_csv_rows(file: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Stream rows of a UTF-8 CSV file"""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        yield from _rows_from_header(iter(csv.reader(text)))
+    finally:
+        text.detach()
+
+
+READERS = {".xlsx": iter_xlsx_rows, ".csv": iter_csv_rows}
+
+
+def file_type(filename: str) -> str:
+    """
+    Register file type (".xlsx" or ".csv") from the file extension
+
+    Raises:
+        ValueError: If the file type is not supported
+    """
+    name = filename.lower()
+    for suffix in READERS:
+        if name.endswith(suffix):
+            return suffix
+    raise ValueError("Only .xlsx and .csv files are supported")
+
+
+def iter_rows(file: BinaryIO, filename: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Pick a reader from the file extension
+
+    Raises:
+        ValueError: If the file type is not supported
+    """
+    return READERS[file_type(filename)](file)
+
+
+def _format_errors(exc: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+        for error in exc.errors()
+    ]
+
+
+def _integrity_errors(exc: IntegrityError) -> List[str]:
+    """Row error for a constraint violation (first line of the driver message)"""
+    lines = str(exc.orig).strip().splitlines()
+    message = lines[0] if lines else "constraint violated"
+    # asyncpg messages come as "<class '...'>: text"
+    if message.startswith("<class"):
+        message = message.split(": ", 1)[-1]
+    return [f"database: {message}"]
+
+
+class _ImportRun:
+    """State of one import: counters, error list and seen RFI numbers"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.result = RFIImportResult()
+        self.seen_rfi_nos = set()
+
+    def add_error(self, row: int, rfi_no: Optional[str], errors: List[str]) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < MAX_REPORTED_ERRORS:
+            self.result.errors.append(
+                RFIImportError(row=row, RFI_no=rfi_no, errors=errors)
+            )
+
+    def read_batch(
+        self, rows: Iterator[Tuple[int, Dict[str, Any]]], batch_size: int
+    ) -> List[Tuple[int, dict]]:
+        """
+        Parse and validate up to batch_size rows
+
+        Runs on the threadpool: spreadsheet parsing and validation are CPU
+        work that would otherwise stall the event loop.
+        """
+        batch: List[Tuple[int, dict]] = []
+        for row_number, record in rows:
+            self.result.total_rows += 1
+            try:
+                rfi_in = RFICreate(**record)
+            except ValidationError as e:
+                self.add_error(row_number, record.get("RFI_no"), _format_errors(e))
+                continue
+
+            if rfi_in.RFI_no in self.seen_rfi_nos:
+                self.add_error(
+                    row_number, rfi_in.RFI_no, ["RFI_no: duplicated in file"]
+                )
+                continue
+            self.seen_rfi_nos.add(rfi_in.RFI_no)
+
+            batch.append((row_number, rfi_in.model_dump()))
+            if len(batch) >= batch_size:
+                break
+        return batch
+
+    async def flush(self, batch: List[Tuple[int, dict]]) -> None:
+        """
+        Drop duplicates with one lookup and insert the rest in bulk
+
+        When the bulk insert violates a constraint (an unknown foreign key,
+        an RFI_no inserted since the lookup) the batch is rolled back and
+        its rows are inserted one at a time, so only the offending rows
+        are rejected and reported.
+        """
+        if not batch:
+            return
+        existing = await crud_rfi.get_existing_rfi_nos(
+            self.db, rfi_nos=[data["RFI_no"] for _, data in batch]
+        )
+        rows = []
+        for row_number, data in batch:
+            if data["RFI_no"] in existing:
+                self.add_error(
+                    row_number, data["RFI_no"], ["RFI_no: already exists"]
+                )
+            else:
+                rows.append((row_number, data))
+        try:
+            self.result.imported += await crud_rfi.bulk_create_rfis(
+                self.db, rows=[data for _, data in rows]
+            )
+            return
+        except IntegrityError:
+            await self.db.rollback()
+
+        outcomes = await crud_rfi.create_rfis_one_by_one(
+            self.db, rows=[data for _, data in rows]
+        )
+        for (row_number, data), error in zip(rows, outcomes):
+            if error is None:
+                self.result.imported += 1
+            else:
+                self.add_error(row_number, data["RFI_no"], _integrity_errors(error))
+
+
+async def import_rfis(
+    db: AsyncSession,
+    rows: Iterator[Tuple[int, Dict[str, Any]]],
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_batch: Optional[Callable[[RFIImportResult], Awaitable[None]]] = None,
+) -> RFIImportResult:
+    """
+    Validate and insert RFI rows in batches
+
+    Each row is validated with ``RFICreate``. Duplicate ``RFI_no`` values are
+    rejected both within the file and against the database (one set-based
+    lookup per batch). Valid rows are inserted ``batch_size`` at a time and
+    every rejected row is reported with its spreadsheet row number.
+    ``on_batch`` is awaited with the running totals after each batch.
+    """
+    run = _ImportRun(db)
+    start = time.perf_counter()
+
+    while True:
+        batch = await run_in_threadpool(run.read_batch, rows, batch_size)
+        if not batch:
+            break
+        await run.flush(batch)
+        if on_batch is not None:
+            await on_batch(run.result)
+
+    duration = time.perf_counter() - start
+    run.result.duration_seconds = round(duration, 3)
+    run.result.rows_per_second = (
+        round(run.result.total_rows / duration, 1) if duration > 0 else 0.0
+    )
+    return run.result
@@ -0,0 +1,157 @@
+"""
+Background jobs for heavy RFI operations
+کارهای پس‌زمینه RFI (خروجی کامل، ورود دسته‌ای و فرم‌های چاپی)
+
+The endpoints submit these jobs and answer ``202 Accepted``; worker
+processes (``python -m scripts.run_worker``) run them with a session of
+their own. Export files, merged form PDFs and uploaded registers live in
+the job data directory; a result file is served from ``/jobs/{id}/result``.
+"""
+from datetime import date
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.jobs import JobContext, JobHandler
+from app.crud import rfi as crud_rfi
+from app.db.session import AsyncSessionLocal
+from app.services import rfi_export, rfi_forms, rfi_import
+
+EXPORT_JOB = "rfi.export"
+IMPORT_JOB = "rfi.import"
+FORMS_JOB = "rfi.forms"
+
+# Process pool of the worker for merged form PDFs (started on first use)
+form_renderer = rfi_forms.create_renderer(settings)
+
+DATE_FILTERS = ("date_from", "date_to")
+
+
+def export_params(export_format: str, **filters: Any) -> Dict[str, Any]:
+    """JSON job params for an export with the /search filters"""
+    params: Dict[str, Any] = {"format": export_format}
+    for name, value in filters.items():
+        if value is not None:
+            params[name] = value.isoformat() if isinstance(value, date) else value
+    return params
+
+
+def _export_filters(params: Dict[str, Any]) -> Dict[str, Any]:
+    filters = {name: value for name, value in params.items() if name != "format"}
+    for name in DATE_FILTERS:
+        if name in filters:
+            filters[name] = date.fromisoformat(filters[name])
+    return filters
+
+
+async def run_export(params: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """Write the register export to the job's result file"""
+    export_format = params["format"]
+    filters = _export_filters(params)
+    suffix = f".{export_format}"
+    path = context.path(suffix)
+    written = 0
+
+    async with AsyncSessionLocal() as db:
+        total = await crud_rfi.count_rfis(db, **filters)
+
+        async def rows() -> AsyncIterator[tuple]:
+            nonlocal written
+            async for row in crud_rfi.stream_rows(
+                db, yield_per=rfi_export.CHUNK_ROWS, **filters
+            ):
+                written += 1
+                if written % rfi_export.CHUNK_ROWS == 0:
+                    await context.progress(
+                        written / total if total else None, f"{written}/{total} rows"
+                    )
+                yield row
+
+        try:
+            with open(path, "wb") as output:
+                async for chunk in rfi_export.WRITERS[export_format](rows()):
+                    await run_in_threadpool(output.write, chunk)
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+
+    return {
+        "suffix": suffix,
+        "filename": f"rfis_{date.today().isoformat()}{suffix}",
+        "media_type": rfi_export.MEDIA_TYPES[export_format],
+        "size": path.stat().st_size,
+        "rows": written,
+    }
+
+
+async def run_forms(params: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """Render the forms of the matching RFIs into one merged PDF"""
+    filters = _export_filters(params)
+    path = context.path(".pdf")
+
+    async with AsyncSessionLocal() as db:
+        total = await crud_rfi.count_rfis(db, **filters)
+        if not total:
+            raise ValueError("No RFIs match the filters")
+
+        async def records() -> AsyncIterator[Dict[str, str]]:
+            async for row in crud_rfi.stream_rows(
+                db, yield_per=rfi_export.CHUNK_ROWS, **filters
+            ):
+                yield rfi_forms.form_record(row)
+
+        async def on_progress(forms: int) -> None:
+            await context.progress(forms / total, f"{forms}/{total} forms")
+
+        try:
+            with open(path, "wb") as output:
+                forms, pages = await form_renderer.render_merged(
+                    records(), output, on_progress=on_progress
+                )
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+
+    return {
+        "suffix": ".pdf",
+        "filename": f"rfi_forms_{date.today().isoformat()}.pdf",
+        "media_type": rfi_forms.MEDIA_TYPES["pdf"],
+        "size": path.stat().st_size,
+        "forms": forms,
+        "pages": pages,
+    }
+
+
+def import_params(upload: Path, filename: str, batch_size: int) -> Dict[str, Any]:
+    """JSON job params for importing an uploaded register from the data directory"""
+    return {"upload": upload.name, "filename": filename, "batch_size": batch_size}
+
+
+async def run_import(params: Dict[str, Any], context: JobContext) -> Optional[Dict[str, Any]]:
+    """Import an uploaded register; the upload is deleted afterwards"""
+    path = Path(context.data_dir) / params["upload"]
+
+    async def on_batch(result) -> None:
+        await context.progress(
+            None, f"{result.total_rows} rows read, {result.imported} imported"
+        )
+
+    try:
+        async with AsyncSessionLocal() as db:
+            with open(path, "rb") as file:
+                rows = rfi_import.iter_rows(file, params["filename"])
+                result = await rfi_import.import_rfis(
+                    db, rows, batch_size=params["batch_size"], on_batch=on_batch
+                )
+    finally:
+        path.unlink(missing_ok=True)
+    return result.model_dump()
+
+
+HANDLERS: Dict[str, JobHandler] = {
+    EXPORT_JOB: run_export,
+    IMPORT_JOB: run_import,
+    FORMS_JOB: run_forms,
+}
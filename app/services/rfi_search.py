@@ -0,0 +1,100 @@
+"""
+Fuzzy and full-text RFI search
+جستجوی تقریبی و متن کامل RFI
+
+PostgreSQL is searched through the pg_trgm GIN indexes
+(``crud_rfi.fuzzy_search``) and the generated ``search_vector`` column
+(``crud_rfi.fulltext_search``). Other databases (SQLite test runs) use an
+in-memory trigram index that follows pg_trgm's trigram extraction and
+similarity (``trigram_index``), so rankings match between the two, and a
+plain substring match for full-text queries.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import rfi as crud_rfi
+from app.models.rfi import GeneralRFI
+from app.services.trigram_index import TrigramIndex
+
+DEFAULT_THRESHOLD = 0.3
+
+# Arabic yeh/kaf -> Persian, ZWNJ -> word break (same as search_vector)
+_PERSIAN_FOLD = str.maketrans({"\u064a": "\u06cc", "\u0643": "\u06a9", "\u200c": " "})
+
+
+def normalize_query(q: str) -> str:
+    """Fold a query the way search_vector folds the indexed text"""
+    return " ".join(q.translate(_PERSIAN_FOLD).split())
+
+
+async def _fallback_search(
+    db: AsyncSession, q: str, fields: List[str], limit: int, threshold: float
+) -> List[Tuple[GeneralRFI, float]]:
+    columns = [crud_rfi.FUZZY_SEARCH_COLUMNS[field] for field in fields]
+    # Built per call: the fallback only serves small test databases
+    indexes = [TrigramIndex() for _ in columns]
+    result = await db.execute(select(GeneralRFI.id_RFI, *columns))
+    for row in result:
+        for index, text in zip(indexes, row[1:]):
+            index.add(row[0], text)
+
+    best: Dict[int, float] = {}
+    for index in indexes:
+        for key, score in index.search(q, threshold).items():
+            best[key] = max(score, best.get(key, 0.0))
+    ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    if not ranked:
+        return []
+
+    rows = await db.execute(
+        select(GeneralRFI).where(GeneralRFI.id_RFI.in_([key for key, _ in ranked]))
+    )
+    by_id = {rfi.id_RFI: rfi for rfi in rows.scalars()}
+    return [(by_id[key], score) for key, score in ranked if key in by_id]
+
+
+async def fuzzy_search(
+    db: AsyncSession,
+    q: str,
+    *,
+    fields: Iterable[str] = tuple(crud_rfi.FUZZY_SEARCH_COLUMNS),
+    limit: int = 20,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Tuple[GeneralRFI, float]]:
+    """
+    Rank RFIs by trigram similarity of q to the given fields
+
+    Returns (RFI, score) pairs, best first. Typos in tag numbers
+    (``P-1O1A`` for ``P-101A``) still match above the threshold.
+    """
+    fields = list(dict.fromkeys(fields))
+    if db.get_bind().dialect.name == "postgresql":
+        return await crud_rfi.fuzzy_search(
+            db, q=q, fields=fields, limit=limit, threshold=threshold
+        )
+    return await _fallback_search(db, q, fields, limit, threshold)
+
+
+async def fulltext_search(
+    db: AsyncSession, q: str, *, skip: int = 0, limit: int = 20
+) -> List[Tuple[GeneralRFI, float, Optional[str]]]:
+    """
+    Rank RFIs by full-text relevance of note and equipment_name
+
+    Returns (RFI, rank, snippet) triples, best first. ``q`` accepts web
+    search syntax: quoted phrases, ``or`` and ``-excluded`` words.
+    """
+    q = normalize_query(q)
+    if db.get_bind().dialect.name == "postgresql":
+        return await crud_rfi.fulltext_search(db, q=q, skip=skip, limit=limit)
+
+    result = await db.execute(
+        select(GeneralRFI)
+        .where(or_(GeneralRFI.note.ilike(f"%{q}%"), GeneralRFI.equipment_name.ilike(f"%{q}%")))
+        .order_by(GeneralRFI.id_RFI)
+        .offset(skip)
+        .limit(limit)
+    )
+    return [(rfi, 0.0, rfi.note) for rfi in result.scalars()]
@@ -0,0 +1,69 @@
+"""
+In-memory trigram index following pg_trgm semantics
+"""
+import re
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+# pg_trgm treats every non-alphanumeric character as a word separator
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    """Trigrams of text as pg_trgm extracts them (padded, lower-case words)"""
+    result: Set[str] = set()
+    if not text:
+        return result
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            result.add(padded[i:i + 3])
+    return result
+
+
+def similarity(a: Set[str], b: Set[str]) -> float:
+    """pg_trgm similarity(): shared trigrams over distinct trigrams"""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+class TrigramIndex:
+    """Inverted trigram index over (key, text) pairs"""
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._trigrams: Dict[int, Set[str]] = {}
+        self._texts: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._trigrams)
+
+    def add(self, key: int, text: Optional[str]) -> None:
+        if not text:
+            return
+        grams = trigrams(text)
+        self._trigrams[key] = grams
+        self._texts[key] = text.lower()
+        for gram in grams:
+            self._postings[gram].add(key)
+
+    def search(self, query: str, threshold: float = 0.3) -> Dict[int, float]:
+        """
+        Keys similar to query (or containing it) with their similarity
+
+        Only keys sharing at least one trigram with the query are scored.
+        """
+        query_grams = trigrams(query)
+        needle = query.lower()
+        candidates: Set[int] = set()
+        for gram in query_grams:
+            candidates |= self._postings.get(gram, set())
+
+        scores = {}
+        for key in candidates:
+            score = similarity(query_grams, self._trigrams[key])
+            if score >= threshold or needle in self._texts[key]:
+                scores[key] = score
+        return scores
@@ -0,0 +1,52 @@
+"""pg_trgm GIN indexes for fuzzy RFI search
+
+Serves leading-wildcard ILIKE and similarity (%) searches on RFI_no,
+tag_no, equipment_name and Applicant. Indexes are built CONCURRENTLY so
+the migration does not lock QC.Tbl_RFI against writes.
+
+Revision ID: 3c1f9a2b7d40
+Revises:
+Create Date: 2026-10-17 09:00:00
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3c1f9a2b7d40"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TRIGRAM_INDEXES = {
+    "idx_rfi_no_trgm": "RFI_no",
+    "idx_rfi_tag_trgm": "tag_no",
+    "idx_rfi_equipment_trgm": "equipment_name",
+    "idx_rfi_applicant_trgm": "Applicant",
+}
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name, column in TRIGRAM_INDEXES.items():
+            op.create_index(
+                name,
+                "Tbl_RFI",
+                [column],
+                schema="QC",
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in TRIGRAM_INDEXES:
+            op.drop_index(
+                name,
+                table_name="Tbl_RFI",
+                schema="QC",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
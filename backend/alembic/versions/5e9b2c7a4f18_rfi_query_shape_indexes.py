@@ -0,0 +1,102 @@
+"""Indexes matched to the RFI list, pending and project query shapes
+
+- idx_rfi_pending: partial index on (RFI_date, id_RFI) for
+  ``acc = false AND rej = false AND cancel = false``; serves the pending
+  list (offset and keyset) without touching decided RFIs.
+- idx_rfi_project_status_date: (id_pre, status, RFI_date) for project and
+  project+status filters with a date range, and per-project statistics.
+- idx_rfi_date_id_cover: replaces idx_rfi_date / idx_rfi_date_id with the
+  keyset order plus the list projection columns in INCLUDE, so list pages
+  can be answered by index-only scans.
+
+idx_rfi_no and idx_rfi_tag duplicated the indexes created by
+``index=True`` on RFI_no and tag_no, and ix_QC_Tbl_RFI_id_RFI duplicated
+the primary key; they are dropped. New indexes are
+built before the old ones are dropped so no query shape is ever left
+without an index.
+
+Revision ID: 5e9b2c7a4f18
+Revises: 8b2d4e6f1a93
+Create Date: 2026-10-17 13:00:00
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5e9b2c7a4f18"
+down_revision = "8b2d4e6f1a93"
+branch_labels = None
+depends_on = None
+
+PENDING_PREDICATE = sa.text("acc = false AND rej = false AND cancel = false")
+
+# Columns shown by RFI list views
+LIST_INCLUDE = ["RFI_no", "tag_no", "status", "step", "id_pre"]
+
+NEW_INDEXES = {
+    "idx_rfi_pending": dict(
+        columns=["RFI_date", "id_RFI"],
+        postgresql_where=PENDING_PREDICATE,
+        postgresql_include=LIST_INCLUDE,
+    ),
+    "idx_rfi_project_status_date": dict(
+        columns=["id_pre", "status", "RFI_date"],
+    ),
+    "idx_rfi_date_id_cover": dict(
+        columns=["RFI_date", "id_RFI"],
+        postgresql_include=LIST_INCLUDE + ["acc", "rej", "cancel"],
+    ),
+}
+
+# name -> columns, for downgrade
+DROPPED_INDEXES = {
+    "idx_rfi_no": ["RFI_no"],
+    "idx_rfi_tag": ["tag_no"],
+    "idx_rfi_date": ["RFI_date"],
+    "idx_rfi_date_id": ["RFI_date", "id_RFI"],
+    "ix_QC_Tbl_RFI_id_RFI": ["id_RFI"],
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, options in NEW_INDEXES.items():
+            options = dict(options)
+            op.create_index(
+                name,
+                "Tbl_RFI",
+                options.pop("columns"),
+                schema="QC",
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **options,
+            )
+        for name in DROPPED_INDEXES:
+            op.drop_index(
+                name,
+                table_name="Tbl_RFI",
+                schema="QC",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, columns in DROPPED_INDEXES.items():
+            op.create_index(
+                name,
+                "Tbl_RFI",
+                columns,
+                schema="QC",
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name in NEW_INDEXES:
+            op.drop_index(
+                name,
+                table_name="Tbl_RFI",
+                schema="QC",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
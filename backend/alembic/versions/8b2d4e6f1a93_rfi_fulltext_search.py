@@ -0,0 +1,66 @@
+"""Generated tsvector column and GIN index for RFI full-text search
+
+search_vector covers equipment_name (weight A) and note (weight B, which
+also holds rejection and cancellation reasons). Each field is indexed
+with the 'english' configuration (stemming) and the 'simple'
+configuration (no stemming) so Persian words match as written. Arabic
+yeh/kaf are folded to their Persian forms and ZWNJ is treated as a word
+break, matching rfi_search.normalize_query().
+
+Adding a STORED generated column rewrites QC.Tbl_RFI under an ACCESS
+EXCLUSIVE lock; run it in a maintenance window on large tables.
+
+Revision ID: 8b2d4e6f1a93
+Revises: 3c1f9a2b7d40
+Create Date: 2026-10-17 11:00:00
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8b2d4e6f1a93"
+down_revision = "3c1f9a2b7d40"
+branch_labels = None
+depends_on = None
+
+
+def _normalized(column: str) -> str:
+    return (
+        f"translate(coalesce({column}, ''), "
+        "U&'\\064A\\0643\\200C', U&'\\06CC\\06A9 ')"
+    )
+
+
+SEARCH_VECTOR = " || ".join(
+    f"setweight(to_tsvector('{config}'::regconfig, {_normalized(column)}), '{weight}')"
+    for column, weight in (("equipment_name", "A"), ("note", "B"))
+    for config in ("english", "simple")
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        'ALTER TABLE "QC"."Tbl_RFI" ADD COLUMN IF NOT EXISTS search_vector tsvector '
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_rfi_search_vector",
+            "Tbl_RFI",
+            ["search_vector"],
+            schema="QC",
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "idx_rfi_search_vector",
+            table_name="Tbl_RFI",
+            schema="QC",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.execute('ALTER TABLE "QC"."Tbl_RFI" DROP COLUMN IF EXISTS search_vector')
@@ -0,0 +1,31 @@
+"""Row version counter on QC.Tbl_RFI for ETags
+
+row_version starts at 1 and is incremented by every UPDATE issued through
+the ORM (``onupdate`` on GeneralRFI.row_version). Adding a NOT NULL
+column with a constant default is a catalog-only change on PostgreSQL 11+,
+so existing rows are not rewritten.
+
+Revision ID: a71c3e5d9b62
+Revises: 5e9b2c7a4f18
+Create Date: 2026-10-17 15:00:00
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a71c3e5d9b62"
+down_revision = "5e9b2c7a4f18"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "Tbl_RFI",
+        sa.Column("row_version", sa.Integer(), nullable=False, server_default="1"),
+        schema="QC",
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("Tbl_RFI", "row_version", schema="QC")
@@ -0,0 +1,55 @@
+"""RFI attachments table (QC.Tbl_RFI_Attachment)
+
+One row per uploaded file; the content lives in attachment storage under
+its SHA-256, so several rows may share one blob. Rows go with their RFI
+(ON DELETE CASCADE). The legacy Tbl_RFI.attachment string is left as is.
+
+Revision ID: c4f8e2a6b1d7
+Revises: a71c3e5d9b62
+Create Date: 2026-10-17 17:00:00
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4f8e2a6b1d7"
+down_revision = "a71c3e5d9b62"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "Tbl_RFI_Attachment",
+        sa.Column("id_att", sa.Integer(), primary_key=True),
+        sa.Column(
+            "id_RFI",
+            sa.Integer(),
+            sa.ForeignKey("QC.Tbl_RFI.id_RFI", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("content_type", sa.String(100), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("sha256", sa.String(64), nullable=False),
+        sa.Column("uploaded_by", sa.String(100)),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        schema="QC",
+    )
+    op.create_index(
+        "idx_rfi_attachment_rfi", "Tbl_RFI_Attachment", ["id_RFI", "created_at"], schema="QC"
+    )
+    op.create_index(
+        "idx_rfi_attachment_sha256", "Tbl_RFI_Attachment", ["sha256"], schema="QC"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_rfi_attachment_sha256", table_name="Tbl_RFI_Attachment", schema="QC")
+    op.drop_index("idx_rfi_attachment_rfi", table_name="Tbl_RFI_Attachment", schema="QC")
+    op.drop_table("Tbl_RFI_Attachment", schema="QC")
@@ -2,23 +2,25 @@
 FastAPI dependencies for authentication and authorization
 """
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.revocation import revocation_list
+from app.core.security import decode_token
+from app.core.user_cache import AuthenticatedUser, user_cache
 from app.db.session import get_db
 from app.crud.user import user as user_crud
-from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 
 async def get_current_user(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
-) -> User:
+) -> AuthenticatedUser:
     """
     Get current authenticated user from JWT token
     
@@ -27,7 +29,7 @@ async def get_current_user(
         token: JWT access token
         
     Returns:
-        Current user object
+        Current user principal (id, username, full_name, is_active, is_superuser)
         
     Raises:
         HTTPException: If token is invalid or user not found
@@ -38,28 +40,33 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+    # Verified claims are cached per token until exp
+    payload = decode_token(token)
+    if payload is None:
+        raise credentials_exception
+    user_id: str = payload.get("sub")
+    if user_id is None:
+        raise credentials_exception
+    
+    # Logged out / signed out everywhere (in-memory check, Redis only on a filter hit)
+    if await revocation_list.is_revoked(payload):
         raise credentials_exception
     
-    user = user_crud.get(db, id=int(user_id))
+    user = await user_cache.load_async(
+        int(user_id), lambda: user_crud.get(db, id=int(user_id))
+    )
     if user is None:
         raise credentials_exception
     
+    # Expose the principal to the access log
+    request.state.user_id = user.id
+    
     return user
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: AuthenticatedUser = Depends(get_current_user)
+) -> AuthenticatedUser:
     """
     Get current active user
     
@@ -81,8 +88,8 @@ async def get_current_active_user(
 
 
 async def get_current_superuser(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+) -> AuthenticatedUser:
     """
     Get current superuser
     
@@ -2,30 +2,56 @@
 Authentication endpoints: login, register, logout, user info
 """
 from datetime import timedelta
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from backend.app.core.config import settings
-from backend.app.core.security import (
-    hash_password,
-    verify_password,
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.security import (
+    hash_password_async,
+    verify_and_update_password_async,
     create_access_token,
-    create_refresh_token
+    create_refresh_token,
+    decode_token
 )
-from backend.app.core.dependencies import get_current_user
-from backend.app.db.session import get_db
-from backend.app.models.user import User
-from backend.app.schemas.user import UserCreate, UserResponse
-from backend.app.schemas.auth import LoginRequest, LoginResponse, Token
+from app.core.dependencies import get_current_user, get_token_claims
+from app.core.revocation import RevocationUnavailable, revocation_list
+from app.db.session import get_db
+from app.models.user import User
+from app.schemas.user import UserCreate, UserResponse
+from app.schemas.auth import LoginRequest, LoginResponse, LogoutRequest, Token
 
 
 router = APIRouter()
 
 
+def revocation_unavailable() -> HTTPException:
+    """503 returned when a revocation could not be recorded"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Could not revoke the session, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def issue_tokens(user_id: int) -> dict:
+    """Access and refresh token carrying the user's current token epoch"""
+    data = {"sub": str(user_id), "ep": await revocation_list.epoch(user_id)}
+    return {
+        "access_token": create_access_token(
+            data=data,
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        ),
+        "refresh_token": create_refresh_token(data=data),
+        "token_type": "bearer",
+    }
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Register a new user
@@ -36,7 +62,9 @@ async def register(
     - **full_name**: Optional full name
     """
     # Check if username exists
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
+    existing_user = (
+        await db.execute(select(User).where(User.username == user_data.username))
+    ).scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -44,26 +72,31 @@ async def register(
         )
     
     # Check if email exists
-    existing_email = db.query(User).filter(User.email == user_data.email).first()
+    existing_email = (
+        await db.execute(select(User).where(User.email == user_data.email))
+    ).scalars().first()
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
+    # Hash password off the event loop
+    hashed_password = await hash_password_async(user_data.password)
+    
     # Create new user
     db_user = User(
         username=user_data.username,
         email=user_data.email,
-        hashed_password=hash_password(user_data.password),
+        hashed_password=hashed_password,
         full_name=user_data.full_name,
         is_active=True,
         is_superuser=False
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
@@ -71,7 +104,7 @@ async def register(
 @router.post("/login", response_model=LoginResponse)
 async def login(
     login_data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Login with username and password
@@ -79,16 +112,30 @@ async def login(
     Returns access token and refresh token
     """
     # Find user by username
-    user = db.query(User).filter(User.username == login_data.username).first()
+    user = (
+        await db.execute(select(User).where(User.username == login_data.username))
+    ).scalars().first()
     
-    # Verify user exists and password is correct
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    # Verify user exists and password is correct (off the event loop)
+    password_ok, new_hash = False, None
+    if user:
+        password_ok, new_hash = await verify_and_update_password_async(
+            login_data.password, user.hashed_password
+        )
+    
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Transparently upgrade hashes made with outdated bcrypt settings
+    if new_hash:
+        user.hashed_password = new_hash
+        db.add(user)
+        await db.commit()
+    
     # Check if user is active
     if not user.is_active:
         raise HTTPException(
@@ -97,17 +144,8 @@ async def login(
         )
     
     # Create tokens
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.id)},
-        expires_delta=access_token_expires
-    )
-    refresh_token = create_refresh_token(data={"sub": str(user.id)})
-    
     return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "token_type": "bearer",
+        **await issue_tokens(user.id),
         "user": {
             "id": user.id,
             "username": user.username,
@@ -120,44 +158,91 @@ async def login(
 
 
 @router.post("/logout")
-async def logout(current_user: User = Depends(get_current_user)):
+async def logout(
+    logout_data: Optional[LogoutRequest] = None,
+    claims: dict = Depends(get_token_claims),
+    current_user: User = Depends(get_current_user)
+):
     """
     Logout current user
     
-    Note: JWT tokens are stateless, so logout is handled client-side
-    by removing the token. This endpoint is mainly for logging purposes.
+    Revokes the access token used for this request and, when given, the
+    session's refresh token (until they expire).
+    
+    - **refresh_token**: Optional refresh token to revoke as well
     """
+    revoke = [claims]
+    if logout_data is not None and logout_data.refresh_token:
+        refresh_claims = decode_token(logout_data.refresh_token)
+        # Only the caller's own tokens
+        if refresh_claims is not None and refresh_claims.get("sub") == claims["sub"]:
+            revoke.append(refresh_claims)
+    
+    try:
+        for token_claims in revoke:
+            await revocation_list.revoke(token_claims)
+    except RevocationUnavailable:
+        raise revocation_unavailable()
+    
     return {
         "message": f"User {current_user.username} logged out successfully",
         "detail": "Please remove the token from client storage"
     }
 
 
+@router.post("/logout/all")
+async def logout_all(current_user: User = Depends(get_current_user)):
+    """
+    Sign out everywhere
+    
+    Revokes every access and refresh token issued to the current user so
+    far, on all devices, including the one used for this request.
+    """
+    try:
+        await revocation_list.revoke_all(current_user.id)
+    except RevocationUnavailable:
+        raise revocation_unavailable()
+    
+    return {
+        "message": f"All sessions of user {current_user.username} were signed out",
+        "detail": "Please log in again"
+    }
+
+
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
     """
     Get current authenticated user information
     
     Requires valid JWT token in Authorization header
     """
-    return current_user
+    user = await db.get(User, current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
 
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token(
     refresh_token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Refresh access token using refresh token
     
     - **refresh_token**: Valid refresh token
-    """
-    from backend.app.core.security import decode_token
     
+    The refresh token is single-use: it is revoked when the new pair is issued.
+    """
     # Decode refresh token
     payload = decode_token(refresh_token)
-    if payload is None:
+    if payload is None or await revocation_list.is_revoked(payload):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token"
@@ -171,23 +256,18 @@ async def refresh_token(
         )
     
     # Verify user exists and is active
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = await db.get(User, int(user_id))
     if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or inactive"
         )
     
-    # Create new tokens
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    new_access_token = create_access_token(
-        data={"sub": str(user.id)},
-        expires_delta=access_token_expires
-    )
-    new_refresh_token = create_refresh_token(data={"sub": str(user.id)})
+    # Rotate: the used refresh token cannot be replayed
+    try:
+        await revocation_list.revoke(payload)
+    except RevocationUnavailable:
+        raise revocation_unavailable()
     
-    return {
-        "access_token": new_access_token,
-        "refresh_token": new_refresh_token,
-        "token_type": "bearer"
-    }
+    # Create new tokens
+    return await issue_tokens(user.id)
@@ -5,8 +5,11 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
-from app.db.session import get_db
+from app.db.session import get_db, pool_metrics, slow_query_logger
+from app.core.cache import cache
 from app.core.config import settings
+from app.core.security import password_hash_pool, token_decode_cache
+from app.core.user_cache import user_cache
 
 router = APIRouter()
 
@@ -21,6 +24,20 @@ async def health_check():
     }
 
 
+def database_pool_stats() -> dict:
+    """Pool metrics plus the slow query counter"""
+    return {
+        **pool_metrics.stats(),
+        "slow_queries": slow_query_logger.slow_queries,
+    }
+
+
+@router.get("/db-pool")
+async def database_pool_metrics():
+    """Connection pool metrics (checked out, overflow, wait time, timeouts)"""
+    return database_pool_stats()
+
+
 @router.get("/detailed")
 async def detailed_health_check(db: AsyncSession = Depends(get_db)):
     """Detailed health check including database"""
@@ -40,4 +57,13 @@ async def detailed_health_check(db: AsyncSession = Depends(get_db)):
         health_status["status"] = "unhealthy"
         health_status["checks"]["database"] = f"unhealthy: {str(e)}"
     
+    # Connection pool
+    health_status["database_pool"] = database_pool_stats()
+    
+    # Cache hit/miss counters
+    health_status["cache"] = cache.stats()
+    health_status["user_cache"] = user_cache.stats()
+    health_status["password_hashing"] = password_hash_pool.stats()
+    health_status["token_decode_cache"] = token_decode_cache.stats()
+    
     return health_status
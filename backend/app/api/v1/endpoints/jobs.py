@@ -0,0 +1,95 @@
+"""
+Background job endpoints (status, cancellation, result files)
+"""
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+
+from app.api.dependencies import get_current_active_user
+from app.core.jobs import SUCCEEDED, Job, job_file, job_owner, job_store
+from app.core.ranges import (
+    RangeFileResponse,
+    RangeNotSatisfiable,
+    content_disposition,
+    parse_range,
+    range_not_satisfiable,
+)
+from app.core.user_cache import AuthenticatedUser
+from app.schemas.job import JobStatus
+
+router = APIRouter()
+
+
+async def _get_job_or_404(job_id: str, user: AuthenticatedUser) -> Job:
+    """Jobs are visible to the user who submitted them and to admins"""
+    job = await job_store.get(job_id)
+    if job is None or (job.owner != job_owner(user) and not user.is_superuser):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job(
+    job_id: str,
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """
+    Get the status, progress and result of a job
+
+    Poll until `status` is `succeeded`, `failed` or `cancelled`. File
+    results are downloaded from `/jobs/{job_id}/result`.
+    """
+    return await _get_job_or_404(job_id, current_user)
+
+
+@router.delete("/{job_id}", response_model=JobStatus)
+async def cancel_job(
+    job_id: str,
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """
+    Cancel a job
+
+    A queued job is cancelled at once; a running job is stopped by its
+    worker shortly after (`cancel_requested` is set until then).
+    """
+    await _get_job_or_404(job_id, current_user)
+    return await job_store.cancel(job_id)
+
+
+@router.get("/{job_id}/result")
+async def download_job_result(
+    job_id: str,
+    request: Request,
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+) -> Response:
+    """
+    Download the file produced by a job (e.g. an export); supports Range
+    """
+    job = await _get_job_or_404(job_id, current_user)
+    if job.status != SUCCEEDED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job.status}"
+        )
+    result = job.result or {}
+    path = job_file(job.id, result["suffix"]) if "suffix" in result else None
+    if path is None or not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job has no result file"
+        )
+
+    size = path.stat().st_size
+    try:
+        byte_range = parse_range(request.headers.get("range"), size)
+    except RangeNotSatisfiable:
+        return range_not_satisfiable(size)
+    return RangeFileResponse(
+        path,
+        size=size,
+        byte_range=byte_range,
+        media_type=result.get("media_type"),
+        headers={"Content-Disposition": content_disposition(result.get("filename", path.name))},
+    )
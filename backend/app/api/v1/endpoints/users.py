@@ -3,8 +3,9 @@ User management endpoints
 """
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.revocation import RevocationUnavailable, revocation_list
 from app.db.session import get_db
 from app.crud.user import user as user_crud
 from app.schemas.user import (
@@ -26,8 +27,8 @@ router = APIRouter()
 # List Users (with filters)
 # ============================================
 @router.get("/", response_model=UserListResponse)
-def list_users(
-    db: Session = Depends(get_db),
+async def list_users(
+    db: AsyncSession = Depends(get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = Query(None, description="Search in username, email, or full_name"),
@@ -44,7 +45,7 @@ def list_users(
     - **is_active**: Filter by active status
     - **is_superuser**: Filter by superuser status
     """
-    users = user_crud.get_multi_with_filters(
+    users = await user_crud.get_multi_with_filters(
         db,
         skip=skip,
         limit=limit,
@@ -54,22 +55,12 @@ def list_users(
     )
     
     # Get total count (same filters without pagination)
-    total_query = db.query(User)
-    if search:
-        from sqlalchemy import or_
-        total_query = total_query.filter(
-            or_(
-                User.username.ilike(f"%{search}%"),
-                User.email.ilike(f"%{search}%"),
-                User.full_name.ilike(f"%{search}%")
-            )
-        )
-    if is_active is not None:
-        total_query = total_query.filter(User.is_active == is_active)
-    if is_superuser is not None:
-        total_query = total_query.filter(User.is_superuser == is_superuser)
-    
-    total = total_query.count()
+    total = await user_crud.count_with_filters(
+        db,
+        search=search,
+        is_active=is_active,
+        is_superuser=is_superuser
+    )
     
     return {
         "total": total,
@@ -83,22 +74,29 @@ def list_users(
 # Get Current User
 # ============================================
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(
+async def get_current_user_info(
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get current logged-in user information
     """
-    return current_user
+    user = await user_crud.get(db, id=current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
 
 
 # ============================================
 # Get User by ID
 # ============================================
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(
+async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -114,7 +112,7 @@ def get_user(
             detail="Not enough permissions"
         )
     
-    user = user_crud.get(db, id=user_id)
+    user = await user_crud.get(db, id=user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -128,9 +126,9 @@ def get_user(
 # Create User (Admin only)
 # ============================================
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_user(
+async def create_user(
     user_in: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_superuser)
 ):
     """
@@ -143,20 +141,20 @@ def create_user(
     - At least one lowercase letter
     """
     # Check if username exists
-    if user_crud.get_by_username(db, username=user_in.username):
+    if await user_crud.get_by_username(db, username=user_in.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
     
     # Check if email exists
-    if user_crud.get_by_email(db, email=user_in.email):
+    if await user_crud.get_by_email(db, email=user_in.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    user = user_crud.create(db, obj_in=user_in)
+    user = await user_crud.create(db, obj_in=user_in)
     return user
 
 
@@ -164,10 +162,10 @@ def create_user(
 # Update User
 # ============================================
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user(
+async def update_user(
     user_id: int,
     user_in: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -176,7 +174,7 @@ def update_user(
     - Regular users can only update their own profile (except is_superuser)
     - Admins can update any user
     """
-    user = user_crud.get(db, id=user_id)
+    user = await user_crud.get(db, id=user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -199,7 +197,7 @@ def update_user(
     
     # Check username uniqueness if changed
     if user_in.username and user_in.username != user.username:
-        if user_crud.get_by_username(db, username=user_in.username):
+        if await user_crud.get_by_username(db, username=user_in.username):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already registered"
@@ -207,13 +205,13 @@ def update_user(
     
     # Check email uniqueness if changed
     if user_in.email and user_in.email != user.email:
-        if user_crud.get_by_email(db, email=user_in.email):
+        if await user_crud.get_by_email(db, email=user_in.email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
     
-    user = user_crud.update(db, db_obj=user, obj_in=user_in)
+    user = await user_crud.update(db, db_obj=user, obj_in=user_in)
     return user
 
 
@@ -221,9 +219,9 @@ def update_user(
 # Delete User (Soft Delete)
 # ============================================
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(
+async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_superuser)
 ):
     """
@@ -231,7 +229,7 @@ def delete_user(
     
     This marks the user as inactive but doesn't remove from database
     """
-    user = user_crud.get(db, id=user_id)
+    user = await user_crud.get(db, id=user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -246,7 +244,7 @@ def delete_user(
         )
     
     # Soft delete by setting is_active to False
-    user_crud.update(db, db_obj=user, obj_in={"is_active": False})
+    await user_crud.update(db, db_obj=user, obj_in={"is_active": False})
     return None
 
 
@@ -254,9 +252,9 @@ def delete_user(
 # Restore User
 # ============================================
 @router.post("/{user_id}/restore", response_model=UserResponse)
-def restore_user(
+async def restore_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_superuser)
 ):
     """
@@ -264,7 +262,7 @@ def restore_user(
     
     This reactivates an inactive user
     """
-    user = user_crud.get(db, id=user_id)
+    user = await user_crud.get(db, id=user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -277,5 +275,38 @@ def restore_user(
             detail="User is already active"
         )
     
-    user = user_crud.update(db, db_obj=user, obj_in={"is_active": True})
+    user = await user_crud.update(db, db_obj=user, obj_in={"is_active": True})
     return user
+
+
+# ============================================
+# Revoke User Sessions
+# ============================================
+@router.post("/{user_id}/revoke-sessions", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_user_sessions(
+    user_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    Sign a user out of all sessions (Admin only)
+    
+    Every access and refresh token issued to the user so far stops working;
+    the account itself stays active.
+    """
+    user = await user_crud.get(db, id=user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    try:
+        await revocation_list.revoke_all(user_id)
+    except RevocationUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not revoke the sessions, please retry",
+            headers={"Retry-After": "1"},
+        )
+    return None
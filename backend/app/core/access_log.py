@@ -0,0 +1,71 @@
+"""
+Structured access log
+
+One JSON line per request on the ``app.access`` logger. Request handlers
+only enqueue the record (``QueueHandler``); formatting and writing happen
+on a ``QueueListener`` thread, so a slow stdout or log collector cannot
+stall the event loop.
+"""
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+ACCESS_LOGGER_NAME = "app.access"
+
+access_logger = logging.getLogger(ACCESS_LOGGER_NAME)
+
+_listener: Optional[QueueListener] = None
+
+
+class JSONAccessFormatter(logging.Formatter):
+    """Render the ``access`` dict attached to a record as one JSON line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            **getattr(record, "access", {}),
+        }
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _AccessQueueHandler(QueueHandler):
+    """QueueHandler that skips formatting in the calling thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_access_log(stream=None, level: int = logging.INFO) -> QueueListener:
+    """
+    Route ``app.access`` through a queue to a JSON stream handler
+
+    Idempotent; returns the running listener. Call ``shutdown_access_log``
+    on shutdown to flush queued records.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JSONAccessFormatter())
+
+    access_logger.handlers = [_AccessQueueHandler(records)]
+    access_logger.setLevel(level)
+    access_logger.propagate = False
+
+    _listener = QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_access_log() -> None:
+    """Stop the listener thread after draining queued records"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
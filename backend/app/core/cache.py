@@ -0,0 +1,263 @@
+"""
+Response cache for hot read paths
+
+Values are stored as JSON under versioned keys. Every cache scope (for
+example ``project:12`` or ``all``) has a version counter; bumping the
+counter makes all keys built from the old version unreachable, so write
+paths can invalidate a whole scope with a single INCR instead of scanning
+for keys. Redis is used when available, with an in-process backend for
+single-worker setups and tests. Both backends are async so that cache
+round trips never block the event loop.
+"""
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is in requirements.txt
+    aioredis = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sentinel used to tell "not cached" apart from a cached None
+MISS = object()
+
+
+class MemoryCacheBackend:
+    """In-process cache backend (single worker and tests)"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+
+    async def incr(self, key: str) -> int:
+        with self._lock:
+            value, expires_at = self._data.get(key, ("0", None))
+            new_value = int(value) + 1
+            self._data[key] = (str(new_value), expires_at)
+            return new_value
+
+    async def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisCacheBackend:
+    """
+    Redis cache backend (redis.asyncio)
+
+    Connection problems are logged and treated as cache misses so that a
+    Redis outage degrades to uncached reads instead of failing requests.
+    """
+
+    def __init__(self, url: str):
+        self._client = aioredis.Redis.from_url(
+            url,
+            decode_responses=True,
+            socket_timeout=settings.CACHE_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.CACHE_SOCKET_TIMEOUT,
+        )
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            return await self._client.get(key)
+        except aioredis.RedisError as e:
+            logger.warning("Cache get failed for %s: %s", key, e)
+            return None
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        try:
+            await self._client.set(key, value, ex=ttl or None)
+        except aioredis.RedisError as e:
+            logger.warning("Cache set failed for %s: %s", key, e)
+
+    async def incr(self, key: str) -> int:
+        try:
+            return await self._client.incr(key)
+        except aioredis.RedisError as e:
+            logger.warning("Cache incr failed for %s: %s", key, e)
+            return 0
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            await self._client.delete(*keys)
+        except aioredis.RedisError as e:
+            logger.warning("Cache delete failed for %s: %s", keys, e)
+
+    async def clear(self) -> None:
+        try:
+            await self._client.flushdb()
+        except aioredis.RedisError as e:
+            logger.warning("Cache clear failed: %s", e)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class ResponseCache:
+    """
+    JSON response cache with per-scope versioned keys and hit/miss counters
+    """
+
+    def __init__(self, backend, *, prefix: str = "idms", default_ttl: int = 60):
+        self.backend = backend
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self._hits: Dict[str, int] = defaultdict(int)
+        self._misses: Dict[str, int] = defaultdict(int)
+
+    def _version_key(self, scope: str) -> str:
+        return f"{self.prefix}:ver:{scope}"
+
+    async def version(self, scope: str) -> int:
+        """Current version of a cache scope"""
+        return int(await self.backend.get(self._version_key(scope)) or 0)
+
+    async def change_counter(self, scope: str) -> Optional[int]:
+        """
+        Version of a scope for HTTP validators (ETags)
+
+        A missing counter (never bumped, evicted, or lost with the
+        in-process backend) is started at the current time in ms rather
+        than 0, so it never falls back to a value an old ETag was built
+        from. Returns None when the backend cannot be read, so callers
+        skip conditional handling instead of matching a stale ETag.
+        It is also the scope's current version, for ``key()``.
+        """
+        key = self._version_key(scope)
+        raw = await self.backend.get(key)
+        if raw is None:
+            await self.backend.set(key, str(time.time_ns() // 1_000_000))
+            raw = await self.backend.get(key)
+        return None if raw is None else int(raw)
+
+    async def bump(self, *scopes: str) -> None:
+        """Invalidate every versioned key of the given scopes"""
+        for scope in scopes:
+            await self.backend.incr(self._version_key(scope))
+
+    def key(
+        self,
+        namespace: str,
+        *parts: Any,
+        scope: Optional[str] = None,
+        version: Optional[int] = None,
+    ) -> str:
+        """
+        Build a cache key, versioned when a scope is given
+
+        ``version`` is the scope's current version from ``version()`` or
+        ``change_counter()``; callers read it once and reuse it for the
+        ETag, so building the key costs no round trip. ``None`` (backend
+        unreadable) builds a version 0 key like an unreadable counter did.
+        """
+        suffix = ":".join("" if part is None else str(part) for part in parts)
+        if scope is None:
+            return f"{self.prefix}:{namespace}:{suffix}"
+        return f"{self.prefix}:{namespace}:{scope}:v{version or 0}:{suffix}"
+
+    async def get(self, namespace: str, key: str) -> Any:
+        """Read a cached value, returning the MISS sentinel when absent"""
+        raw = await self.backend.get(key)
+        if raw is None:
+            self._misses[namespace] += 1
+            return MISS
+        self._hits[namespace] += 1
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        await self.backend.set(key, json.dumps(value, default=str), ttl or self.default_ttl)
+
+    async def delete(self, *keys: str) -> None:
+        await self.backend.delete(*keys)
+
+    async def get_or_set_async(
+        self,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """
+        Return the cached value for key, awaiting loader on a miss
+
+        ``loader`` must return a JSON-serializable value; ``None`` is cached
+        as well so that negative lookups are served from the cache too.
+        """
+        value = await self.get(namespace, key)
+        if value is not MISS:
+            return value
+        value = await loader()
+        await self.set(key, value, ttl)
+        return value
+
+    def stats(self) -> dict:
+        """Hit/miss counters per namespace"""
+        namespaces = sorted(set(self._hits) | set(self._misses))
+        result = {}
+        for namespace in namespaces:
+            hits = self._hits[namespace]
+            misses = self._misses[namespace]
+            total = hits + misses
+            result[namespace] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / total, 4) if total else 0.0,
+            }
+        return {
+            "backend": type(self.backend).__name__,
+            "namespaces": result,
+        }
+
+    def reset_stats(self) -> None:
+        self._hits.clear()
+        self._misses.clear()
+
+
+def create_backend():
+    """Create the configured cache backend"""
+    if settings.CACHE_BACKEND == "redis":
+        if aioredis is not None:
+            return RedisCacheBackend(settings.REDIS_URL)
+        logger.warning("redis package not installed, using in-process cache")
+    return MemoryCacheBackend()
+
+
+# Create instance
+cache = ResponseCache(
+    create_backend(),
+    prefix=settings.CACHE_KEY_PREFIX,
+    default_ttl=settings.CACHE_DEFAULT_TTL,
+)
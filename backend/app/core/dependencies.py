@@ -2,56 +2,85 @@
 Authentication dependencies for FastAPI route protection
 """
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from backend.app.core.security import decode_token
-from backend.app.db.session import get_db
-from backend.app.models.user import User
-from backend.app.schemas.auth import TokenData
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.security import decode_token
+from app.db.session import get_db
+from app.models.user import User
+from app.schemas.auth import TokenData
+from app.core.user_cache import AuthenticatedUser, user_cache
+from app.core.revocation import revocation_list
 
 
 # OAuth2 scheme for token extraction
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
+def credentials_exception() -> HTTPException:
+    """401 for a missing, invalid, expired or revoked token"""
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def get_token_claims(token: str = Depends(oauth2_scheme)) -> dict:
+    """
+    Claims of the bearer token after signature, expiry and revocation checks
+    
+    Args:
+        token: JWT token from Authorization header
+        
+    Returns:
+        Decoded token payload (sub, exp, jti, ep)
+        
+    Raises:
+        HTTPException: If token is invalid or revoked
+    """
+    payload = decode_token(token)
+    if payload is None or payload.get("sub") is None:
+        raise credentials_exception()
+    
+    # In-memory Bloom filter; Redis is only asked on a filter hit
+    if await revocation_list.is_revoked(payload):
+        raise credentials_exception()
+    
+    return payload
+
+
 async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+    request: Request,
+    payload: dict = Depends(get_token_claims),
+    db: AsyncSession = Depends(get_db)
+) -> AuthenticatedUser:
     """
     Get current authenticated user from JWT token
     
     Args:
-        token: JWT token from Authorization header
+        request: Current request (the user id is recorded on its state)
+        payload: Verified claims of the JWT token from Authorization header
         db: Database session
         
     Returns:
-        User object
+        AuthenticatedUser (id, username, full_name, is_active, is_superuser)
         
     Raises:
         HTTPException: If token is invalid or user not found
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    # Decode token
-    payload = decode_token(token)
-    if payload is None:
-        raise credentials_exception
-    
     # Extract user_id from token
     user_id: Optional[int] = payload.get("sub")
-    if user_id is None:
-        raise credentials_exception
     
-    # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
+    # Get user from cache, falling back to the database
+    async def load_user() -> Optional[User]:
+        result = await db.execute(select(User).where(User.id == int(user_id)))
+        return result.scalars().first()
+    
+    user = await user_cache.load_async(int(user_id), load_user)
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
     
     # Check if user is active
     if not user.is_active:
@@ -60,12 +89,15 @@ async def get_current_user(
             detail="Inactive user"
         )
     
+    # Expose the principal to the access log
+    request.state.user_id = user.id
+    
     return user
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: AuthenticatedUser = Depends(get_current_user)
+) -> AuthenticatedUser:
     """
     Get current active user (same as get_current_user but explicit)
     
@@ -79,8 +111,8 @@ async def get_current_active_user(
 
 
 async def get_current_superuser(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: AuthenticatedUser = Depends(get_current_user)
+) -> AuthenticatedUser:
     """
     Get current user and verify superuser status
     
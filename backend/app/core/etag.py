@@ -0,0 +1,67 @@
+"""
+HTTP conditional requests (ETag / If-None-Match)
+
+Validators are weak ETags built from cheap change markers (a row version
+or a cache scope's change counter), so a poll can be answered with
+``304 Not Modified`` before the resource is queried or serialized.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+# Clients must revalidate on every use, but may keep the body
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts: object) -> str:
+    """Weak ETag from the parts that identify one version of a resource"""
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def variant(*params: object) -> str:
+    """
+    Short digest of the query parameters that select a representation
+
+    Lists and pages differ per page, page size and fieldset under the same
+    change counter, so those parameters belong in the ETag; they enter it
+    hashed because cursors and field lists may hold characters an
+    entity-tag cannot.
+    """
+    return hashlib.blake2b(repr(params).encode(), digest_size=8).hexdigest()
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """
+    True if the request's If-None-Match matches etag
+
+    Uses the weak comparison required for If-None-Match (RFC 9110
+    13.1.2); ``*`` matches any current representation.
+    """
+    header = request.headers.get("if-none-match")
+    if not header or etag is None:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = _opaque(etag)
+    return any(_opaque(tag) == wanted for tag in header.split(","))
+
+
+def set_etag(response: Response, etag: Optional[str]) -> None:
+    """Attach the validator to a 200 response"""
+    if etag is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response carrying the current validator"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
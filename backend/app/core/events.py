@@ -0,0 +1,328 @@
+"""
+Event broker for server-sent event streams
+
+Write paths publish small JSON events; every SSE connection is a
+``Subscription`` with a bounded queue, filled by the broker's local
+fan-out. With Redis, events are numbered with INCR, kept in a capped
+replay list and fanned out with PUBLISH; each worker holds one pub/sub
+connection whose listener feeds its local subscribers, so an idle SSE
+client costs a queue and a suspended generator, not a Redis or database
+connection. The in-process broker serves single-worker setups and tests.
+
+Clients resume with ``Last-Event-ID``: events after that id are replayed
+from the buffer, or a ``resync`` event is sent when the gap is no longer
+covered and the client has to reload its view.
+"""
+import asyncio
+import itertools
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is in requirements.txt
+    aioredis = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RESYNC = "resync"
+
+
+@dataclass(frozen=True)
+class Event:
+    """One published event; ``data`` is JSON-serializable"""
+    id: int
+    type: str
+    data: Dict[str, Any]
+
+    def matches(self, filters: Dict[str, Any]) -> bool:
+        return all(self.data.get(name) == value for name, value in filters.items())
+
+    def to_json(self) -> str:
+        return json.dumps({"id": self.id, "type": self.type, "data": self.data})
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Event":
+        payload = json.loads(raw)
+        return cls(id=payload["id"], type=payload["type"], data=payload["data"])
+
+    def encode(self) -> bytes:
+        """SSE wire format; id 0 leaves the client's Last-Event-ID as is"""
+        id_line = f"id: {self.id}\n" if self.id else ""
+        return (
+            f"{id_line}event: {self.type}\n"
+            f"data: {json.dumps(self.data, ensure_ascii=False)}\n\n"
+        ).encode("utf-8")
+
+
+class Subscription:
+    """
+    Queue of events for one client, limited to events matching ``filters``
+
+    A subscriber that falls ``queue_size`` events behind is closed rather
+    than allowed to grow without bound; it reconnects and replays.
+    """
+
+    def __init__(self, filters: Dict[str, Any], queue_size: int):
+        self.filters = filters
+        self.closed = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def offer(self, event: Event) -> None:
+        if self.closed or not event.matches(self.filters):
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.close()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        # Wake the reader; get() returns None from now on
+        while True:
+            try:
+                self._queue.put_nowait(None)
+                return
+            except asyncio.QueueFull:
+                self._queue.get_nowait()
+
+    async def get(self, timeout: float) -> Optional[Event]:
+        """Next event; raises asyncio.TimeoutError after timeout seconds"""
+        if self.closed and self._queue.empty():
+            return None
+        return await asyncio.wait_for(self._queue.get(), timeout)
+
+
+class InProcessBroker:
+    """Broker for a single worker: ids, replay buffer and fan-out in memory"""
+
+    def __init__(self, *, replay_size: int = 1000, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._replay: Deque[Event] = deque(maxlen=replay_size)
+        self._subscribers: Set[Subscription] = set()
+        self._ids = itertools.count(1)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        for subscription in list(self._subscribers):
+            subscription.close()
+
+    async def publish(self, event_type: str, data: Dict[str, Any]) -> Optional[Event]:
+        event = Event(id=next(self._ids), type=event_type, data=data)
+        self._dispatch(event)
+        return event
+
+    def _dispatch(self, event: Event) -> None:
+        self._replay.append(event)
+        for subscription in list(self._subscribers):
+            subscription.offer(event)
+
+    def subscribe(self, filters: Dict[str, Any]) -> Subscription:
+        subscription = Subscription(filters, self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+        subscription.close()
+
+    async def _buffered(self) -> List[Event]:
+        return list(self._replay)
+
+    async def replay(self, last_event_id: int) -> Optional[List[Event]]:
+        """
+        Events after last_event_id, oldest first
+
+        Returns None when the buffer no longer reaches back to
+        last_event_id (or the id is from a previous broker lifetime).
+        """
+        events = await self._buffered()
+        if not events:
+            return [] if last_event_id == 0 else None
+        if last_event_id > events[-1].id or last_event_id < events[0].id - 1:
+            return None
+        return [event for event in events if event.id > last_event_id]
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "subscribers": len(self._subscribers),
+            "buffered": len(self._replay),
+        }
+
+
+# KEYS: id counter, replay list, channel; ARGV: event JSON without its id, replay size
+# The id is allocated and the event stored and published in one step, so
+# events reach subscribers in id order whichever worker publishes them.
+_PUBLISH_SCRIPT = """
+local id = redis.call('INCR', KEYS[1])
+local raw = '{"id": ' .. id .. ', ' .. string.sub(ARGV[1], 2)
+redis.call('LPUSH', KEYS[2], raw)
+redis.call('LTRIM', KEYS[2], 0, tonumber(ARGV[2]) - 1)
+redis.call('PUBLISH', KEYS[3], raw)
+return id
+"""
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Broker shared by all workers through Redis
+
+    Publishing is a Lua script, so ids are handed out in publish order.
+    It never fails the caller: Redis errors are logged and the event is
+    dropped (clients resynchronise on reconnect).
+    """
+
+    def __init__(self, url: str, *, prefix: str, replay_size: int = 1000, queue_size: int = 256):
+        super().__init__(replay_size=replay_size, queue_size=queue_size)
+        self.url = url
+        self.replay_size = replay_size
+        self.channel = f"{prefix}:events"
+        self._id_key = f"{prefix}:events:id"
+        self._replay_key = f"{prefix}:events:replay"
+        self._client = None
+        self._publish_script = None
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def client(self):
+        """Client for publish and replay; bounded like the cache's Redis calls"""
+        if self._client is None:
+            self._client = aioredis.Redis.from_url(
+                self.url,
+                decode_responses=True,
+                socket_timeout=settings.CACHE_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.CACHE_SOCKET_TIMEOUT,
+            )
+        return self._client
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._publish_script = None
+
+    async def _listen(self) -> None:
+        """Feed local subscribers from the pub/sub channel, reconnecting on errors"""
+        # Separate client without a read timeout: the channel may be idle
+        listener = aioredis.Redis.from_url(
+            self.url,
+            decode_responses=True,
+            socket_connect_timeout=settings.CACHE_SOCKET_TIMEOUT,
+        )
+        try:
+            while True:
+                try:
+                    async with listener.pubsub() as pubsub:
+                        await pubsub.subscribe(self.channel)
+                        async for message in pubsub.listen():
+                            if message["type"] == "message":
+                                self._dispatch(Event.from_json(message["data"]))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("Event listener lost Redis connection: %s", e)
+                    await asyncio.sleep(1)
+        finally:
+            await listener.aclose()
+
+    async def publish(self, event_type: str, data: Dict[str, Any]) -> Optional[Event]:
+        try:
+            if self._publish_script is None:
+                self._publish_script = self.client.register_script(_PUBLISH_SCRIPT)
+            body = json.dumps({"type": event_type, "data": data})
+            event_id = await self._publish_script(
+                keys=[self._id_key, self._replay_key, self.channel],
+                args=[body, self.replay_size],
+            )
+            return Event(id=int(event_id), type=event_type, data=data)
+        except Exception as e:
+            logger.warning("Event publish failed for %s: %s", event_type, e)
+            return None
+
+    async def _buffered(self) -> List[Event]:
+        try:
+            raw_events = await self.client.lrange(self._replay_key, 0, -1)
+        except Exception as e:
+            logger.warning("Event replay read failed: %s", e)
+            return []
+        return sorted((Event.from_json(raw) for raw in raw_events), key=lambda event: event.id)
+
+
+async def sse_stream(
+    broker: InProcessBroker,
+    filters: Dict[str, Any],
+    last_event_id: Optional[int],
+    *,
+    heartbeat: float,
+) -> AsyncIterator[bytes]:
+    """
+    SSE body: replay after last_event_id, then live events
+
+    Sends a comment line every ``heartbeat`` seconds so proxies keep the
+    connection open, and ends when the subscription is closed.
+    """
+    subscription = broker.subscribe(filters)
+    try:
+        yield b"retry: 5000\n\n"
+        seen = 0
+        if last_event_id is not None:
+            replayed = await broker.replay(last_event_id)
+            if replayed is None:
+                yield Event(id=0, type=RESYNC, data={}).encode()
+            else:
+                for event in replayed:
+                    if event.matches(filters):
+                        yield event.encode()
+                seen = replayed[-1].id if replayed else last_event_id
+
+        while True:
+            try:
+                event = await subscription.get(heartbeat)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            if event is None:
+                return
+            if event.id > seen:
+                yield event.encode()
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def create_broker() -> InProcessBroker:
+    """Create the configured event broker"""
+    options = dict(
+        replay_size=settings.EVENTS_REPLAY_SIZE,
+        queue_size=settings.EVENTS_QUEUE_SIZE,
+    )
+    if settings.EVENTS_BACKEND == "redis":
+        if aioredis is not None:
+            return RedisBroker(settings.REDIS_URL, prefix=settings.CACHE_KEY_PREFIX, **options)
+        logger.warning("redis package not installed, using in-process event broker")
+    return InProcessBroker(**options)
+
+
+# Create instance
+broker = create_broker()
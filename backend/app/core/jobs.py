@@ -0,0 +1,700 @@
+"""
+Background jobs for long-running operations
+
+A request submits a job (a type plus JSON params) and answers
+``202 Accepted`` with the job id. Worker processes
+(``python -m scripts.run_worker``) claim queued jobs, run the registered
+handler, and store its progress and JSON result. Finished jobs expire
+after ``JOB_RESULT_TTL`` seconds.
+
+Concurrency is limited per job type across all workers (e.g. one import
+at a time), and each worker runs at most ``JOB_WORKER_SLOTS`` jobs. A
+running job holds a lease that its worker renews; if the worker dies, the
+job is failed once the lease runs out. Cancelling a queued job drops it.
+Cancelling a running job cancels the handler's task at the worker's next
+heartbeat.
+
+Stores: ``RedisJobStore`` is shared by the API and workers;
+``SQLiteJobStore`` uses a local file for single-host setups, or
+``:memory:`` in tests. Files that jobs read or write (uploads, exports)
+live in ``JOB_DATA_DIR``, which must be shared with the workers.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is in requirements.txt
+    aioredis = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL = (SUCCEEDED, FAILED, CANCELLED)
+
+WORKER_LOST = "Worker stopped responding"
+
+
+@dataclass
+class Job:
+    """State of one job; params and result are JSON-serializable"""
+    id: str
+    type: str
+    status: str = QUEUED
+    params: Dict[str, Any] = field(default_factory=dict)
+    owner: Optional[str] = None
+    progress: Optional[float] = None
+    message: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_requested: bool = False
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Job":
+        return cls(**json.loads(raw))
+
+
+def job_owner(user: Any) -> str:
+    """Owner recorded on the jobs a user submits"""
+    return str(user.id)
+
+
+def job_file(job_id: str, suffix: str, data_dir: Optional[str] = None) -> Path:
+    """Path of a file belonging to a job (upload or result) in the data dir"""
+    directory = Path(data_dir or settings.JOB_DATA_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"{job_id}{suffix}"
+
+
+class JobStore:
+    """Interface shared by the job stores"""
+
+    def __init__(self, *, result_ttl: int):
+        self.result_ttl = result_ttl
+
+    def _new_job(self, job_type: str, params: Dict[str, Any], owner: Optional[str]) -> Job:
+        return Job(
+            id=uuid.uuid4().hex, type=job_type, params=params, owner=owner,
+            created_at=time.time(),
+        )
+
+    async def submit(
+        self, job_type: str, params: Dict[str, Any], *, owner: Optional[str] = None
+    ) -> Job:
+        raise NotImplementedError
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+    async def claim(self, job_type: str, *, limit: int, lease: float) -> Optional[Job]:
+        """Start the oldest queued job of a type if fewer than limit are running"""
+        raise NotImplementedError
+
+    async def update(
+        self, job: Job, *, progress: Optional[float] = None, message: Optional[str] = None
+    ) -> None:
+        raise NotImplementedError
+
+    async def heartbeat(self, jobs: Iterable[Job], *, lease: float) -> Set[str]:
+        """Renew the leases of running jobs; returns ids whose cancel was requested"""
+        raise NotImplementedError
+
+    async def finish(
+        self,
+        job: Job,
+        status: str,
+        *,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        raise NotImplementedError
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued job now, or flag a running one for its worker"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Jobs in one SQLite table
+
+    Every change runs in a ``BEGIN IMMEDIATE`` transaction, so several
+    worker processes on one host can share a database file.
+    """
+
+    def __init__(self, path: str, *, result_ttl: int):
+        super().__init__(result_ttl=result_ttl)
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, type TEXT NOT NULL, status TEXT NOT NULL,"
+                " created_at REAL NOT NULL, lease_until REAL, expires_at REAL,"
+                " data TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_type_status"
+                " ON jobs (type, status, created_at)"
+            )
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _load(self, conn: sqlite3.Connection, job_id: str) -> Optional[Job]:
+        row = conn.execute(
+            "SELECT data FROM jobs WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (job_id, time.time()),
+        ).fetchone()
+        return Job.from_json(row[0]) if row else None
+
+    def _save(self, conn: sqlite3.Connection, job: Job, *, lease_until: Optional[float] = None) -> None:
+        expires_at = job.finished_at + self.result_ttl if job.done else None
+        conn.execute(
+            "INSERT OR REPLACE INTO jobs"
+            " (id, type, status, created_at, lease_until, expires_at, data)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job.id, job.type, job.status, job.created_at, lease_until, expires_at, job.to_json()),
+        )
+
+    def _submit(self, job: Job) -> Job:
+        with self._transaction() as conn:
+            self._save(conn, job)
+        return job
+
+    def _get(self, job_id: str) -> Optional[Job]:
+        with self._transaction() as conn:
+            return self._load(conn, job_id)
+
+    def _claim(self, job_type: str, limit: int, lease: float) -> Optional[Job]:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,))
+            lost = conn.execute(
+                "SELECT data FROM jobs WHERE type = ? AND status = ? AND lease_until < ?",
+                (job_type, RUNNING, now),
+            ).fetchall()
+            for (raw,) in lost:
+                job = Job.from_json(raw)
+                job.status, job.error, job.finished_at = FAILED, WORKER_LOST, now
+                self._save(conn, job)
+
+            running = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE type = ? AND status = ?", (job_type, RUNNING)
+            ).fetchone()[0]
+            if running >= limit:
+                return None
+            row = conn.execute(
+                "SELECT data FROM jobs WHERE type = ? AND status = ?"
+                " ORDER BY created_at LIMIT 1",
+                (job_type, QUEUED),
+            ).fetchone()
+            if row is None:
+                return None
+            job = Job.from_json(row[0])
+            job.status, job.started_at = RUNNING, now
+            self._save(conn, job, lease_until=now + lease)
+            return job
+
+    def _update(self, job_id: str, changes: Dict[str, Any]) -> Optional[Job]:
+        with self._transaction() as conn:
+            job = self._load(conn, job_id)
+            if job is None or job.status != RUNNING:
+                return job
+            lease_until = conn.execute(
+                "SELECT lease_until FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()[0]
+            for name, value in changes.items():
+                setattr(job, name, value)
+            self._save(conn, job, lease_until=lease_until)
+            return job
+
+    def _heartbeat(self, job_ids: List[str], lease: float) -> Set[str]:
+        cancelled = set()
+        with self._transaction() as conn:
+            for job_id in job_ids:
+                job = self._load(conn, job_id)
+                if job is None or job.status != RUNNING:
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET lease_until = ? WHERE id = ?", (time.time() + lease, job_id)
+                )
+                if job.cancel_requested:
+                    cancelled.add(job_id)
+        return cancelled
+
+    def _finish(self, job_id: str, status: str, result, error) -> None:
+        with self._transaction() as conn:
+            job = self._load(conn, job_id)
+            if job is None or job.status != RUNNING:
+                return
+            job.status, job.result, job.error = status, result, error
+            job.finished_at = time.time()
+            if status == SUCCEEDED:
+                job.progress = 1.0
+            self._save(conn, job)
+
+    def _cancel(self, job_id: str) -> Optional[Job]:
+        with self._transaction() as conn:
+            job = self._load(conn, job_id)
+            if job is None or job.done:
+                return job
+            if job.status == QUEUED:
+                job.status, job.finished_at = CANCELLED, time.time()
+                self._save(conn, job)
+            else:
+                job.cancel_requested = True
+                conn.execute(
+                    "UPDATE jobs SET data = ? WHERE id = ?", (job.to_json(), job_id)
+                )
+            return job
+
+    async def submit(self, job_type, params, *, owner=None) -> Job:
+        return await run_in_threadpool(self._submit, self._new_job(job_type, params, owner))
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await run_in_threadpool(self._get, job_id)
+
+    async def claim(self, job_type: str, *, limit: int, lease: float) -> Optional[Job]:
+        return await run_in_threadpool(self._claim, job_type, limit, lease)
+
+    async def update(self, job, *, progress=None, message=None) -> None:
+        await run_in_threadpool(self._update, job.id, {"progress": progress, "message": message})
+
+    async def heartbeat(self, jobs, *, lease: float) -> Set[str]:
+        return await run_in_threadpool(self._heartbeat, [job.id for job in jobs], lease)
+
+    async def finish(self, job, status, *, result=None, error=None) -> None:
+        await run_in_threadpool(self._finish, job.id, status, result, error)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        return await run_in_threadpool(self._cancel, job_id)
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# KEYS: queue list, running zset
+# ARGV: now, lease deadline, limit, job key prefix, result ttl, lost-job error (JSON)
+_CLAIM_SCRIPT = """
+local lost = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(lost) do
+    redis.call('ZREM', KEYS[2], id)
+    local key = ARGV[4] .. id
+    if redis.call('HGET', key, 'status') == 'running' then
+        redis.call('HSET', key, 'status', 'failed', 'error', ARGV[6], 'finished_at', ARGV[1])
+        redis.call('EXPIRE', key, ARGV[5])
+    end
+end
+if redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[3]) then
+    return false
+end
+while true do
+    local id = redis.call('RPOP', KEYS[1])
+    if not id then
+        return false
+    end
+    local key = ARGV[4] .. id
+    if redis.call('HGET', key, 'status') == 'queued' then
+        redis.call('ZADD', KEYS[2], ARGV[2], id)
+        redis.call('HSET', key, 'status', 'running', 'started_at', ARGV[1])
+        return id
+    end
+end
+"""
+
+# KEYS: job hash; ARGV: now, result ttl
+_CANCEL_SCRIPT = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if status == 'queued' then
+    redis.call('HSET', KEYS[1], 'status', 'cancelled', 'finished_at', ARGV[1])
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+elseif status == 'running' then
+    redis.call('HSET', KEYS[1], 'cancel_requested', '1')
+end
+return status
+"""
+
+# KEYS: job hash, running zset; ARGV: id, status, result, error, now, result ttl
+_FINISH_SCRIPT = """
+redis.call('ZREM', KEYS[2], ARGV[1])
+if redis.call('HGET', KEYS[1], 'status') ~= 'running' then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'status', ARGV[2], 'result', ARGV[3], 'error', ARGV[4],
+           'finished_at', ARGV[5])
+if ARGV[2] == 'succeeded' then
+    redis.call('HSET', KEYS[1], 'progress', '1.0')
+end
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+return 1
+"""
+
+_SCRIPTS = {"claim": _CLAIM_SCRIPT, "cancel": _CANCEL_SCRIPT, "finish": _FINISH_SCRIPT}
+
+# Hash fields stored as JSON; the rest are plain strings
+_JSON_FIELDS = ("params", "owner", "progress", "message", "result", "error", "started_at", "finished_at")
+
+
+class RedisJobStore(JobStore):
+    """
+    Jobs in Redis: one hash per job, a queue list and a running set per type
+
+    Claiming, cancelling and finishing are Lua scripts, so the
+    concurrency limit holds across any number of workers.
+    """
+
+    def __init__(self, url: str, *, prefix: str, result_ttl: int):
+        super().__init__(result_ttl=result_ttl)
+        self.url = url
+        self._job_prefix = f"{prefix}:job:"
+        self._queue_prefix = f"{prefix}:jobs:queue:"
+        self._running_prefix = f"{prefix}:jobs:running:"
+        self._client = None
+        self._scripts = {}
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = aioredis.Redis.from_url(
+                self.url,
+                decode_responses=True,
+                socket_timeout=settings.CACHE_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.CACHE_SOCKET_TIMEOUT,
+            )
+        return self._client
+
+    def _script(self, name: str):
+        """Registered Lua script (EVALSHA, reloaded if Redis lost it)"""
+        if name not in self._scripts:
+            self._scripts[name] = self.client.register_script(_SCRIPTS[name])
+        return self._scripts[name]
+
+    def _key(self, job_id: str) -> str:
+        return self._job_prefix + job_id
+
+    def _running(self, job_type: str) -> str:
+        return self._running_prefix + job_type
+
+    @staticmethod
+    def _to_hash(job: Job) -> Dict[str, str]:
+        values = asdict(job)
+        fields = {name: json.dumps(values[name], ensure_ascii=False) for name in _JSON_FIELDS}
+        fields.update(
+            id=job.id, type=job.type, status=job.status,
+            created_at=repr(job.created_at), cancel_requested="1" if job.cancel_requested else "",
+        )
+        return fields
+
+    @staticmethod
+    def _from_hash(fields: Dict[str, str]) -> Job:
+        values = {
+            name: json.loads(fields[name]) if fields.get(name) else None
+            for name in _JSON_FIELDS
+        }
+        return Job(
+            id=fields["id"],
+            type=fields["type"],
+            status=fields["status"],
+            created_at=float(fields["created_at"]),
+            cancel_requested=bool(fields.get("cancel_requested")),
+            **{**values, "params": values["params"] or {}},
+        )
+
+    async def submit(self, job_type, params, *, owner=None) -> Job:
+        job = self._new_job(job_type, params, owner)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key(job.id), mapping=self._to_hash(job))
+            pipe.lpush(self._queue_prefix + job_type, job.id)
+            await pipe.execute()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        fields = await self.client.hgetall(self._key(job_id))
+        return self._from_hash(fields) if fields else None
+
+    async def claim(self, job_type: str, *, limit: int, lease: float) -> Optional[Job]:
+        now = time.time()
+        job_id = await self._script("claim")(
+            keys=[self._queue_prefix + job_type, self._running(job_type)],
+            args=[repr(now), repr(now + lease), limit, self._job_prefix,
+                  self.result_ttl, json.dumps(WORKER_LOST)],
+        )
+        return await self.get(job_id) if job_id else None
+
+    async def update(self, job, *, progress=None, message=None) -> None:
+        await self.client.hset(
+            self._key(job.id),
+            mapping={"progress": json.dumps(progress), "message": json.dumps(message)},
+        )
+
+    async def heartbeat(self, jobs, *, lease: float) -> Set[str]:
+        jobs = list(jobs)
+        if not jobs:
+            return set()
+        deadline = time.time() + lease
+        async with self.client.pipeline(transaction=False) as pipe:
+            for job in jobs:
+                pipe.zadd(self._running(job.type), {job.id: deadline}, xx=True)
+                pipe.hget(self._key(job.id), "cancel_requested")
+            replies = await pipe.execute()
+        return {job.id for job, flag in zip(jobs, replies[1::2]) if flag}
+
+    async def finish(self, job, status, *, result=None, error=None) -> None:
+        await self._script("finish")(
+            keys=[self._key(job.id), self._running(job.type)],
+            args=[job.id, status, json.dumps(result, ensure_ascii=False),
+                  json.dumps(error), repr(time.time()), self.result_ttl],
+        )
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        await self._script("cancel")(
+            keys=[self._key(job_id)], args=[repr(time.time()), self.result_ttl]
+        )
+        return await self.get(job_id)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._scripts = {}
+
+
+class JobContext:
+    """Handle given to a job handler for progress reports and job files"""
+
+    def __init__(self, store: JobStore, job: Job, data_dir: str):
+        self.store = store
+        self.job = job
+        self.data_dir = data_dir
+
+    def path(self, suffix: str) -> Path:
+        return job_file(self.job.id, suffix, self.data_dir)
+
+    async def progress(self, fraction: Optional[float] = None, message: Optional[str] = None) -> None:
+        """Report progress; store errors are logged, never raised into the job"""
+        if fraction is not None:
+            fraction = round(min(max(fraction, 0.0), 1.0), 4)
+        try:
+            await self.store.update(self.job, progress=fraction, message=message)
+        except Exception as e:
+            logger.warning("Job %s progress update failed: %s", self.job.id, e)
+
+
+# handler(params, context) -> JSON-serializable result
+JobHandler = Callable[[Dict[str, Any], JobContext], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class Worker:
+    """
+    Claims and runs jobs of the handled types in one process
+
+    ``limits`` caps running jobs per type across all workers;
+    ``slots`` caps this worker's concurrent jobs. On stop, no new jobs are
+    claimed and running ones are allowed to finish.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handlers: Dict[str, JobHandler],
+        *,
+        limits: Optional[Dict[str, int]] = None,
+        default_limit: int = 1,
+        slots: int = 4,
+        lease: float = 60.0,
+        poll_interval: float = 1.0,
+        data_dir: Optional[str] = None,
+    ):
+        self.store = store
+        self.handlers = handlers
+        self.limits = limits or {}
+        self.default_limit = default_limit
+        self.slots = slots
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.data_dir = data_dir or settings.JOB_DATA_DIR
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._turn = 0
+
+    async def run(self, stop: asyncio.Event) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            while not stop.is_set():
+                try:
+                    claimed = await self._fill_slots()
+                except Exception as e:
+                    logger.warning("Job claim failed: %s", e)
+                    claimed = False
+                if not claimed:
+                    await self._wait(stop)
+            if self._tasks:
+                await asyncio.wait(list(self._tasks.values()))
+        finally:
+            heartbeat.cancel()
+
+    async def _wait(self, stop: asyncio.Event) -> None:
+        """Sleep until the poll interval passes, a job ends or stop is set"""
+        waiters = [asyncio.ensure_future(stop.wait()), *self._tasks.values()]
+        try:
+            await asyncio.wait(
+                waiters, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            waiters[0].cancel()
+
+    async def _fill_slots(self) -> bool:
+        """Claim jobs round-robin over the handled types; True if any started"""
+        types = list(self.handlers)
+        claimed = False
+        for offset in range(len(types)):
+            if len(self._tasks) >= self.slots:
+                break
+            job_type = types[(self._turn + offset) % len(types)]
+            job = await self.store.claim(
+                job_type,
+                limit=self.limits.get(job_type, self.default_limit),
+                lease=self.lease,
+            )
+            if job is not None:
+                self._start(job)
+                claimed = True
+        self._turn += 1
+        return claimed
+
+    def _start(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        task = asyncio.create_task(self._execute(job))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._forget(job.id))
+
+    def _forget(self, job_id: str) -> None:
+        self._tasks.pop(job_id, None)
+        self._jobs.pop(job_id, None)
+
+    async def _execute(self, job: Job) -> None:
+        context = JobContext(self.store, job, self.data_dir)
+        started = time.perf_counter()
+        try:
+            result = await self.handlers[job.type](job.params, context)
+        except asyncio.CancelledError:
+            logger.info("Job %s (%s) cancelled", job.id, job.type)
+            await self.store.finish(job, CANCELLED)
+            return
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job.id, job.type)
+            await self.store.finish(job, FAILED, error=str(e) or type(e).__name__)
+            return
+        logger.info(
+            "Job %s (%s) done in %.1fs", job.id, job.type, time.perf_counter() - started
+        )
+        await self.store.finish(job, SUCCEEDED, result=result)
+
+    async def _heartbeat(self) -> None:
+        """Renew leases, cancel flagged jobs and purge expired job files"""
+        last_purge = 0.0
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                cancelled = await self.store.heartbeat(list(self._jobs.values()), lease=self.lease)
+            except Exception as e:
+                logger.warning("Job heartbeat failed: %s", e)
+                continue
+            for job_id in cancelled:
+                task = self._tasks.get(job_id)
+                if task is not None:
+                    task.cancel()
+            if time.monotonic() - last_purge > 600:
+                last_purge = time.monotonic()
+                await run_in_threadpool(
+                    purge_job_files, self.data_dir, self.store.result_ttl + self.lease
+                )
+
+
+def purge_job_files(data_dir: str, max_age: float) -> int:
+    """Delete job files older than max_age seconds; returns how many"""
+    removed = 0
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(data_dir))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def create_job_store() -> JobStore:
+    """Create the configured job store"""
+    if settings.JOBS_BACKEND == "redis":
+        if aioredis is not None:
+            return RedisJobStore(
+                settings.REDIS_URL,
+                prefix=settings.CACHE_KEY_PREFIX,
+                result_ttl=settings.JOB_RESULT_TTL,
+            )
+        logger.warning("redis package not installed, using SQLite job store")
+    return SQLiteJobStore(settings.JOBS_SQLITE_PATH, result_ttl=settings.JOB_RESULT_TTL)
+
+
+# Create instance
+job_store = create_job_store()
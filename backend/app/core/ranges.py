@@ -0,0 +1,175 @@
+"""
+HTTP Range requests for file downloads
+
+``parse_range`` turns a ``Range`` header into one byte range (RFC 9110
+14.2); ``RangeFileResponse`` serves that range of a local file. It uses
+the ASGI ``http.response.zerocopy`` extension (``os.sendfile``) when the
+server offers it, ``http.response.pathsend`` for a whole file, and
+otherwise reads the file in chunks from a worker thread.
+"""
+import os
+from typing import Dict, Mapping, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# (first byte, last byte), both inclusive as in Content-Range
+ByteRange = Tuple[int, int]
+
+ZEROCOPY = "http.response.zerocopy"
+PATHSEND = "http.response.pathsend"
+
+
+class RangeNotSatisfiable(ValueError):
+    """The Range header lies entirely outside the representation"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[ByteRange]:
+    """
+    Byte range requested by a ``Range`` header, clamped to size
+
+    Returns None when the whole representation should be sent: no header,
+    an unknown unit, a malformed value or several ranges (a server may
+    ignore Range). Raises RangeNotSatisfiable when no requested byte
+    exists.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    first, last = first.strip(), last.strip()
+    if not dash or not (first or last):
+        return None
+    if any(part and not part.isdigit() for part in (first, last)):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    end = int(last) if last else size - 1
+    return start, min(end, size - 1)
+
+
+def if_range_matches(request: Request, etag: str) -> bool:
+    """
+    True if a Range may be honoured under the request's If-Range
+
+    If-Range needs a strong match (RFC 9110 13.1.5); dates never match
+    since the responses carry no Last-Modified.
+    """
+    header = request.headers.get("if-range")
+    return header is None or header.strip() == etag
+
+
+def range_headers(byte_range: Optional[ByteRange], size: int) -> Tuple[int, Dict[str, str]]:
+    """Status code and length headers for a full (200) or partial (206) body"""
+    headers = {"Accept-Ranges": "bytes"}
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return 200, headers
+    start, end = byte_range
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return 206, headers
+
+
+def range_not_satisfiable(size: int) -> Response:
+    """Empty 416 response telling the client the current size"""
+    return Response(
+        status_code=416,
+        headers={"Content-Range": f"bytes */{size}", "Accept-Ranges": "bytes"},
+    )
+
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    """Content-Disposition value, RFC 5987 encoded for non-ASCII names"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+class RangeFileResponse(Response):
+    """
+    Whole file (200) or one byte range of it (206)
+
+    ``size`` is the file size the range was parsed against; it is trusted
+    rather than stat'ed again, since the files served are immutable.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: "os.PathLike[str] | str",
+        *,
+        size: int,
+        byte_range: Optional[ByteRange] = None,
+        media_type: Optional[str] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        self.path = os.fspath(path)
+        self.size = size
+        self.byte_range = byte_range
+        self.media_type = media_type
+        self.background = None
+        self.status_code, length_headers = range_headers(byte_range, size)
+        self.init_headers({**(headers or {}), **length_headers})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        start, end = self.byte_range or (0, self.size - 1)
+        count = end - start + 1
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        extensions = scope.get("extensions") or {}
+        if scope["method"].upper() == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif ZEROCOPY in extensions:
+            file = await anyio.to_thread.run_sync(open, self.path, "rb")
+            try:
+                await send(
+                    {
+                        "type": ZEROCOPY,
+                        "file": file,
+                        "offset": start,
+                        "count": count,
+                        "more_body": False,
+                    }
+                )
+            finally:
+                file.close()
+        elif self.byte_range is None and PATHSEND in extensions:
+            await send({"type": PATHSEND, "path": self.path})
+        else:
+            await self._send_chunks(send, start, count)
+
+    async def _send_chunks(self, send: Send, start: int, count: int) -> None:
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(start)
+            remaining = count
+            while remaining:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                # A short read means the file shrank; end the body there
+                remaining = remaining - len(chunk) if chunk else 0
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": remaining > 0}
+                )
@@ -0,0 +1,56 @@
+"""
+Fast JSON responses
+
+``ORJSONResponse`` (FastAPI's, rendering with orjson) is the application's
+default response class when ``FAST_JSON_RESPONSES`` is on. By the time a
+response class renders, FastAPI has already turned the return value into
+JSON-compatible data (response_model serialization or
+``jsonable_encoder``), so dates, datetimes and enums come out exactly as
+with ``JSONResponse``; only the final ``json.dumps`` is replaced.
+
+``PydanticJSONResponse`` goes one step further for large model lists: the
+body is produced by pydantic-core (``model_dump_json`` /
+``TypeAdapter.dump_json``) in one pass, skipping FastAPI's
+validate -> ``dump_python`` -> encode chain.
+"""
+from typing import Any, Mapping, Optional, Type
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+
+from app.core.config import settings
+
+
+class PydanticJSONResponse(Response):
+    """
+    Response whose body is serialized by pydantic-core
+
+    ``content`` is a Pydantic model, or any value together with the
+    ``TypeAdapter`` that describes it (e.g. ``TypeAdapter(List[RFI])``).
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Any,
+        *,
+        adapter: Optional[TypeAdapter] = None,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+    ) -> None:
+        if adapter is not None:
+            body = adapter.dump_json(content)
+        elif isinstance(content, BaseModel):
+            body = content.__pydantic_serializer__.to_json(content)
+        else:
+            raise TypeError("PydanticJSONResponse needs a model or a TypeAdapter")
+        super().__init__(body, status_code, headers, self.media_type, background)
+
+
+def default_response_class() -> Type[JSONResponse]:
+    """Response class for FastAPI(default_response_class=...)"""
+    return ORJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse
@@ -0,0 +1,395 @@
+"""
+Token revocation: logout and "sign out everywhere"
+
+Every token carries a random ``jti`` and the user's token epoch (``ep``)
+at issue time:
+
+- logout revokes single tokens by jti; the revoked jtis live until the
+  token's own ``exp`` (a Redis sorted set scored by expiry)
+- revoking all sessions of a user increments the user's epoch, which
+  rejects every token issued with an older one
+
+The per-request check must not cost a network round trip. Each worker
+keeps a Bloom filter of the revoked jtis and a dict of the (few) raised
+epochs in memory, loaded from Redis at startup and kept in sync over
+pub/sub like the event broker. A token whose jti is not in the filter is
+valid without further work; only a filter hit (a revoked token, or a
+false positive at ``error_rate``) is confirmed with an exact lookup.
+
+A revocation reaches the other workers within the pub/sub latency; the
+worker that performs it applies it immediately. Until a worker's first
+load from Redis succeeds it has no local state to trust, so it checks
+every token exactly against Redis and rejects tokens it cannot check
+(fail closed). After that, a lost connection serves from the last loaded
+state until the listener reconnects and reloads. The in-process list
+serves single-worker setups and tests.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is in requirements.txt
+    aioredis = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationUnavailable(Exception):
+    """Raised when a revocation cannot be recorded (Redis unreachable)"""
+
+
+class BloomFilter:
+    """
+    Bit array with ``hashes`` probes per item (double hashing of one blake2b digest)
+
+    Sized for ``capacity`` items at ``error_rate`` false positives; items
+    cannot be removed, the owner rebuilds the filter instead.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    @staticmethod
+    def _digest(item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def add(self, item: str) -> None:
+        first, step = self._digest(item)
+        bits, size = self._bits, self.size
+        for probe in range(self.hashes):
+            position = (first + probe * step) % size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        first, step = self._digest(item)
+        bits, size = self._bits, self.size
+        for probe in range(self.hashes):
+            position = (first + probe * step) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+def _user_id(claims: Dict[str, Any]) -> Optional[int]:
+    try:
+        return int(claims["sub"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenRevocationList:
+    """Revocation list for a single worker: jtis and epochs in memory"""
+
+    def __init__(self, *, capacity: int = 100000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter = BloomFilter(capacity, error_rate)
+        self._epochs: Dict[int, int] = {}
+        self._revoked: Dict[str, float] = {}  # jti -> token expiry
+        self.checks = 0
+        self.filter_hits = 0
+        self.false_positives = 0
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def _remember(self, jti: str) -> None:
+        """Add a revoked jti to the local filter, rebuilding it when full"""
+        self._filter.add(jti)
+        if self._filter.count > self._filter.capacity:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        """New filter without the revocations of expired tokens"""
+        now = time.time()
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        bloom = BloomFilter(max(self.capacity, len(self._revoked) * 2), self.error_rate)
+        for jti in self._revoked:
+            bloom.add(jti)
+        self._filter = bloom
+
+    async def _is_listed(self, jti: str) -> bool:
+        """Exact check after a filter hit"""
+        return self._revoked.get(jti, 0) > time.time()
+
+    async def is_revoked(self, claims: Dict[str, Any]) -> bool:
+        """
+        Whether the (signature-checked) token claims were revoked
+
+        Tokens issued before jti/epoch claims existed have epoch 0 and can
+        only be revoked through the user's epoch.
+        """
+        self.checks += 1
+        if claims.get("ep", 0) < self._epochs.get(_user_id(claims), 0):
+            return True
+        jti = claims.get("jti")
+        if jti is None or jti not in self._filter:
+            return False
+        self.filter_hits += 1
+        if await self._is_listed(jti):
+            return True
+        self.false_positives += 1
+        return False
+
+    async def revoke(self, claims: Dict[str, Any]) -> bool:
+        """Revoke one token until its expiry; False for tokens without a jti"""
+        jti = claims.get("jti")
+        if jti is None:
+            return False
+        self._revoked[jti] = float(claims.get("exp", time.time()))
+        self._remember(jti)
+        return True
+
+    async def revoke_all(self, user_id: int) -> int:
+        """Revoke every token issued to the user so far; returns the new epoch"""
+        epoch = self._epochs.get(user_id, 0) + 1
+        self._epochs[user_id] = epoch
+        return epoch
+
+    async def epoch(self, user_id: int) -> int:
+        """Current token epoch of the user, for the ``ep`` claim of new tokens"""
+        return self._epochs.get(user_id, 0)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "filter_items": self._filter.count,
+            "filter_bits": self._filter.size,
+            "raised_epochs": len(self._epochs),
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "false_positives": self.false_positives,
+        }
+
+
+class RedisTokenRevocationList(TokenRevocationList):
+    """
+    Revocation list shared by all workers through Redis
+
+    ``<prefix>:auth:revoked`` is a sorted set of jti scored by token
+    expiry (pruned on every write), ``<prefix>:auth:epochs`` a hash of
+    user id to epoch. Changes are published on ``<prefix>:auth:revocations``.
+    An exact check that cannot reach Redis fails closed, and so does every
+    check made before the first successful load.
+    """
+
+    def __init__(self, url: str, *, prefix: str, capacity: int = 100000, error_rate: float = 0.001):
+        super().__init__(capacity=capacity, error_rate=error_rate)
+        self.url = url
+        self.channel = f"{prefix}:auth:revocations"
+        self._revoked_key = f"{prefix}:auth:revoked"
+        self._epochs_key = f"{prefix}:auth:epochs"
+        self._client = None
+        self._listener: Optional[asyncio.Task] = None
+        self._rebuilding: Optional[asyncio.Task] = None
+        # jtis that arrive while a load is reading the set, one list per load
+        self._arrivals: List[List[str]] = []
+        self.loaded = False
+
+    @property
+    def client(self):
+        """Client for writes and exact checks; bounded like the cache's Redis calls"""
+        if self._client is None:
+            self._client = aioredis.Redis.from_url(
+                self.url,
+                decode_responses=True,
+                socket_timeout=settings.CACHE_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.CACHE_SOCKET_TIMEOUT,
+            )
+        return self._client
+
+    async def start(self) -> None:
+        if self._listener is None:
+            try:
+                await self._load()
+            except Exception as e:
+                logger.warning(
+                    "Token revocation list not loaded, checking tokens in Redis until it is: %s", e
+                )
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        for task in (self._listener, self._rebuilding):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listener = self._rebuilding = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _load(self) -> None:
+        """Replace the local filter and epochs with the state in Redis"""
+        arrived: List[str] = []
+        self._arrivals.append(arrived)
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.zremrangebyscore(self._revoked_key, "-inf", time.time())
+                pipe.zrange(self._revoked_key, 0, -1)
+                pipe.hgetall(self._epochs_key)
+                _, jtis, epochs = await pipe.execute()
+        finally:
+            self._arrivals.remove(arrived)
+        bloom = BloomFilter(max(self.capacity, len(jtis) * 2), self.error_rate)
+        for jti in jtis + arrived:
+            bloom.add(jti)
+        self._filter = bloom
+        # epochs only grow: keep changes applied while the hash was read
+        for user_id, epoch in epochs.items():
+            user_id = int(user_id)
+            self._epochs[user_id] = max(self._epochs.get(user_id, 0), int(epoch))
+        self.loaded = True
+
+    def _remember(self, jti: str) -> None:
+        self._filter.add(jti)
+        for arrived in self._arrivals:
+            arrived.append(jti)
+        if self._filter.count > self._filter.capacity and self._rebuilding is None:
+            self._rebuilding = asyncio.ensure_future(self._load())
+            self._rebuilding.add_done_callback(self._rebuilt)
+
+    def _rebuilt(self, task: asyncio.Task) -> None:
+        self._rebuilding = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Token revocation filter rebuild failed: %s", task.exception())
+
+    def _apply(self, raw: str) -> None:
+        """Apply a change published by any worker (including this one)"""
+        change = json.loads(raw)
+        if "jti" in change:
+            self._remember(change["jti"])
+        else:
+            user_id = int(change["user"])
+            self._epochs[user_id] = max(self._epochs.get(user_id, 0), int(change["epoch"]))
+
+    async def _listen(self) -> None:
+        """Apply published changes, reloading the full state on every (re)connect"""
+        # Separate client without a read timeout: the channel may be idle
+        listener = aioredis.Redis.from_url(
+            self.url,
+            decode_responses=True,
+            socket_connect_timeout=settings.CACHE_SOCKET_TIMEOUT,
+        )
+        try:
+            while True:
+                try:
+                    async with listener.pubsub() as pubsub:
+                        await pubsub.subscribe(self.channel)
+                        # subscribed first: changes made during the load are queued
+                        await self._load()
+                        async for message in pubsub.listen():
+                            if message["type"] == "message":
+                                self._apply(message["data"])
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("Token revocation listener lost Redis connection: %s", e)
+                    await asyncio.sleep(1)
+        finally:
+            await listener.aclose()
+
+    async def is_revoked(self, claims: Dict[str, Any]) -> bool:
+        if self.loaded:
+            return await super().is_revoked(claims)
+        return await self._is_revoked_in_redis(claims)
+
+    async def _is_revoked_in_redis(self, claims: Dict[str, Any]) -> bool:
+        """Exact check of epoch and jti, for a worker without loaded state"""
+        self.checks += 1
+        jti = claims.get("jti")
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.hget(self._epochs_key, str(_user_id(claims)))
+                pipe.zscore(self._revoked_key, jti or "")
+                epoch, expires_at = await pipe.execute()
+        except Exception as e:
+            logger.warning(
+                "Token revocation list not loaded and Redis unreachable, rejecting token: %s", e
+            )
+            return True
+        if claims.get("ep", 0) < int(epoch or 0):
+            return True
+        return jti is not None and expires_at is not None and expires_at > time.time()
+
+    async def _is_listed(self, jti: str) -> bool:
+        try:
+            expires_at = await self.client.zscore(self._revoked_key, jti)
+        except Exception as e:
+            logger.warning("Token revocation check failed, rejecting token: %s", e)
+            return True
+        return expires_at is not None and expires_at > time.time()
+
+    async def revoke(self, claims: Dict[str, Any]) -> bool:
+        jti = claims.get("jti")
+        if jti is None:
+            return False
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.zadd(self._revoked_key, {jti: float(claims.get("exp", time.time()))})
+                pipe.zremrangebyscore(self._revoked_key, "-inf", time.time())
+                pipe.publish(self.channel, json.dumps({"jti": jti}))
+                await pipe.execute()
+        except Exception as e:
+            raise RevocationUnavailable(f"Token revocation failed: {e}") from e
+        self._remember(jti)
+        return True
+
+    async def revoke_all(self, user_id: int) -> int:
+        try:
+            epoch = await self.client.hincrby(self._epochs_key, str(user_id), 1)
+            await self.client.publish(self.channel, json.dumps({"user": user_id, "epoch": epoch}))
+        except Exception as e:
+            raise RevocationUnavailable(f"Session revocation failed: {e}") from e
+        self._epochs[user_id] = max(self._epochs.get(user_id, 0), epoch)
+        return epoch
+
+    async def epoch(self, user_id: int) -> int:
+        """Read from Redis: a worker that missed an update must not issue stale tokens"""
+        try:
+            epoch = await self.client.hget(self._epochs_key, str(user_id))
+        except Exception as e:
+            logger.warning("Token epoch read failed, using local value: %s", e)
+            return self._epochs.get(user_id, 0)
+        return int(epoch or 0)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "loaded": self.loaded}
+
+
+def create_revocation_list() -> TokenRevocationList:
+    """Create the configured token revocation list"""
+    options = dict(
+        capacity=settings.TOKEN_REVOCATION_CAPACITY,
+        error_rate=settings.TOKEN_REVOCATION_ERROR_RATE,
+    )
+    if settings.TOKEN_REVOCATION_BACKEND == "redis":
+        if aioredis is not None:
+            return RedisTokenRevocationList(
+                settings.REDIS_URL, prefix=settings.CACHE_KEY_PREFIX, **options
+            )
+        logger.warning("redis package not installed, using in-process token revocation list")
+    return TokenRevocationList(**options)
+
+
+# Create instance
+revocation_list = create_revocation_list()
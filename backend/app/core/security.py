@@ -1,15 +1,119 @@
 ﻿"""
 Security utilities for password hashing and JWT token handling
 """
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, Callable, Tuple
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from backend.app.core.config import settings
+from app.core.config import settings
 
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing pool has no free capacity"""
+
+
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy) -> JSONResponse:
+    """
+    Exception handler answering 503 for a saturated hashing pool
+    
+    Registered on the app so every caller of the pool (login, register,
+    user creation, password changes) gets the same retryable response.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication service is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
+class PasswordHashPool:
+    """
+    Bounded worker pool for bcrypt hashing and verification
+    
+    bcrypt takes 100+ ms of CPU per call; running it on the event loop
+    stalls every other request on the worker. Calls are executed on a
+    dedicated thread pool (bcrypt releases the GIL) and at most
+    ``max_pending`` calls may be running or queued at once; beyond that
+    ``PasswordHasherBusy`` is raised so callers can answer 503.
+    """
+    
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="password-hash"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._total_seconds = 0.0
+    
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """
+        Run fn(*args) on the pool
+        
+        Raises:
+            PasswordHasherBusy: If max_pending calls are already queued
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy("Password hashing pool is saturated")
+            self._pending += 1
+        
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+                self._total_seconds += time.perf_counter() - start
+    
+    def stats(self) -> dict:
+        """Queue depth and throughput counters"""
+        with self._lock:
+            pending = self._pending
+            completed = self.completed
+            avg_ms = self._total_seconds / completed * 1000 if completed else 0.0
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": min(pending, self.max_workers),
+            "queued": max(pending - self.max_workers, 0),
+            "completed": completed,
+            "rejected": self.rejected,
+            "avg_ms": round(avg_ms, 2),
+        }
+    
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+password_hash_pool = PasswordHashPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
 
 
 class PasswordHasher:
@@ -41,6 +145,102 @@ class PasswordHasher:
             True if password matches, False otherwise
         """
         return pwd_context.verify(plain_password, hashed_password)
+    
+    @staticmethod
+    def verify_and_update(
+        plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password and rehash it if the stored hash is outdated
+        
+        Args:
+            plain_password: Plain text password
+            hashed_password: Hashed password from database
+            
+        Returns:
+            (matches, new_hash) - new_hash is set when the stored hash uses
+            outdated parameters (e.g. fewer bcrypt rounds) and must be saved
+        """
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class TokenDecodeCache:
+    """
+    Bounded LRU of verified token claims, keyed by a digest of the token
+    
+    A client sends the same access token with every request of its life,
+    and each decode re-verifies the HMAC signature and re-parses the
+    claims. Claims that verified are kept until the token's ``exp``;
+    tokens that fail verification (or have no ``exp``) are never stored,
+    so a hit is always a token that verified before. The key is a digest
+    so the cache holds no bearer credentials. Revocation is checked by
+    the caller after decoding, cached or not.
+    """
+    
+    def __init__(self, *, maxsize: int = 10000, enabled: bool = True):
+        self.enabled = enabled
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._decode_seconds = 0.0
+    
+    def decode(self, token: str, verify: Callable[[str], Optional[dict]]) -> Optional[dict]:
+        """
+        Claims of token, calling verify(token) unless they are cached
+        
+        Returns a copy, or None when verification fails.
+        """
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        if self.enabled:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    claims, expires_at = entry
+                    if expires_at > time.time():
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return dict(claims)
+                    del self._entries[key]
+        
+        start = time.perf_counter()
+        claims = verify(token)
+        elapsed = time.perf_counter() - start
+        
+        expires_at = claims.get("exp") if claims is not None else None
+        with self._lock:
+            self.misses += 1
+            self._decode_seconds += elapsed
+            if self.enabled and isinstance(expires_at, (int, float)) and expires_at > time.time():
+                self._entries[key] = (dict(claims), expires_at)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return claims
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        """Size, hit ratio and mean time of a full decode"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "decode_avg_us": round(self._decode_seconds / self.misses * 1e6, 1)
+                if self.misses else 0.0,
+            }
+
+
+token_decode_cache = TokenDecodeCache(
+    maxsize=settings.TOKEN_DECODE_CACHE_MAXSIZE,
+    enabled=settings.TOKEN_DECODE_CACHE_ENABLED
+)
 
 
 class JWTHandler:
@@ -54,14 +254,17 @@ class JWTHandler:
         """
         Create JWT access token
         
+        Every token gets a unique ``jti`` claim so it can be revoked.
+        
         Args:
-            data: Data to encode in token (usually {'sub': user_id})
+            data: Data to encode in token (usually {'sub': user_id, 'ep': token_epoch})
             expires_delta: Token expiration time (default: 30 minutes)
             
         Returns:
             Encoded JWT token string
         """
         to_encode = data.copy()
+        to_encode["jti"] = uuid.uuid4().hex
         
         if expires_delta:
             expire = datetime.utcnow() + expires_delta
@@ -91,7 +294,7 @@ class JWTHandler:
         """
         to_encode = data.copy()
         expire = datetime.utcnow() + timedelta(days=7)
-        to_encode.update({"exp": expire})
+        to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
         
         encoded_jwt = jwt.encode(
             to_encode,
@@ -104,7 +307,20 @@ class JWTHandler:
     @staticmethod
     def decode_token(token: str) -> Optional[dict]:
         """
-        Decode and validate JWT token
+        Decode and validate JWT token (verified claims are cached until exp)
+        
+        Args:
+            token: JWT token string
+            
+        Returns:
+            Decoded token data or None if invalid
+        """
+        return token_decode_cache.decode(token, JWTHandler.verify_token)
+    
+    @staticmethod
+    def verify_token(token: str) -> Optional[dict]:
+        """
+        Verify signature and expiry of a JWT token, without the cache
         
         Args:
             token: JWT token string
@@ -134,6 +350,20 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return PasswordHasher.verify_password(plain_password, hashed_password)
 
 
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the password hashing pool"""
+    return await password_hash_pool.run(PasswordHasher.hash_password, password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify (and possibly rehash) a password on the password hashing pool"""
+    return await password_hash_pool.run(
+        PasswordHasher.verify_and_update, plain_password, hashed_password
+    )
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create access token"""
     return JWTHandler.create_access_token(data, expires_delta)
@@ -0,0 +1,165 @@
+"""
+Authenticated-user cache for the auth dependencies
+
+``get_current_user`` only needs a handful of fields of the user behind a
+token. They are kept in a bounded, short-TTL LRU per worker, optionally
+backed by the shared Redis cache so that a user looked up by one worker
+is warm for the others. ``CRUDUser.update`` (which also performs soft
+delete and restore) invalidates the entry.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from app.core.cache import MemoryCacheBackend, cache
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Principal returned by the auth dependencies"""
+    id: int
+    username: str
+    full_name: Optional[str]
+    is_active: bool
+    is_superuser: bool
+
+    @classmethod
+    def from_user(cls, user) -> "AuthenticatedUser":
+        return cls(
+            id=user.id,
+            username=user.username,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+        )
+
+
+class UserCache:
+    """
+    Two-tier principal cache: per-worker LRU plus optional shared tier
+
+    Entries on the local tier live for ``ttl`` seconds, which also bounds
+    how long another worker can serve a principal after an invalidation.
+    """
+
+    def __init__(
+        self,
+        *,
+        maxsize: int = 10000,
+        ttl: float = 30,
+        shared=None,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self._entries: "OrderedDict[int, Tuple[AuthenticatedUser, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _shared_key(self, user_id: int) -> str:
+        return cache.key("user", user_id)
+
+    def _store_local(self, principal: AuthenticatedUser) -> None:
+        with self._lock:
+            self._entries[principal.id] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    async def get(self, user_id: int) -> Optional[AuthenticatedUser]:
+        """Cached principal for user_id, or None"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                principal, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return principal
+                del self._entries[user_id]
+
+        if self.shared is not None:
+            raw = await self.shared.get(self._shared_key(user_id))
+            if raw is not None:
+                principal = AuthenticatedUser(**json.loads(raw))
+                self._store_local(principal)
+                self.shared_hits += 1
+                return principal
+
+        self.misses += 1
+        return None
+
+    async def set(self, user) -> AuthenticatedUser:
+        """Cache the principal of a User row and return it"""
+        principal = AuthenticatedUser.from_user(user)
+        self._store_local(principal)
+        if self.shared is not None:
+            await self.shared.set(
+                self._shared_key(principal.id),
+                json.dumps(asdict(principal)),
+                int(self.ttl) or 1,
+            )
+        return principal
+
+    async def load_async(
+        self, user_id: int, loader: Callable[[], Awaitable[Any]]
+    ) -> Optional[AuthenticatedUser]:
+        """
+        Cached principal for user_id, awaiting loader for the User row on a miss
+
+        Returns None when the loader finds no user; misses are not cached.
+        """
+        if self.enabled:
+            principal = await self.get(user_id)
+            if principal is not None:
+                return principal
+
+        user = await loader()
+        if user is None:
+            return None
+        if self.enabled:
+            return await self.set(user)
+        return AuthenticatedUser.from_user(user)
+
+    async def invalidate(self, user_id: int) -> None:
+        """Drop a user from both tiers"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+        if self.shared is not None:
+            await self.shared.delete(self._shared_key(user_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+        }
+
+
+def _shared_tier():
+    if not settings.USER_CACHE_SHARED or isinstance(cache.backend, MemoryCacheBackend):
+        return None
+    return cache.backend
+
+
+# Create instance
+user_cache = UserCache(
+    maxsize=settings.USER_CACHE_MAXSIZE,
+    ttl=settings.USER_CACHE_TTL,
+    shared=_shared_tier(),
+    enabled=settings.USER_CACHE_ENABLED,
+)
@@ -2,52 +2,44 @@
 CRUD operations for User model
 """
 from typing import Optional, List
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.utils import CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash
+from app.core.security import hash_password_async, verify_and_update_password_async
+from app.core.user_cache import user_cache
 
 
-class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+class CRUDUser(CRUDBase[User]):
     """CRUD operations for User model"""
     
-    def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
         """Get user by email"""
-        return db.query(User).filter(User.email == email).first()
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
     
-    def get_by_username(self, db: Session, *, username: str) -> Optional[User]:
+    async def get_by_username(
+        self, db: AsyncSession, *, username: str
+    ) -> Optional[User]:
         """Get user by username"""
-        return db.query(User).filter(User.username == username).first()
+        result = await db.execute(select(User).where(User.username == username))
+        return result.scalars().first()
     
-    def get_multi_with_filters(
+    def filter_clauses(
         self,
-        db: Session,
         *,
-        skip: int = 0,
-        limit: int = 100,
         search: Optional[str] = None,
         is_active: Optional[bool] = None,
         is_superuser: Optional[bool] = None
-    ) -> List[User]:
-        """
-        Get multiple users with filters
-        
-        Args:
-            db: Database session
-            skip: Number of records to skip
-            limit: Maximum number of records to return
-            search: Search term for username, email, or full_name
-            is_active: Filter by active status
-            is_superuser: Filter by superuser status
-        """
-        query = db.query(User)
+    ) -> list:
+        """WHERE clauses shared by the user list and its total count"""
+        clauses = []
         
         # Apply search filter
         if search:
-            query = query.filter(
+            clauses.append(
                 or_(
                     User.username.ilike(f"%{search}%"),
                     User.email.ilike(f"%{search}%"),
@@ -57,14 +49,60 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         
         # Apply status filters
         if is_active is not None:
-            query = query.filter(User.is_active == is_active)
+            clauses.append(User.is_active == is_active)
         
         if is_superuser is not None:
-            query = query.filter(User.is_superuser == is_superuser)
+            clauses.append(User.is_superuser == is_superuser)
+        
+        return clauses
+    
+    async def get_multi_with_filters(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        is_superuser: Optional[bool] = None
+    ) -> List[User]:
+        """
+        Get multiple users with filters
         
-        return query.offset(skip).limit(limit).all()
+        Args:
+            db: Database session
+            skip: Number of records to skip
+            limit: Maximum number of records to return
+            search: Search term for username, email, or full_name
+            is_active: Filter by active status
+            is_superuser: Filter by superuser status
+        """
+        clauses = self.filter_clauses(
+            search=search, is_active=is_active, is_superuser=is_superuser
+        )
+        result = await db.execute(
+            select(User).where(*clauses).offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    async def count_with_filters(
+        self,
+        db: AsyncSession,
+        *,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        is_superuser: Optional[bool] = None
+    ) -> int:
+        """Count users matching the same filters as get_multi_with_filters"""
+        clauses = self.filter_clauses(
+            search=search, is_active=is_active, is_superuser=is_superuser
+        )
+        result = await db.execute(
+            select(func.count()).select_from(User).where(*clauses)
+        )
+        return result.scalar_one()
     
-    def create(self, db: Session, *, obj_in: UserCreate) -> User:
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
         """
         Create new user with hashed password
         
@@ -75,19 +113,19 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         db_obj = User(
             username=obj_in.username,
             email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=await hash_password_async(obj_in.password),
             full_name=obj_in.full_name,
             is_active=obj_in.is_active,
             is_superuser=obj_in.is_superuser
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
         return db_obj
     
-    def update(
+    async def update(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         db_obj: User,
         obj_in: UserUpdate
@@ -95,23 +133,31 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         """
         Update user
         
+        Also used for soft delete and restore (is_active changes), so the
+        authenticated-user cache entry is invalidated here.
+        
         Args:
             db: Database session
             db_obj: Existing user object
-            obj_in: Update data
+            obj_in: Update data (schema or dict)
         """
-        update_data = obj_in.dict(exclude_unset=True)
+        if isinstance(obj_in, dict):
+            update_data = dict(obj_in)
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
         
         # Hash password if provided
         if "password" in update_data:
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = await hash_password_async(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
         
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        updated = await super().update(db, db_obj=db_obj, obj_in=update_data)
+        await user_cache.invalidate(updated.id)
+        return updated
     
-    def authenticate(
-        self, db: Session, *, email: str, password: str
+    async def authenticate(
+        self, db: AsyncSession, *, email: str, password: str
     ) -> Optional[User]:
         """
         Authenticate user by email and password
@@ -124,12 +170,13 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         Returns:
             User object if authentication successful, None otherwise
         """
-        from app.core.security import verify_password
-        
-        user = self.get_by_email(db, email=email)
+        user = await self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        valid, _ = await verify_and_update_password_async(
+            password, user.hashed_password
+        )
+        if not valid:
             return None
         return user
     
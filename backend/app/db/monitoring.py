@@ -0,0 +1,199 @@
+"""
+Connection pool instrumentation and slow-query logging
+
+``PoolMetrics`` hooks an engine's pool: checkouts/checkins come from pool
+events, while the wait for a connection is timed by wrapping the pool's
+``connect`` (there is no "checkout requested" event), which also lets
+checkout timeouts be counted. Cursor execute events feed the per-request
+``QueryStats`` and log statements that exceed a threshold, with optional
+sampling.
+"""
+import bisect
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS: Sequence[float] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class QueryStats:
+    """Statement count and total execution time of one request"""
+
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# Set by the metrics middleware for the duration of a request. SQLAlchemy
+# runs sync engine events in a greenlet that shares the caller's context.
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus layout) guarded by a lock"""
+
+    def __init__(self, buckets: Sequence[float] = WAIT_BUCKETS):
+        self.buckets = list(buckets)
+        self._counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.buckets, self._counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            buckets["+Inf"] = self.count
+            return {"count": self.count, "sum": round(self.sum, 6), "buckets": buckets}
+
+
+class PoolMetrics:
+    """Checkout, overflow, wait time and timeout metrics of one engine pool"""
+
+    def __init__(self, engine: Engine):
+        self.pool = engine.pool
+        self.wait = Histogram()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+        event.listen(self.pool, "connect", self._on_connect)
+        event.listen(self.pool, "checkout", self._on_checkout)
+        event.listen(self.pool, "checkin", self._on_checkin)
+        self._wrap_connect()
+
+    def _wrap_connect(self) -> None:
+        connect = self.pool.connect
+
+        def timed_connect(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return connect(*args, **kwargs)
+            except PoolTimeoutError:
+                with self._lock:
+                    self.timeouts += 1
+                raise
+            finally:
+                self.wait.observe(time.perf_counter() - start)
+
+        self.pool.connect = timed_connect
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def _pool_state(self) -> Dict[str, Optional[int]]:
+        def read(name: str) -> Optional[int]:
+            method = getattr(self.pool, name, None)
+            return method() if callable(method) else None
+
+        return {
+            "size": read("size"),
+            "checked_out": read("checkedout"),
+            "checked_in": read("checkedin"),
+            "overflow": read("overflow"),
+        }
+
+    def stats(self) -> dict:
+        return {
+            **self._pool_state(),
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "checkout_timeouts": self.timeouts,
+            "checkout_wait_seconds": self.wait.snapshot(),
+        }
+
+
+class SlowQueryLogger:
+    """
+    Log statements slower than ``threshold_ms``
+
+    Only one in ``1 / sample_rate`` slow statements is logged, so a burst
+    of slow queries cannot flood the log. Start times are kept on the
+    connection ``info`` dict under the logger itself, so several loggers
+    on one engine time independently, and are dropped again when a
+    statement fails. Nothing is formatted for fast statements. Every
+    statement is also added to the current request's ``QueryStats``.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        *,
+        threshold_ms: float,
+        sample_rate: float = 1.0,
+        max_statement_chars: int = 1000,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.sample_rate = sample_rate
+        self.max_statement_chars = max_statement_chars
+        self.slow_queries = 0
+
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        event.listen(engine, "handle_error", self._error)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault(self, []).append(time.perf_counter())
+
+    def _error(self, context) -> None:
+        # a failed statement never reaches after_cursor_execute
+        if context.connection is None or context.execution_context is None:
+            return
+        starts = context.connection.info.get(self)
+        if starts:
+            starts.pop()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - conn.info[self].pop()
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.duration += elapsed
+        if elapsed < self.threshold:
+            return
+        self.slow_queries += 1
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        logger.warning(
+            "Slow query (%.1f ms, executemany=%s): %s",
+            elapsed * 1000,
+            executemany,
+            statement[: self.max_statement_chars],
+        )
@@ -5,13 +5,39 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sess
 from sqlalchemy.orm import declarative_base
 
 from app.core.config import settings
+from app.db.monitoring import PoolMetrics, SlowQueryLogger
+
+
+def _pool_options() -> dict:
+    """Pool sizing for the engine"""
+    if settings.DATABASE_URL.startswith("sqlite"):
+        # SQLite uses single-connection pools without sizing options
+        return dict(pool_pre_ping=True)
+    return dict(
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+
+
+def _statement_timeout_args(driver: str) -> dict:
+    """connect_args setting the PostgreSQL statement_timeout per connection"""
+    timeout = settings.DB_STATEMENT_TIMEOUT_MS
+    if not timeout or not settings.DATABASE_URL.startswith("postgresql"):
+        return {}
+    if driver == "asyncpg":
+        return {"server_settings": {"statement_timeout": str(timeout)}}
+    return {"options": f"-c statement_timeout={timeout}"}
+
 
 # Create async engine
 engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.ENVIRONMENT == "development",
+    settings.ASYNC_DATABASE_URL,
     future=True,
-    pool_pre_ping=True,
+    connect_args=_statement_timeout_args(settings.ASYNC_DATABASE_DRIVER),
+    **_pool_options(),
 )
 
 # Create async session factory
@@ -23,6 +49,14 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Pool metrics and sampled slow-query logging (replaces echo=True)
+pool_metrics = PoolMetrics(engine.sync_engine)
+slow_query_logger = SlowQueryLogger(
+    engine.sync_engine,
+    threshold_ms=settings.DB_SLOW_QUERY_MS,
+    sample_rate=settings.DB_SLOW_QUERY_SAMPLE_RATE,
+)
+
 # Create declarative base
 Base = declarative_base()
 
@@ -1,7 +1,7 @@
 ﻿from typing import Type, TypeVar, Generic
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.base import BaseModel
+from app.models.base import BaseModel
 
 ModelType = TypeVar("ModelType", bound=BaseModel)
 
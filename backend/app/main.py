@@ -27,14 +27,34 @@ async def health_check():
 Main FastAPI Application
 RFI Management System
 """
+import inspect
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 
+from app.core.access_log import setup_access_log, shutdown_access_log
+from app.core.cache import cache
 from app.core.config import settings
+from app.core.events import broker as event_broker
+from app.core.revocation import revocation_list
+from app.core.security import PasswordHasherBusy, password_hasher_busy_handler
+from app.core.metrics import metrics_endpoint
+from app.core.responses import default_response_class
 from app.api.v1.api import api_router
 from app.middleware.logging_middleware import LoggingMiddleware
+from app.middleware.metrics_middleware import MetricsMiddleware
+
+try:  # RFI services ship with the project-root app tree
+    from app.services import rfi_attachments, rfi_jobs
+except ModuleNotFoundError as e:
+    if e.name != "app.services":
+        raise
+    rfi_attachments = rfi_jobs = None
+
+logger = logging.getLogger(__name__)
 
 # Create FastAPI instance
 app = FastAPI(
@@ -43,7 +63,8 @@ app = FastAPI(
     description="RFI Management System API",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    default_response_class=default_response_class(),
 )
 
 # CORS Middleware
@@ -61,8 +82,19 @@ app.add_middleware(
     allowed_hosts=settings.ALLOWED_HOSTS
 )
 
-# Custom Logging Middleware
-app.add_middleware(LoggingMiddleware)
+# Structured access log
+app.add_middleware(
+    LoggingMiddleware,
+    success_sample_rate=settings.ACCESS_LOG_SUCCESS_SAMPLE_RATE,
+)
+
+# Prometheus Metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+# 503 + Retry-After whenever the password hashing pool is saturated
+app.add_exception_handler(PasswordHasherBusy, password_hasher_busy_handler)
 
 # Include API Router
 app.include_router(api_router, prefix="/api/v1")
@@ -94,6 +126,9 @@ async def health_check():
 @app.on_event("startup")
 async def startup_event():
     """Startup tasks"""
+    setup_access_log()
+    await event_broker.start()
+    await revocation_list.start()
     print(f"🚀 Starting {settings.PROJECT_NAME} v{settings.VERSION}")
     print(f"📝 Environment: {settings.ENVIRONMENT}")
     print(f"📚 API Docs: http://localhost:8000/api/docs")
@@ -104,3 +139,15 @@ async def startup_event():
 async def shutdown_event():
     """Shutdown tasks"""
     print(f"👋 Shutting down {settings.PROJECT_NAME}")
+    steps = [event_broker.stop, revocation_list.stop, cache.backend.close]
+    if rfi_jobs is not None:
+        steps += [rfi_jobs.form_renderer.close, rfi_attachments.image_pipeline.close]
+    # one failing step must not keep the others (and the access log) open
+    for step in steps:
+        try:
+            result = step()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            logger.exception("Shutdown step %s failed", getattr(step, "__qualname__", step))
+    shutdown_access_log()
@@ -1,33 +1,90 @@
 """
-Custom Logging Middleware
+Request Logging Middleware (pure ASGI)
 """
-import time
 import logging
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-
-logger = logging.getLogger(__name__)
-
-
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Log all requests and responses"""
-    
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        # Log request
-        logger.info(f"Request: {request.method} {request.url.path}")
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate duration
-        duration = time.time() - start_time
-        
-        # Log response
-        logger.info(
-            f"Response: {request.method} {request.url.path} "
-            f"- Status: {response.status_code} - Duration: {duration:.3f}s"
-        )
-        
-        return response
+import random
+import time
+import uuid
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.access_log import access_logger
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+
+class LoggingMiddleware:
+    """
+    Emit one structured access record per request
+
+    Records carry method, route template, path, status, duration, response
+    bytes, user id and request id. The request id is taken from an incoming
+    ``X-Request-ID`` header (or generated) and echoed on the response.
+    Successful (2xx) requests are logged with probability
+    ``success_sample_rate``; everything else is always logged. Nothing is
+    built when the access logger is disabled for INFO.
+    """
+
+    def __init__(self, app: ASGIApp, *, success_sample_rate: float = 1.0):
+        self.app = app
+        self.success_sample_rate = success_sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _header(scope, REQUEST_ID_HEADER) or uuid.uuid4().hex
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+
+        status_code = 500
+        response_bytes = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((REQUEST_ID_HEADER, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if self._should_log(status_code):
+                route = scope.get("route")
+                access_logger.info(
+                    "request",
+                    extra={
+                        "access": {
+                            "request_id": request_id,
+                            "method": scope["method"],
+                            "route": getattr(route, "path_format", None),
+                            "path": scope["path"],
+                            "status": status_code,
+                            "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                            "bytes": response_bytes,
+                            "user_id": state.get("user_id"),
+                        }
+                    },
+                )
+
+    def _should_log(self, status_code: int) -> bool:
+        if not access_logger.isEnabledFor(logging.INFO):
+            return False
+        if 200 <= status_code < 300 and self.success_sample_rate < 1.0:
+            return random.random() < self.success_sample_rate
+        return True
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
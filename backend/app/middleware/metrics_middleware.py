@@ -0,0 +1,72 @@
+"""
+Prometheus request metrics middleware (pure ASGI)
+"""
+import time
+from typing import Optional
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics
+from app.db.monitoring import QueryStats, current_query_stats
+
+
+def route_template(scope: Scope) -> Optional[str]:
+    """Path template of the route that will handle the request"""
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path_format", None) or getattr(route, "path", None)
+    return None
+
+
+class MetricsMiddleware:
+    """
+    Record per-route request metrics
+
+    The route template is resolved before the request is dispatched so the
+    in-progress gauge carries the same labels as the other metrics.
+    ``/metrics`` itself is not recorded.
+    """
+
+    def __init__(self, app: ASGIApp, *, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope) or metrics.UNMATCHED_ROUTE
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        query_stats = QueryStats()
+        token = current_query_stats.set(query_stats)
+        in_progress = metrics.REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            in_progress.dec()
+            current_query_stats.reset(token)
+
+            metrics.REQUESTS.labels(method, route, str(status_code)).inc()
+            metrics.REQUEST_DURATION.labels(method, route).observe(duration)
+            metrics.RESPONSE_SIZE.labels(method, route).observe(response_size)
+            metrics.DB_QUERIES.labels(method, route).observe(query_stats.count)
+            metrics.DB_QUERY_DURATION.labels(method, route).observe(query_stats.duration)
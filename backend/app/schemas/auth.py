@@ -23,6 +23,11 @@ class LoginRequest(BaseModel):
     password: str = Field(..., min_length=8, max_length=100)
 
 
+class LogoutRequest(BaseModel):
+    """Logout request schema (the refresh token of the session, if any)"""
+    refresh_token: Optional[str] = None
+
+
 class LoginResponse(BaseModel):
     """Login response schema"""
     access_token: str
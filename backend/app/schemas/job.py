@@ -0,0 +1,25 @@
+"""
+Background job Pydantic schemas
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+
+class JobStatus(BaseModel):
+    """State of a background job (returned with 202 on submission)"""
+    id: str
+    type: str
+    status: str
+    progress: Optional[float] = None
+    message: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    cancel_requested: bool = False
+
+    class Config:
+        from_attributes = True
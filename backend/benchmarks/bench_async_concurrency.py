@@ -0,0 +1,171 @@
+"""
+Benchmark: sync Session on the threadpool vs AsyncSession on the event loop
+
+Fires ``--requests`` RFI list queries with ``--concurrency`` in flight and
+reports throughput and latency for two data paths:
+
+- ``sync``: a blocking ``Session`` query run through ``anyio.to_thread``
+  with the same 40-slot limiter FastAPI uses for sync handlers and
+  dependencies, so at most ``--threads`` queries are in flight per worker
+- ``async``: ``crud_rfi.get_multi`` on an ``AsyncSession``, where waiting
+  on the database does not hold any thread
+
+``--db-latency-ms`` adds ``pg_sleep`` to every request to model slower
+queries or a remote database; that is where the threadpool cap shows.
+
+Usage:
+    python -m benchmarks.bench_async_concurrency --concurrency 10 100 200 --db-latency-ms 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+import anyio
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.crud import rfi as crud_rfi
+from app.models.rfi import GeneralRFI
+
+
+async def _drive(
+    handler: Callable[[], Awaitable[None]], requests: int, concurrency: int
+) -> dict:
+    """Run handler requests times with concurrency calls in flight"""
+    latencies: List[float] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def client() -> None:
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            await handler()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[max(int(len(latencies) * 0.95) - 1, 0)],
+    }
+
+
+def _sync_handler(
+    session_factory: sessionmaker,
+    limiter: anyio.CapacityLimiter,
+    limit: int,
+    latency_s: float,
+) -> Callable[[], Awaitable[None]]:
+    def query() -> None:
+        with session_factory() as db:
+            if latency_s:
+                db.execute(select(func.pg_sleep(latency_s)))
+            db.execute(select(GeneralRFI).limit(limit)).scalars().all()
+
+    async def handler() -> None:
+        await anyio.to_thread.run_sync(query, limiter=limiter)
+
+    return handler
+
+
+def _async_handler(
+    session_factory: async_sessionmaker, limit: int, latency_s: float
+) -> Callable[[], Awaitable[None]]:
+    async def handler() -> None:
+        async with session_factory() as db:
+            if latency_s:
+                await db.execute(select(func.pg_sleep(latency_s)))
+            await crud_rfi.get_multi(db, limit=limit)
+
+    return handler
+
+
+async def run(
+    concurrency_levels: List[int],
+    requests: int,
+    limit: int,
+    threads: int,
+    pool_size: int,
+    latency_ms: float,
+) -> None:
+    latency_s = latency_ms / 1000
+    sync_engine = create_engine(
+        settings.DATABASE_URL, pool_size=pool_size, max_overflow=0
+    )
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL, pool_size=pool_size, max_overflow=0
+    )
+    sync_handler = _sync_handler(
+        sessionmaker(bind=sync_engine, class_=Session),
+        anyio.CapacityLimiter(threads),
+        limit,
+        latency_s,
+    )
+    async_handler = _async_handler(
+        async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False),
+        limit,
+        latency_s,
+    )
+
+    print(
+        f"requests: {requests}, page size: {limit}, threadpool: {threads}, "
+        f"db pool: {pool_size}, added db latency: {latency_ms} ms"
+    )
+    print(
+        f"{'conc':>6} {'sync rps':>10} {'p50 ms':>8} {'p95 ms':>8}"
+        f" {'async rps':>10} {'p50 ms':>8} {'p95 ms':>8} {'gain':>6}"
+    )
+    try:
+        # Warm both pools
+        await _drive(sync_handler, pool_size, pool_size)
+        await _drive(async_handler, pool_size, pool_size)
+
+        for concurrency in concurrency_levels:
+            sync = await _drive(sync_handler, requests, concurrency)
+            asyn = await _drive(async_handler, requests, concurrency)
+            print(
+                f"{concurrency:>6} {sync['rps']:>10.1f} {sync['p50']:>8.1f} {sync['p95']:>8.1f}"
+                f" {asyn['rps']:>10.1f} {asyn['p50']:>8.1f} {asyn['p95']:>8.1f}"
+                f" {asyn['rps'] / sync['rps']:>5.1f}x"
+            )
+    finally:
+        sync_engine.dispose()
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 100, 200])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument("--pool-size", type=int, default=100)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(
+        run(
+            args.concurrency,
+            args.requests,
+            args.limit,
+            args.threads,
+            args.pool_size,
+            args.db_latency_ms,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: attachment image renditions (thumbnail / web size)
+
+Renders a synthetic phone photo (noisy gradient, camera EXIF; default
+4000x3000 = 12 MP) to each rendition and reports the median render time
+and the output size against the original:
+
+- ``draft``: the pipeline's path; libjpeg decodes at a reduced DCT scale
+  before resampling
+- ``full``: the same output, decoding the full-resolution image first
+
+Usage:
+    python -m benchmarks.bench_attachment_images --size 4000 3000 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from app.core.config import settings
+from app.services import attachment_images
+
+
+def make_photo(path: Path, width: int, height: int) -> None:
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 40)
+    image = Image.merge("RGB", (gradient, noise, Image.blend(gradient, noise, 0.5)))
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"
+    exif[0x0112] = 1
+    image.save(path, "JPEG", quality=92, exif=exif)
+
+
+def render_full(source: str, destination: str, max_px: int, quality: int) -> None:
+    """The rendition without reduced-scale decoding"""
+    with Image.open(source) as image:
+        image.load()
+        image.thumbnail((max_px, max_px), Image.Resampling.LANCZOS)
+        image.convert("RGB").save(
+            destination, "JPEG", quality=quality, optimize=True, progressive=True
+        )
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, nargs=2, default=[4000, 3000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quality", type=int, default=settings.ATTACHMENT_RENDITION_QUALITY)
+    args = parser.parse_args()
+
+    renditions = {"thumb": settings.ATTACHMENT_THUMB_PX, "web": settings.ATTACHMENT_WEB_PX}
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory) / "photo.jpg"
+        destination = str(Path(directory) / "out.jpg")
+        make_photo(source, *args.size)
+        original = source.stat().st_size
+        print(f"original: {args.size[0]}x{args.size[1]}, {original / 1024:.0f} KiB")
+        print(
+            f"{'rendition':>9} {'px':>5} {'draft ms':>9} {'full ms':>8}"
+            f" {'KiB':>6} {'of original':>12}"
+        )
+        for name, max_px in renditions.items():
+            draft_ms = _median_ms(
+                lambda: attachment_images.render_rendition(
+                    str(source), destination, max_px, args.quality
+                ),
+                args.repeat,
+            )
+            size = os.path.getsize(destination)
+            full_ms = _median_ms(
+                lambda: render_full(str(source), destination, max_px, args.quality),
+                args.repeat,
+            )
+            print(
+                f"{name:>9} {max_px:>5} {draft_ms:>9.1f} {full_ms:>8.1f}"
+                f" {size / 1024:>6.0f} {size / original:>11.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: response serialization cost per RFI page size
+
+Serializes pages of ORM-like RFI rows (no database) the way an endpoint
+with ``response_model=List[RFI]`` does and reports the median time per
+page for:
+
+- ``json``: FastAPI's response_model serialization + ``JSONResponse``
+  (what every endpoint used before)
+- ``orjson``: the same serialization + ``ORJSONResponse``, the default
+  response class with ``FAST_JSON_RESPONSES``
+- ``pydantic``: ``PydanticJSONResponse`` with ``TypeAdapter(List[RFI])``,
+  as the RFI list endpoints now return
+
+All three bodies are checked to decode to the same JSON.
+
+Usage:
+    python -m benchmarks.bench_json_serialization --sizes 10 100 1000 --repeat 50
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import statistics
+import time
+from types import SimpleNamespace
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+
+from app.core.responses import PydanticJSONResponse
+from app.schemas.rfi import RFI
+
+RFI_LIST = TypeAdapter(List[RFI])
+RESPONSE_FIELD = create_model_field(name="Response", type_=List[RFI], mode="serialization")
+
+
+def make_rows(count: int) -> list:
+    """Objects with GeneralRFI's attributes, as the ORM returns them"""
+    rows = []
+    for i in range(count):
+        values = {name: None for name in RFI.model_fields}
+        values.update(
+            id_RFI=i,
+            RFI_no=f"RFI-{i:06d}",
+            RFI_date=datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 365),
+            inspection_date=datetime.date(2025, 2, 1),
+            id_pre=1 + i % 5,
+            Applicant="مهندس رضایی",
+            status="Pending",
+            step="QC",
+            tag_no=f"P-{100 + i % 900}A",
+            equipment_name="Centrifugal pump",
+            note="بازرسی چشمی و تست فشار",
+            acc=False,
+            rej=False,
+            cancel=False,
+            out_of_service=False,
+            in_service=True,
+            ready_to_service=False,
+        )
+        rows.append(SimpleNamespace(**values))
+    return rows
+
+
+async def fastapi_body(rows: list, response_class) -> bytes:
+    content = await serialize_response(
+        field=RESPONSE_FIELD, response_content=rows, is_coroutine=True
+    )
+    return response_class(content).body
+
+
+async def pydantic_body(rows: list) -> bytes:
+    return PydanticJSONResponse(
+        RFI_LIST.validate_python(rows, from_attributes=True), adapter=RFI_LIST
+    ).body
+
+
+VARIANTS = {
+    "json": lambda rows: fastapi_body(rows, JSONResponse),
+    "orjson": lambda rows: fastapi_body(rows, ORJSONResponse),
+    "pydantic": pydantic_body,
+}
+
+
+async def _median_ms(fn, rows: list, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn(rows)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def run(sizes, repeat: int) -> None:
+    print(f"repeat: {repeat} (median ms per page)")
+    print(f"{'rows':>6} " + " ".join(f"{name:>10}" for name in VARIANTS) + f" {'speedup':>8}")
+    for size in sizes:
+        rows = make_rows(size)
+        bodies = [json.loads(await fn(rows)) for fn in VARIANTS.values()]
+        assert all(body == bodies[0] for body in bodies), "serializers disagree"
+
+        timings = [await _median_ms(fn, rows, repeat) for fn in VARIANTS.values()]
+        speedup = timings[0] / min(timings[1:])
+        print(f"{size:>6} " + " ".join(f"{ms:>10.2f}" for ms in timings) + f" {speedup:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
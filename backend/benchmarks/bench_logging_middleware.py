@@ -0,0 +1,114 @@
+"""
+Benchmark: request logging middleware overhead
+
+Serves a trivial JSON route in-process (httpx ``ASGITransport``, no
+network) and reports requests/s for:
+
+- ``none``: no logging middleware
+- ``base_http``: the previous ``BaseHTTPMiddleware`` logger with two
+  f-string log lines per request
+- ``asgi``: the pure-ASGI structured ``LoggingMiddleware`` writing through
+  the queue handler (and ``asgi_sampled`` with 2xx sampling)
+
+Log output goes to /dev/null so that the terminal does not dominate.
+
+Usage:
+    python -m benchmarks.bench_logging_middleware --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.access_log import setup_access_log, shutdown_access_log
+from app.middleware.logging_middleware import LoggingMiddleware
+
+legacy_logger = logging.getLogger("bench.legacy")
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware logger this package used before"""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        legacy_logger.info(f"Request: {request.method} {request.url.path}")
+        response = await call_next(request)
+        duration = time.time() - start_time
+        legacy_logger.info(
+            f"Response: {request.method} {request.url.path} "
+            f"- Status: {response.status_code} - Duration: {duration:.3f}s"
+        )
+        return response
+
+
+def make_app(variant: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/rfis/{id_rfi}")
+    async def read_rfi(id_rfi: int):
+        return {"id_RFI": id_rfi, "RFI_no": f"RFI-{id_rfi}", "status": "Pending"}
+
+    if variant == "base_http":
+        app.add_middleware(LegacyLoggingMiddleware)
+    elif variant == "asgi":
+        app.add_middleware(LoggingMiddleware)
+    elif variant == "asgi_sampled":
+        app.add_middleware(LoggingMiddleware, success_sample_rate=0.1)
+    return app
+
+
+async def measure(app: FastAPI, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = iter(range(requests))
+
+        async def worker() -> None:
+            for i in remaining:
+                response = await client.get(f"/rfis/{i}")
+                response.raise_for_status()
+
+        # Warm-up
+        await client.get("/rfis/0")
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+
+async def run(requests: int, concurrency: int, rounds: int) -> None:
+    devnull = open(os.devnull, "w")
+    legacy_handler = logging.StreamHandler(devnull)
+    legacy_logger.addHandler(legacy_handler)
+    legacy_logger.setLevel(logging.INFO)
+    legacy_logger.propagate = False
+    setup_access_log(stream=devnull)
+
+    try:
+        print(f"requests: {requests}, concurrency: {concurrency}, best of {rounds}")
+        baseline = None
+        for variant in ("none", "base_http", "asgi", "asgi_sampled"):
+            app = make_app(variant)
+            rps = max([await measure(app, requests, concurrency) for _ in range(rounds)])
+            baseline = baseline or rps
+            print(f"{variant:>14}: {rps:>9.0f} req/s ({rps / baseline:.0%} of no middleware)")
+    finally:
+        shutdown_access_log()
+        legacy_logger.removeHandler(legacy_handler)
+        devnull.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
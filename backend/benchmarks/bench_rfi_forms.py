@@ -0,0 +1,138 @@
+"""
+Benchmark: printable RFI form rendering (PDF / DOCX)
+
+Renders synthetic RFIs (no database) and reports:
+
+- per form: the median render time with the parsed template cached (as
+  every render after the first in a process) and with the template parsed
+  for each form, plus the one-off parse cost
+- batch: pages/s of ``FormRenderer.render_merged`` (one merged PDF) with
+  the forms rendered on the threadpool (``workers=0``) and on process
+  pools of increasing size; pools are started and warmed before timing
+
+Usage:
+    python -m benchmarks.bench_rfi_forms --forms 200 --workers 0 1 2 4 --repeat 20
+"""
+import argparse
+import asyncio
+import datetime
+import io
+import statistics
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+from app.core.config import settings
+from app.services import rfi_forms
+
+
+def make_records(count: int) -> List[Dict[str, str]]:
+    records = []
+    for i in range(count):
+        rfi = SimpleNamespace(
+            RFI_no=f"RFI-{i:06d}",
+            RFI_date=datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 365),
+            inspection_date=datetime.date(2025, 2, 1),
+            id_pre=1 + i % 5,
+            tag_no=f"P-{100 + i % 900}A",
+            equipment_name="Centrifugal pump",
+            Applicant="مهندس رضایی",
+            Performer="Site team 2",
+            inspctr="QC inspector",
+            status="Pending",
+            step="QC",
+            note="Visual inspection and hydrostatic pressure test of the discharge line " * (i % 4),
+            Contractor="Contractor Co.",
+            QC="QC engineer",
+            TPI="TPI inspector",
+            HeadQC="Head of QC",
+            acc=i % 3 == 0,
+            in_service=True,
+        )
+        records.append(rfi_forms.form_record(rfi))
+    return records
+
+
+def _clear_templates() -> None:
+    rfi_forms._pdf_template.cache_clear()
+    rfi_forms._docx_template.cache_clear()
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def per_form(options: rfi_forms.FormOptions, record: Dict[str, str], repeat: int) -> None:
+    templates = {"pdf": rfi_forms._pdf_template, "docx": rfi_forms._docx_template}
+    print(f"{'format':>6} {'parse ms':>9} {'cached ms':>10} {'uncached ms':>12} {'KiB':>6}")
+    for form_format, template in templates.items():
+        def parse():
+            _clear_templates()
+            template(options)
+
+        def uncached():
+            _clear_templates()
+            rfi_forms.render_form(record, form_format, options)
+
+        parse_ms = _median_ms(parse, max(3, repeat // 4))
+        uncached_ms = _median_ms(uncached, max(3, repeat // 4))
+        size = len(rfi_forms.render_form(record, form_format, options))
+        cached_ms = _median_ms(
+            lambda: rfi_forms.render_form(record, form_format, options), repeat
+        )
+        print(
+            f"{form_format:>6} {parse_ms:>9.1f} {cached_ms:>10.1f} {uncached_ms:>12.1f}"
+            f" {size / 1024:>6.0f}"
+        )
+
+
+async def batch(options: rfi_forms.FormOptions, records, workers_list, batch_size: int) -> None:
+    async def source():
+        for record in records:
+            yield record
+
+    print(f"{'workers':>7} {'forms':>6} {'seconds':>8} {'pages/s':>8} {'MiB':>6}")
+    for workers in workers_list:
+        renderer = rfi_forms.FormRenderer(options, workers=workers, batch_size=batch_size)
+        try:
+            # start (and warm) every pool process before timing
+            await renderer.render_many(records[: max(workers, 1) * 2], "pdf")
+            output = io.BytesIO()
+            start = time.perf_counter()
+            forms, pages = await renderer.render_merged(source(), output)
+            seconds = time.perf_counter() - start
+        finally:
+            renderer.close()
+        print(
+            f"{workers:>7} {forms:>6} {seconds:>8.2f} {pages / seconds:>8.1f}"
+            f" {len(output.getvalue()) / 2**20:>6.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--forms", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--batch-size", type=int, default=settings.RFI_FORM_BATCH_SIZE)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--font", default=settings.RFI_FORM_FONT)
+    parser.add_argument("--dpi", type=int, default=settings.RFI_FORM_DPI)
+    args = parser.parse_args()
+
+    options = rfi_forms.FormOptions(
+        font_path=args.font, dpi=args.dpi, docx_template=settings.RFI_FORM_DOCX_TEMPLATE
+    )
+    records = make_records(args.forms)
+    print(f"dpi: {args.dpi}, font: {args.font}, repeat: {args.repeat}")
+    per_form(options, records[1], args.repeat)
+    print()
+    asyncio.run(batch(options, records, args.workers, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: full ORM list pages vs lean column projections
+
+For one page of ``Tbl_RFI`` compares the list endpoints' two paths:
+
+- ``orm``: hydrate ``GeneralRFI`` instances and serialize them through
+  ``RFI.model_validate(...).model_dump(mode="json")``
+- ``lean``: select only the ``fields=compact`` columns as ``Row`` tuples
+  and turn them into dicts directly
+
+and reports the median per-page CPU time (query + serialization) and the
+peak memory allocated while building the page (``tracemalloc``).
+
+Usage:
+    python -m benchmarks.bench_rfi_list_projection --limit 100 1000 --repeat 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.crud import rfi as crud_rfi
+from app.models.rfi import GeneralRFI
+from app.schemas.rfi import RFI
+
+
+async def orm_page(db: AsyncSession, limit: int):
+    rfis = await crud_rfi.get_multi(db, limit=limit)
+    page = [RFI.model_validate(rfi).model_dump(mode="json") for rfi in rfis]
+    db.expunge_all()
+    return page
+
+
+async def lean_page(db: AsyncSession, limit: int):
+    fields = list(crud_rfi.COMPACT_LIST_FIELDS)
+    rows = await crud_rfi.get_multi(db, limit=limit, fields=fields)
+    return crud_rfi.rows_as_dicts(rows, fields)
+
+
+async def _measure(fn, db: AsyncSession, limit: int, repeat: int):
+    """Median CPU ms and median peak KiB of fn(db, limit)"""
+    await fn(db, limit)  # warm-up
+    cpu, peaks = [], []
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.process_time()
+        await fn(db, limit)
+        cpu.append((time.process_time() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+    return statistics.median(cpu), statistics.median(peaks)
+
+
+async def run(limits, repeat: int, database_url: str) -> None:
+    engine = create_async_engine(database_url)
+    db = async_sessionmaker(engine, class_=AsyncSession)()
+    try:
+        total = (
+            await db.execute(select(func.count()).select_from(GeneralRFI))
+        ).scalar_one()
+        print(f"Tbl_RFI rows: {total}, repeat: {repeat}")
+        print(
+            f"{'limit':>6} {'orm ms':>9} {'lean ms':>9} {'cpu':>6}"
+            f" {'orm KiB':>9} {'lean KiB':>9} {'alloc':>6}"
+        )
+        for limit in limits:
+            orm_ms, orm_kib = await _measure(orm_page, db, limit, repeat)
+            lean_ms, lean_kib = await _measure(lean_page, db, limit, repeat)
+            print(
+                f"{limit:>6} {orm_ms:>9.2f} {lean_ms:>9.2f} {1 - lean_ms / orm_ms:>6.0%}"
+                f" {orm_kib:>9.0f} {lean_kib:>9.0f} {1 - lean_kib / orm_kib:>6.0%}"
+            )
+    finally:
+        await db.close()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--limit", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default=settings.ASYNC_DATABASE_URL)
+    args = parser.parse_args()
+    asyncio.run(run(args.limit, args.repeat, args.database_url))
+
+
+if __name__ == "__main__":
+    main()
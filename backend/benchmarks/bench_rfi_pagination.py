@@ -0,0 +1,94 @@
+"""
+Benchmark: offset vs keyset (cursor) pagination for RFI listing
+
+Measures the latency of fetching page N of ``Tbl_RFI`` with
+``OFFSET``/``LIMIT`` and with the ``(RFI_date, id_RFI)`` keyset cursor.
+
+Usage:
+    python -m benchmarks.bench_rfi_pagination --pages 1 10 100 1000 --limit 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.crud import rfi as crud_rfi
+from app.models.rfi import GeneralRFI
+
+
+async def _median_ms(fn, repeat: int) -> float:
+    """Await fn() repeat times and return the median duration in ms"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def _keyset_position(db, page: int, limit: int):
+    """Find the cursor position that starts the given page (not timed)"""
+    if page <= 1:
+        return None
+    result = await db.execute(
+        select(GeneralRFI)
+        .order_by(GeneralRFI.RFI_date, GeneralRFI.id_RFI)
+        .offset((page - 1) * limit - 1)
+        .limit(1)
+    )
+    last = result.scalars().first()
+    if last is None:
+        return None
+    return crud_rfi.decode_cursor(crud_rfi.encode_cursor(last))
+
+
+async def run(pages, limit: int, repeat: int, database_url: str) -> None:
+    engine = create_async_engine(database_url)
+    db = async_sessionmaker(engine, class_=AsyncSession)()
+    try:
+        total = (
+            await db.execute(select(func.count()).select_from(GeneralRFI))
+        ).scalar_one()
+        print(f"Tbl_RFI rows: {total}, page size: {limit}, repeat: {repeat}")
+        print(f"{'page':>8} {'offset ms':>12} {'cursor ms':>12} {'speedup':>9}")
+
+        for page in pages:
+            skip = (page - 1) * limit
+            if skip >= total:
+                print(f"{page:>8} {'(beyond end of table)':>35}")
+                continue
+
+            after = await _keyset_position(db, page, limit)
+            offset_ms = await _median_ms(
+                lambda: crud_rfi.get_multi(db, skip=skip, limit=limit), repeat
+            )
+            cursor_ms = await _median_ms(
+                lambda: crud_rfi.get_multi(
+                    db, limit=limit, after=after, keyset=True
+                ),
+                repeat,
+            )
+            db.expunge_all()
+            speedup = offset_ms / cursor_ms if cursor_ms else float("inf")
+            print(f"{page:>8} {offset_ms:>12.2f} {cursor_ms:>12.2f} {speedup:>8.1f}x")
+    finally:
+        await db.close()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default=settings.ASYNC_DATABASE_URL)
+    args = parser.parse_args()
+    asyncio.run(run(args.pages, args.limit, args.repeat, args.database_url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: JWT decode per request, python-jose every time vs the decode cache
+
+Simulates one worker serving ``--rate`` authenticated requests per second
+for ``--seconds`` from ``--sessions`` active sessions (each with its own
+access token, busier sessions sending more requests) and reports, per
+path, the mean time per request, the share of one CPU core that costs at
+that rate, and the cache's hit ratio. ``--maxsize`` below the number of
+sessions shows the LRU under eviction.
+
+Usage:
+    python -m benchmarks.bench_token_decode --rate 500 --seconds 60 --sessions 1000
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from app.core.config import settings
+from app.core.security import JWTHandler, TokenDecodeCache, create_access_token
+
+
+def make_requests(sessions: int, count: int, seed: int = 1) -> list:
+    """Access tokens in request order; session i is 1/(i+1) as busy as the first"""
+    tokens = [
+        create_access_token(
+            {"sub": str(user_id), "ep": 0},
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        )
+        for user_id in range(sessions)
+    ]
+    weights = [1 / (rank + 1) for rank in range(sessions)]
+    return random.Random(seed).choices(tokens, weights=weights, k=count)
+
+
+def time_path(requests: list, decode) -> float:
+    """Mean microseconds per request"""
+    start = time.perf_counter()
+    for token in requests:
+        decode(token)
+    return (time.perf_counter() - start) / len(requests) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=int, default=500, help="requests per second")
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--maxsize", type=int, default=settings.TOKEN_DECODE_CACHE_MAXSIZE)
+    args = parser.parse_args()
+
+    requests = make_requests(args.sessions, args.rate * args.seconds)
+    cache = TokenDecodeCache(maxsize=args.maxsize)
+    paths = {
+        "jose": JWTHandler.verify_token,
+        "cached": lambda token: cache.decode(token, JWTHandler.verify_token),
+    }
+    print(
+        f"{len(requests)} requests ({args.rate}/s for {args.seconds} s),"
+        f" {args.sessions} sessions, cache maxsize {args.maxsize}"
+    )
+    print(f"{'path':>7} {'µs/request':>11} {'CPU at rate':>12}")
+    for name, decode in paths.items():
+        micros = time_path(requests, decode)
+        print(f"{name:>7} {micros:>11.1f} {micros * args.rate / 1e6:>11.2%}")
+    stats = cache.stats()
+    print(f"hit ratio {stats['hit_ratio']:.1%}, full decode {stats['decode_avg_us']} µs")
+
+
+if __name__ == "__main__":
+    main()
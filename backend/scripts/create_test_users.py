@@ -2,17 +2,16 @@
 Test data creation script for User Management
 Run after creating first superuser
 """
-import sys
-from sqlalchemy.orm import Session
+import asyncio
 
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal, engine
 from app.crud.user import user as user_crud
 from app.schemas.user import UserCreate
 
 
-def create_test_users():
+async def create_test_users():
     """Create test users for development"""
-    db: Session = SessionLocal()
+    db = AsyncSessionLocal()
     
     try:
         # Test users data
@@ -48,7 +47,7 @@ def create_test_users():
         
         for user_data in test_users:
             # Check if user exists
-            existing = user_crud.get_by_username(db, username=user_data["username"])
+            existing = await user_crud.get_by_username(db, username=user_data["username"])
             if existing:
                 print(f"  User {user_data['username']} already exists, skipping...")
                 skipped += 1
@@ -56,7 +55,7 @@ def create_test_users():
             
             # Create user
             user_in = UserCreate(**user_data)
-            user = user_crud.create(db, obj_in=user_in)
+            user = await user_crud.create(db, obj_in=user_in)
             print(f" Created user: {user.username} ({user.email})")
             created += 1
         
@@ -64,12 +63,13 @@ def create_test_users():
         
     except Exception as e:
         print(f" Error: {str(e)}")
-        db.rollback()
+        await db.rollback()
     finally:
-        db.close()
+        await db.close()
+        await engine.dispose()
 
 
 if __name__ == "__main__":
     print(" Creating test users...\n")
-    create_test_users()
+    asyncio.run(create_test_users())
     print("\n Done!")
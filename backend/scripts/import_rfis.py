@@ -0,0 +1,59 @@
+"""
+Bulk RFI import from an Excel/CSV register
+Usage: python -m scripts.import_rfis <file.xlsx|file.csv> [--batch-size N]
+"""
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.services import rfi_import
+
+
+async def import_file(path: str, batch_size: int) -> int:
+    """Import one register file and print the report"""
+    engine = create_async_engine(settings.ASYNC_DATABASE_URL)
+    db = async_sessionmaker(engine, class_=AsyncSession)()
+
+    try:
+        with open(path, "rb") as file:
+            rows = rfi_import.iter_rows(file, path)
+            result = await rfi_import.import_rfis(db, rows, batch_size=batch_size)
+    except ValueError as e:
+        print(f" Error: {e}")
+        return 1
+    except Exception as e:
+        print(f" Error: {str(e)}")
+        await db.rollback()
+        return 1
+    finally:
+        await db.close()
+        await engine.dispose()
+
+    for error in result.errors:
+        print(f"  Row {error.row} ({error.RFI_no or '-'}): {'; '.join(error.errors)}")
+
+    print(
+        f"\n Summary: {result.imported} imported, {result.failed} failed "
+        f"of {result.total_rows} rows in {result.duration_seconds}s "
+        f"({result.rows_per_second} rows/s)"
+    )
+    return 0 if result.failed == 0 else 2
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import RFIs from .xlsx or .csv")
+    parser.add_argument("path")
+    parser.add_argument(
+        "--batch-size", type=int, default=rfi_import.DEFAULT_BATCH_SIZE
+    )
+    args = parser.parse_args()
+
+    print(f" Importing RFIs from {args.path}...\n")
+    sys.exit(asyncio.run(import_file(args.path, args.batch_size)))
+
+
+if __name__ == "__main__":
+    main()
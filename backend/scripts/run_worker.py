@@ -0,0 +1,57 @@
+"""
+Background job worker
+Usage: python -m scripts.run_worker [--types rfi.export rfi.import] [--slots N]
+
+Run one or more worker processes next to the API. Each claims jobs from
+the configured job store (JOBS_BACKEND), within the per-type limits of
+JOB_CONCURRENCY, and stops gracefully on SIGINT/SIGTERM after its running
+jobs finish.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+
+from app.core.config import settings
+from app.core.jobs import Worker, job_store
+from app.services.rfi_jobs import HANDLERS, form_renderer
+
+
+async def run(job_types, slots: int) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker = Worker(
+        job_store,
+        {job_type: HANDLERS[job_type] for job_type in job_types},
+        limits=settings.JOB_CONCURRENCY,
+        default_limit=settings.JOB_DEFAULT_CONCURRENCY,
+        slots=slots,
+        lease=settings.JOB_LEASE_SECONDS,
+        poll_interval=settings.JOB_POLL_INTERVAL,
+    )
+    print(f" Worker started for {', '.join(job_types)} ({slots} slots)")
+    try:
+        await worker.run(stop)
+    finally:
+        form_renderer.close()
+        await job_store.close()
+    print(" Worker stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument(
+        "--types", nargs="+", choices=sorted(HANDLERS), default=sorted(HANDLERS)
+    )
+    parser.add_argument("--slots", type=int, default=settings.JOB_WORKER_SLOTS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(run(args.types, args.slots))
+
+
+if __name__ == "__main__":
+    main()
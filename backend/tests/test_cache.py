@@ -0,0 +1,116 @@
+"""
+Tests for the response cache (in-process backend)
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.core.cache import MemoryCacheBackend, ResponseCache
+
+
+def make_cache() -> ResponseCache:
+    return ResponseCache(MemoryCacheBackend(), prefix="test", default_ttl=60)
+
+
+def test_get_or_set_counts_hits_and_misses():
+    """Second read is served from the cache"""
+    cache = make_cache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return {"total": 3}
+
+    async def scenario():
+        version = await cache.version("all")
+        key = cache.key("statistics", None, scope="all", version=version)
+        first = await cache.get_or_set_async("statistics", key, loader)
+        return first, await cache.get_or_set_async("statistics", key, loader)
+
+    assert asyncio.run(scenario()) == ({"total": 3}, {"total": 3})
+    assert len(calls) == 1
+
+    stats = cache.stats()["namespaces"]["statistics"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_none_is_cached():
+    """Negative lookups are cached too"""
+    cache = make_cache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return None
+
+    async def scenario():
+        key = cache.key("rfi_no", "RFI-001")
+        first = await cache.get_or_set_async("rfi_no", key, loader)
+        return first, await cache.get_or_set_async("rfi_no", key, loader)
+
+    assert asyncio.run(scenario()) == (None, None)
+    assert len(calls) == 1
+
+
+def test_bump_invalidates_only_its_scope():
+    """Bumping a project scope leaves other projects cached"""
+    cache = make_cache()
+
+    async def keys():
+        return [
+            cache.key("statistics", None, scope=scope, version=await cache.version(scope))
+            for scope in ("project:1", "project:2")
+        ]
+
+    async def scenario():
+        before = await keys()
+        await cache.bump("project:1")
+        return before, await keys()
+
+    (key_1, key_2), (new_key_1, new_key_2) = asyncio.run(scenario())
+    assert new_key_1 != key_1
+    assert new_key_2 == key_2
+
+
+def test_memory_backend_expires_entries():
+    """Entries with an elapsed TTL are dropped"""
+    backend = MemoryCacheBackend()
+
+    async def scenario():
+        await backend.set("k", "v", ttl=-1)
+        return await backend.get("k")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_change_counter_follows_bumps():
+    """The ETag counter changes with every bump of its scope"""
+    cache = make_cache()
+
+    async def scenario():
+        first = await cache.change_counter("project:1")
+        again = await cache.change_counter("project:1")
+        await cache.bump("project:1")
+        return first, again, await cache.change_counter("project:1"), await cache.version("project:1")
+
+    first, again, bumped, version = asyncio.run(scenario())
+    assert again == first
+    assert bumped == version == first + 1
+
+
+def test_change_counter_does_not_restart_after_eviction():
+    """A lost counter restarts above any value it had before"""
+    cache = make_cache()
+
+    async def scenario():
+        await cache.bump("all")
+        await cache.bump("all")
+        await cache.backend.clear()
+        return await cache.change_counter("all")
+
+    assert asyncio.run(scenario()) > 2
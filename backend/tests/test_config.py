@@ -0,0 +1,26 @@
+"""
+Tests for derived settings
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.core.config import Settings
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("postgresql://u@db/idms", "postgresql+asyncpg://u@db/idms"),
+    ("postgresql+psycopg2://u@db/idms", "postgresql+asyncpg://u@db/idms"),
+    ("postgresql+psycopg://u@db/idms", "postgresql+psycopg://u@db/idms"),
+    ("sqlite:///idms.db", "sqlite+aiosqlite:///idms.db"),
+    ("sqlite+pysqlite:///idms.db", "sqlite+aiosqlite:///idms.db"),
+    ("sqlite+aiosqlite:///idms.db", "sqlite+aiosqlite:///idms.db"),
+])
+def test_async_database_url_picks_the_dialects_async_driver(url, expected):
+    settings = Settings(DATABASE_URL=url, ASYNC_DATABASE_DRIVER="asyncpg")
+    assert settings.ASYNC_DATABASE_URL == expected
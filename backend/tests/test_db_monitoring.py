@@ -0,0 +1,88 @@
+"""
+Tests for connection pool metrics and slow-query logging
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.db.monitoring import PoolMetrics, SlowQueryLogger
+
+
+def make_engine(tmp_path):
+    return create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+
+
+def test_pool_metrics_track_checkouts_and_timeouts(tmp_path):
+    """Checked-out connections and checkout timeouts are reported"""
+    engine = make_engine(tmp_path)
+    metrics = PoolMetrics(engine)
+
+    held = engine.connect()
+    assert metrics.stats()["checked_out"] == 1
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    held.close()
+
+    stats = metrics.stats()
+    assert stats["checked_out"] == 0
+    assert stats["checkout_timeouts"] == 1
+    assert stats["checkout_wait_seconds"]["count"] == 2
+    engine.dispose()
+
+
+def test_slow_query_logger_threshold(tmp_path, caplog):
+    """Only statements above the threshold are counted and logged"""
+    engine = make_engine(tmp_path)
+    slow = SlowQueryLogger(engine, threshold_ms=0)
+    fast = SlowQueryLogger(engine, threshold_ms=60000)
+
+    with caplog.at_level("WARNING", logger="app.db.monitoring"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    assert slow.slow_queries == 1
+    assert fast.slow_queries == 0
+    assert "SELECT 1" in caplog.text
+    engine.dispose()
+
+
+def test_slow_query_loggers_keep_their_own_start_times(tmp_path):
+    """A second logger on the engine does not consume the first one's timing"""
+    engine = make_engine(tmp_path)
+    loggers = [SlowQueryLogger(engine, threshold_ms=60000) for _ in range(2)]
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert all(conn.info[logger] == [] for logger in loggers)
+
+    assert [logger.slow_queries for logger in loggers] == [0, 0]
+    engine.dispose()
+
+
+def test_failed_statement_drops_its_start_time(tmp_path):
+    """A statement that raises leaves no start time behind for the next one"""
+    engine = make_engine(tmp_path)
+    logger = SlowQueryLogger(engine, threshold_ms=60000)
+
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        assert conn.info[logger] == []
+        conn.execute(text("SELECT 1"))
+        assert conn.info[logger] == []
+    engine.dispose()
@@ -0,0 +1,74 @@
+"""
+Tests for ETag / If-None-Match helpers
+"""
+import sys
+from pathlib import Path
+
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.core.etag import etag_matches, not_modified, set_etag, variant, weak_etag
+
+state = {"version": 1}
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/item")
+    def item(request: Request, response: Response):
+        etag = weak_etag("item", state["version"])
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+        return {"version": state["version"]}
+
+    return TestClient(app)
+
+
+def test_weak_etag_format():
+    assert weak_etag("rfi", 7, 3) == 'W/"rfi-7-3"'
+
+
+def test_variant_separates_representations():
+    """Each page and fieldset gets its own quote-free tag part"""
+    first = variant("cursor", 0, 100, None, ["id_RFI", "tag_no"])
+    assert first == variant("cursor", 0, 100, None, ["id_RFI", "tag_no"])
+    assert first != variant("cursor", 0, 100, 'x"y', ["id_RFI", "tag_no"])
+    assert first != variant("cursor", 0, 50, None, ["id_RFI", "tag_no"])
+    assert first.isalnum()
+
+
+def test_matching_etag_returns_304():
+    """An unchanged resource is answered with an empty 304"""
+    client = make_client()
+    first = client.get("/item")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    second = client.get("/item", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+
+def test_weak_comparison_and_lists():
+    """Strong/weak forms and any tag in a list match; * matches anything"""
+    client = make_client()
+    etag = client.get("/item").headers["etag"]
+    strong = etag[2:]
+    assert client.get("/item", headers={"If-None-Match": f'"x", {strong}'}).status_code == 304
+    assert client.get("/item", headers={"If-None-Match": "*"}).status_code == 304
+
+
+def test_changed_resource_returns_200():
+    client = make_client()
+    etag = client.get("/item").headers["etag"]
+    state["version"] += 1
+    response = client.get("/item", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -0,0 +1,119 @@
+"""
+Tests for the in-process event broker and the SSE stream
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.core.events import Event, InProcessBroker, RedisBroker, sse_stream
+
+
+async def read_frames(stream, count: int) -> list:
+    frames = []
+    async for frame in stream:
+        frames.append(frame.decode())
+        if len(frames) == count:
+            break
+    await stream.aclose()
+    return frames
+
+
+def test_event_wire_format():
+    frame = Event(id=7, type="rfi.approved", data={"id_RFI": 3}).encode()
+    assert frame == b'id: 7\nevent: rfi.approved\ndata: {"id_RFI": 3}\n\n'
+    assert not Event(id=0, type="resync", data={}).encode().startswith(b"id:")
+
+
+class FakeScript:
+    """Stands in for the publish script: counts ids and records its arguments"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, keys, args):
+        self.calls.append((keys, args))
+        return len(self.calls)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.script = FakeScript()
+
+    def register_script(self, source):
+        return self.script
+
+
+def test_redis_publish_allocates_the_id_in_the_script():
+    """One script call per event; the JSON it stores is the event with its id"""
+    broker = RedisBroker("redis://unused", prefix="qc", replay_size=50)
+    broker._client = FakeRedis()
+
+    async def scenario():
+        return [await broker.publish("rfi.created", {"id_RFI": n}) for n in (1, 2)]
+
+    events = asyncio.run(scenario())
+    assert [event.id for event in events] == [1, 2]
+    (keys, (body, size)), _ = broker._client.script.calls
+    assert keys == ["qc:events:id", "qc:events:replay", "qc:events"]
+    assert size == 50
+    # what the script stores and publishes: the id spliced in front of the body
+    assert '{"id": 1, ' + body[1:] == events[0].to_json()
+
+
+def test_live_events_are_filtered_by_project():
+    """Subscribers only get events matching their filters"""
+    async def scenario():
+        broker = InProcessBroker()
+        stream = sse_stream(broker, {"id_pre": 1}, None, heartbeat=5)
+        reader = asyncio.create_task(read_frames(stream, 2))
+        await asyncio.sleep(0)
+        await broker.publish("rfi.created", {"id_RFI": 1, "id_pre": 2})
+        await broker.publish("rfi.created", {"id_RFI": 2, "id_pre": 1})
+        frames = await reader
+        assert broker.stats()["subscribers"] == 0
+        return frames
+
+    retry, event = asyncio.run(scenario())
+    assert retry == "retry: 5000\n\n"
+    assert event.startswith("id: 2\n") and '"id_RFI": 2' in event
+
+
+def test_last_event_id_replays_missed_events():
+    async def scenario():
+        broker = InProcessBroker()
+        for i in range(1, 5):
+            await broker.publish("rfi.updated", {"id_RFI": i})
+        return await read_frames(sse_stream(broker, {}, 2, heartbeat=5), 3)
+
+    _, third, fourth = asyncio.run(scenario())
+    assert third.startswith("id: 3\n")
+    assert fourth.startswith("id: 4\n")
+
+
+def test_gap_beyond_replay_buffer_sends_resync():
+    async def scenario():
+        broker = InProcessBroker(replay_size=2)
+        for i in range(1, 6):
+            await broker.publish("rfi.updated", {"id_RFI": i})
+        assert [event.id for event in await broker.replay(3)] == [4, 5]
+        return await read_frames(sse_stream(broker, {}, 1, heartbeat=5), 2)
+
+    _, resync = asyncio.run(scenario())
+    assert resync.startswith("event: resync\n")
+
+
+def test_heartbeat_and_slow_subscriber_is_closed():
+    async def scenario():
+        broker = InProcessBroker(queue_size=2)
+        frames = await read_frames(sse_stream(broker, {}, None, heartbeat=0.01), 2)
+        assert frames[1] == ": ping\n\n"
+
+        subscription = broker.subscribe({})
+        for i in range(3):
+            await broker.publish("rfi.created", {"id_RFI": i})
+        assert subscription.closed
+    asyncio.run(scenario())
@@ -0,0 +1,170 @@
+"""
+Tests for the background job store (SQLite) and worker
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.core.jobs import (
+    CANCELLED,
+    FAILED,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    WORKER_LOST,
+    Job,
+    RedisJobStore,
+    SQLiteJobStore,
+    Worker,
+)
+
+
+def make_store(ttl: int = 3600) -> SQLiteJobStore:
+    return SQLiteJobStore(":memory:", result_ttl=ttl)
+
+
+def test_claim_respects_type_limit_and_order():
+    """At most limit jobs of a type run at once, oldest first"""
+    async def scenario():
+        store = make_store()
+        first = await store.submit("export", {"n": 1}, owner="7")
+        second = await store.submit("export", {"n": 2})
+        await store.submit("import", {})
+
+        claimed = await store.claim("export", limit=1, lease=60)
+        blocked = await store.claim("export", limit=1, lease=60)
+        other = await store.claim("import", limit=1, lease=60)
+        await store.finish(claimed, SUCCEEDED, result={"rows": 3})
+        after = await store.claim("export", limit=1, lease=60)
+        return first, second, claimed, blocked, other, after, await store.get(first.id)
+
+    first, second, claimed, blocked, other, after, done = asyncio.run(scenario())
+    assert claimed.id == first.id and claimed.status == RUNNING
+    assert blocked is None
+    assert other is not None
+    assert after.id == second.id
+    assert (done.status, done.result, done.owner) == (SUCCEEDED, {"rows": 3}, "7")
+
+
+def test_cancel_queued_and_running_jobs():
+    async def scenario():
+        store = make_store()
+        queued = await store.submit("export", {})
+        running = await store.submit("export", {})
+        await store.cancel(queued.id)
+        claimed = await store.claim("export", limit=5, lease=60)
+        flagged = await store.cancel(running.id)
+        requested = await store.heartbeat([claimed], lease=60)
+        return await store.get(queued.id), claimed, flagged, requested
+
+    queued, claimed, flagged, requested = asyncio.run(scenario())
+    assert queued.status == CANCELLED
+    assert claimed.id == flagged.id
+    assert flagged.status == RUNNING and flagged.cancel_requested
+    assert requested == {claimed.id}
+
+
+def test_expired_lease_fails_job_and_frees_slot():
+    """A job whose worker stopped renewing its lease is failed"""
+    async def scenario():
+        store = make_store()
+        lost = await store.submit("import", {})
+        waiting = await store.submit("import", {})
+        await store.claim("import", limit=1, lease=0)
+        await asyncio.sleep(0.01)
+        claimed = await store.claim("import", limit=1, lease=60)
+        return await store.get(lost.id), claimed, waiting
+
+    lost, claimed, waiting = asyncio.run(scenario())
+    assert (lost.status, lost.error) == (FAILED, WORKER_LOST)
+    assert claimed.id == waiting.id
+
+
+def test_finished_jobs_expire():
+    async def scenario():
+        store = make_store(ttl=0)
+        job = await store.submit("export", {})
+        await store.finish(await store.claim("export", limit=1, lease=60), SUCCEEDED)
+        return await store.get(job.id)
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_worker_runs_handlers_and_reports_outcomes(tmp_path):
+    """Results, failures, progress and cancellation through the worker"""
+    async def scenario():
+        store = make_store()
+        block = asyncio.Event()
+        running = asyncio.Event()
+
+        async def export(params, context):
+            await context.progress(0.5, "half")
+            context.path(".csv").write_text("a,b")
+            return {"rows": params["rows"]}
+
+        async def broken(params, context):
+            raise ValueError("bad register")
+
+        async def slow(params, context):
+            running.set()
+            await block.wait()
+
+        worker = Worker(
+            store,
+            {"export": export, "import": broken, "slow": slow},
+            slots=3,
+            lease=0.06,
+            poll_interval=0.01,
+            data_dir=str(tmp_path),
+        )
+        ok = await store.submit("export", {"rows": 4})
+        bad = await store.submit("import", {})
+        cancelled = await store.submit("slow", {})
+
+        stop = asyncio.Event()
+        runner = asyncio.create_task(worker.run(stop))
+        await asyncio.wait_for(running.wait(), 2)
+        await store.cancel(cancelled.id)
+        deadline = time.monotonic() + 2
+        while (await store.get(cancelled.id)).status == RUNNING and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        stop.set()
+        await asyncio.wait_for(runner, 2)
+        return [await store.get(job.id) for job in (ok, bad, cancelled)]
+
+    ok, bad, cancelled = asyncio.run(scenario())
+    assert (ok.status, ok.result, ok.progress, ok.message) == (SUCCEEDED, {"rows": 4}, 1.0, "half")
+    assert (tmp_path / f"{ok.id}.csv").read_text() == "a,b"
+    assert (bad.status, bad.error) == (FAILED, "bad register")
+    assert cancelled.status == CANCELLED
+
+
+def test_stopped_worker_leaves_queued_jobs():
+    async def scenario():
+        store = make_store()
+        job = await store.submit("export", {})
+        stop = asyncio.Event()
+        stop.set()
+        await Worker(store, {"export": None}, poll_interval=0.01).run(stop)
+        return await store.get(job.id)
+
+    assert asyncio.run(scenario()).status == QUEUED
+
+
+def test_redis_hash_round_trip():
+    """Jobs survive the Redis hash encoding, including script-written fields"""
+    job = Job(id="j1", type="rfi.export", params={"format": "csv"}, owner="5", created_at=1.5)
+    fields = RedisJobStore._to_hash(job)
+    assert RedisJobStore._from_hash(fields) == job
+
+    # As left by the claim and finish scripts
+    fields.update(status=SUCCEEDED, started_at="2.5", finished_at="3.25", progress="1.0",
+                  result='{"rows": 2}', error="null", cancel_requested="1")
+    done = RedisJobStore._from_hash(fields)
+    assert (done.started_at, done.finished_at, done.progress) == (2.5, 3.25, 1.0)
+    assert done.result == {"rows": 2} and done.error is None and done.cancel_requested
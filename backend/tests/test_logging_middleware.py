@@ -0,0 +1,68 @@
+"""
+Tests for the structured access log middleware
+"""
+import io
+import json
+import sys
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.core.access_log import setup_access_log, shutdown_access_log
+from app.middleware.logging_middleware import LoggingMiddleware
+
+
+def make_app(**options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware, **options)
+
+    @app.get("/rfis/{id_rfi}")
+    async def read_rfi(id_rfi: int, request: Request):
+        request.state.user_id = 7
+        return {"id_RFI": id_rfi}
+
+    return app
+
+
+def collect(app: FastAPI, *paths, headers=None):
+    stream = io.StringIO()
+    setup_access_log(stream=stream)
+    try:
+        client = TestClient(app)
+        responses = [client.get(path, headers=headers) for path in paths]
+    finally:
+        shutdown_access_log()
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    return responses, records
+
+
+def test_access_record_fields():
+    """One JSON record with route template, user id and request id"""
+    responses, records = collect(
+        make_app(), "/rfis/42", headers={"X-Request-ID": "abc123"}
+    )
+
+    assert responses[0].headers["x-request-id"] == "abc123"
+    assert len(records) == 1
+    record = records[0]
+    assert record["route"] == "/rfis/{id_rfi}"
+    assert record["path"] == "/rfis/42"
+    assert record["status"] == 200
+    assert record["user_id"] == 7
+    assert record["request_id"] == "abc123"
+    assert record["bytes"] == len(responses[0].content)
+
+
+def test_success_sampling_keeps_errors():
+    """2xx responses are sampled out, errors are always logged"""
+    _, records = collect(
+        make_app(success_sample_rate=0.0), "/rfis/1", "/missing"
+    )
+
+    assert [record["status"] for record in records] == [404]
+    assert records[0]["route"] is None
@@ -0,0 +1,69 @@
+"""
+Tests for the Prometheus metrics middleware
+"""
+import sys
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.core.metrics import metrics_endpoint
+from app.db.monitoring import current_query_stats
+from app.middleware.metrics_middleware import MetricsMiddleware
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.add_route("/metrics", metrics_endpoint)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        stats = current_query_stats.get()
+        stats.count += 2
+        return {"id": item_id}
+
+    return TestClient(app)
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_are_labelled_by_route_template():
+    """Raw paths collapse onto the route template"""
+    labels = {"method": "GET", "route": "/items/{item_id}"}
+    before = sample("http_requests_total", status="200", **labels)
+    queries_before = sample("http_request_db_queries_sum", **labels)
+
+    client = make_client()
+    client.get("/items/1")
+    client.get("/items/2")
+
+    assert sample("http_requests_total", status="200", **labels) == before + 2
+    assert sample("http_request_db_queries_sum", **labels) == queries_before + 4
+    assert sample("http_requests_in_progress", **labels) == 0
+
+
+def test_unmatched_paths_share_one_label():
+    """Unknown paths do not create new label values"""
+    labels = {"method": "GET", "route": "<unmatched>", "status": "404"}
+    before = sample("http_requests_total", **labels)
+
+    client = make_client()
+    client.get("/nope/1")
+    client.get("/nope/2")
+
+    assert sample("http_requests_total", **labels) == before + 2
+
+
+def test_metrics_endpoint_exposes_text_format():
+    """/metrics serves the Prometheus exposition format"""
+    response = make_client().get("/metrics")
+    assert response.status_code == 200
+    assert "http_request_duration_seconds" in response.text
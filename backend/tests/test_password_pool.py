@@ -0,0 +1,61 @@
+"""
+Tests for the bounded password hashing pool
+"""
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add backend root and repository root to path
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
+sys.path.insert(0, str(backend_root.parent))
+
+from app.core.security import PasswordHashPool, PasswordHasherBusy, password_hasher_busy_handler
+
+
+def test_pool_rejects_when_saturated():
+    """Calls beyond max_pending fail fast instead of queueing"""
+    pool = PasswordHashPool(max_workers=1, max_pending=1)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(PasswordHasherBusy):
+            await pool.run(lambda: None)
+        release.set()
+        await first
+
+    asyncio.run(scenario())
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 1
+    assert stats["in_flight"] == 0
+    pool.shutdown()
+
+
+def test_pool_returns_result():
+    """Results of the worker call are returned to the caller"""
+    pool = PasswordHashPool(max_workers=2, max_pending=4)
+    assert asyncio.run(pool.run(pow, 2, 10)) == 1024
+    pool.shutdown()
+
+
+def test_busy_pool_answers_503_from_any_endpoint():
+    """The app-level handler maps PasswordHasherBusy to a retryable 503"""
+    app = FastAPI()
+    app.add_exception_handler(PasswordHasherBusy, password_hasher_busy_handler)
+
+    @app.post("/users")
+    async def create_user():
+        raise PasswordHasherBusy("Password hashing pool is saturated")
+
+    response = TestClient(app).post("/users")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json() == {"detail": "Authentication service is busy, please retry"}
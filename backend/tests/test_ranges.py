@@ -0,0 +1,122 @@
+"""
+Tests for Range parsing and the range-aware file response
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.core.ranges import (
+    PATHSEND,
+    ZEROCOPY,
+    RangeFileResponse,
+    RangeNotSatisfiable,
+    content_disposition,
+    parse_range,
+    range_headers,
+)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-100", (900, 999)),
+        ("bytes=-5000", (0, 999)),
+        ("bytes=990-5000", (990, 999)),
+        ("bytes=5-1", None),
+        ("bytes=0-1,5-9", None),
+        ("items=0-9", None),
+        ("bytes=a-9", None),
+        ("bytes=-", None),
+    ],
+)
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=2000-3000", "bytes=-0"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, 1000)
+
+
+def test_range_headers():
+    assert range_headers(None, 10) == (200, {"Accept-Ranges": "bytes", "Content-Length": "10"})
+    status_code, headers = range_headers((2, 5), 10)
+    assert status_code == 206
+    assert headers["Content-Range"] == "bytes 2-5/10"
+    assert headers["Content-Length"] == "4"
+
+
+def test_content_disposition_encodes_non_ascii():
+    assert content_disposition("a.pdf", "inline") == 'inline; filename="a.pdf"'
+    assert content_disposition("گزارش.pdf").startswith("attachment; filename*=utf-8''%DA")
+
+
+def run_response(response, extensions=None, method="GET") -> list:
+    scope = {"type": "http", "method": method, "extensions": extensions or {}}
+    messages = []
+
+    async def send(message):
+        if message["type"] == ZEROCOPY:
+            file = message["file"]
+            file.seek(message["offset"])
+            message = dict(message, data=file.read(message["count"]))
+        messages.append(message)
+
+    asyncio.run(response(scope, None, send))
+    return messages
+
+
+@pytest.fixture
+def blob(tmp_path):
+    path = tmp_path / "blob"
+    path.write_bytes(bytes(range(256)) * 2048)
+    return path
+
+
+def test_partial_body_is_read_in_chunks(blob):
+    response = RangeFileResponse(blob, size=blob.stat().st_size, byte_range=(10, 300_009))
+    response.chunk_size = 100_000
+    start, *bodies = run_response(response)
+
+    assert start["status"] == 206
+    assert (b"content-range", b"bytes 10-300009/524288") in start["headers"]
+    assert [len(message["body"]) for message in bodies] == [100_000] * 3
+    assert [message["more_body"] for message in bodies] == [True, True, False]
+    assert b"".join(message["body"] for message in bodies) == blob.read_bytes()[10:300_010]
+
+
+def test_zerocopy_extension_sends_file_slice(blob):
+    response = RangeFileResponse(blob, size=blob.stat().st_size, byte_range=(1000, 1999))
+    _, body = run_response(response, extensions={ZEROCOPY: {}})
+
+    assert body["type"] == ZEROCOPY
+    assert (body["offset"], body["count"]) == (1000, 1000)
+    assert body["data"] == blob.read_bytes()[1000:2000]
+    assert body["file"].closed
+
+
+def test_pathsend_only_for_whole_file(blob):
+    size = blob.stat().st_size
+    _, body = run_response(RangeFileResponse(blob, size=size), extensions={PATHSEND: {}})
+    assert body == {"type": PATHSEND, "path": str(blob)}
+
+    messages = run_response(
+        RangeFileResponse(blob, size=size, byte_range=(0, 9)), extensions={PATHSEND: {}}
+    )
+    assert messages[-1]["type"] == "http.response.body"
+
+
+def test_head_sends_no_body(blob):
+    start, body = run_response(RangeFileResponse(blob, size=blob.stat().st_size), method="HEAD")
+    assert start["status"] == 200
+    assert body == {"type": "http.response.body", "body": b"", "more_body": False}
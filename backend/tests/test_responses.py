@@ -0,0 +1,78 @@
+"""
+Tests for the fast JSON response classes
+"""
+import datetime
+import enum
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, TypeAdapter
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.core.responses import PydanticJSONResponse
+
+
+class Status(str, enum.Enum):
+    PENDING = "Pending"
+
+
+class Item(BaseModel):
+    id: int
+    day: datetime.date
+    at: datetime.datetime
+    status: Status
+    note: Optional[str] = None
+
+
+ITEMS = [
+    Item(
+        id=1,
+        day=datetime.date(2024, 3, 1),
+        at=datetime.datetime(2024, 3, 1, 8, 30, tzinfo=datetime.timezone.utc),
+        status=Status.PENDING,
+        note="بازرسی",
+    )
+]
+
+
+def get_json(response_class):
+    app = FastAPI(default_response_class=response_class)
+
+    @app.get("/items", response_model=List[Item])
+    def items():
+        return ITEMS
+
+    @app.get("/raw")
+    def raw():
+        return {"day": datetime.date(2024, 3, 1), "status": Status.PENDING}
+
+    client = TestClient(app)
+    return client.get("/items").json(), client.get("/raw").json()
+
+
+def test_orjson_default_matches_json_response():
+    """Dates, datetimes and enums serialize exactly as with JSONResponse"""
+    assert get_json(ORJSONResponse) == get_json(JSONResponse)
+
+
+def test_pydantic_response_matches_response_model():
+    """TypeAdapter.dump_json produces the response_model output"""
+    adapter = TypeAdapter(List[Item])
+    response = PydanticJSONResponse(ITEMS, adapter=adapter)
+    expected_items, _ = get_json(JSONResponse)
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == expected_items
+
+
+def test_pydantic_response_single_model():
+    """A model is dumped with its own serializer"""
+    response = PydanticJSONResponse(ITEMS[0])
+    assert json.loads(response.body)["status"] == "Pending"
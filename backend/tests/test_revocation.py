@@ -0,0 +1,171 @@
+"""
+Tests for token revocation (Bloom filter fast path, logout, sign out everywhere)
+"""
+import asyncio
+import json
+import sys
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add backend root (and the repository root for backend.app) to path
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
+sys.path.insert(0, str(backend_root.parent))
+
+from app.core.revocation import BloomFilter, RedisTokenRevocationList, TokenRevocationList
+from app.core.security import create_access_token, create_refresh_token, decode_token
+
+
+def claims(user_id: int = 1, epoch: int = 0, ttl: float = 600) -> dict:
+    return {"sub": str(user_id), "ep": epoch, "jti": uuid.uuid4().hex, "exp": time.time() + ttl}
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    items = [uuid.uuid4().hex for _ in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10000))
+    assert false_positives < 300  # ~1% expected
+
+
+def test_logout_revokes_only_that_token():
+    async def scenario():
+        revocations = TokenRevocationList(capacity=100)
+        revoked, other = claims(), claims()
+        assert await revocations.revoke(revoked)
+        return (
+            await revocations.is_revoked(revoked),
+            await revocations.is_revoked(other),
+            await revocations.revoke({"sub": "1"}),
+        )
+
+    assert asyncio.run(scenario()) == (True, False, False)
+
+
+def test_filter_negatives_skip_the_exact_check():
+    async def scenario():
+        revocations = TokenRevocationList(capacity=100)
+        await revocations.revoke(claims())
+        lookups = []
+        listed = revocations._is_listed
+
+        async def counting(jti):
+            lookups.append(jti)
+            return await listed(jti)
+
+        revocations._is_listed = counting
+        for _ in range(50):
+            await revocations.is_revoked(claims())
+        return lookups, revocations.stats()
+
+    lookups, stats = asyncio.run(scenario())
+    assert len(lookups) == stats["filter_hits"] == stats["false_positives"]
+    assert len(lookups) <= 1
+    assert stats["checks"] == 50
+
+
+def test_revoke_all_rejects_tokens_of_older_epochs():
+    async def scenario():
+        revocations = TokenRevocationList()
+        old = claims(user_id=7)
+        legacy = {"sub": "7", "exp": time.time() + 600}  # issued before jti/ep claims
+        epoch = await revocations.revoke_all(7)
+        new = claims(user_id=7, epoch=await revocations.epoch(7))
+        return (
+            epoch,
+            await revocations.is_revoked(old),
+            await revocations.is_revoked(legacy),
+            await revocations.is_revoked(new),
+            await revocations.is_revoked(claims(user_id=8)),
+        )
+
+    assert asyncio.run(scenario()) == (1, True, True, False, False)
+
+
+def test_rebuild_drops_expired_revocations():
+    async def scenario():
+        revocations = TokenRevocationList(capacity=10)
+        for _ in range(10):
+            await revocations.revoke(claims(ttl=-1))
+        live = claims()
+        await revocations.revoke(live)  # 11th entry: the filter is rebuilt
+        return live, revocations
+
+    live, revocations = asyncio.run(scenario())
+    assert revocations.stats()["filter_items"] == 1
+    assert asyncio.run(revocations.is_revoked(live))
+
+
+def test_published_changes_update_other_workers():
+    """A worker applies revocations published by another worker without Redis reads"""
+    worker = RedisTokenRevocationList("redis://unused", prefix="test", capacity=100)
+    worker.loaded = True  # as after its startup load
+    token = claims(user_id=3)
+    worker._apply(json.dumps({"jti": token["jti"]}))
+    worker._apply(json.dumps({"user": 3, "epoch": 2}))
+    worker._apply(json.dumps({"user": 3, "epoch": 1}))  # late, older message
+    assert token["jti"] in worker._filter
+    assert worker._epochs == {3: 2}
+    assert asyncio.run(worker.is_revoked(claims(user_id=3, epoch=1)))
+
+
+class FakePipeline:
+    """Replies to HGET/ZSCORE from dicts, like a pipeline on a live Redis"""
+
+    def __init__(self, epochs, revoked):
+        self.epochs, self.revoked, self.replies = epochs, revoked, []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def hget(self, key, field):
+        self.replies.append(self.epochs.get(field))
+
+    def zscore(self, key, member):
+        self.replies.append(self.revoked.get(member))
+
+    async def execute(self):
+        return self.replies
+
+
+def test_unloaded_worker_checks_redis_exactly():
+    """Before its first load a worker asks Redis instead of its empty filter"""
+    revoked, stale, live = claims(user_id=3), claims(user_id=4), claims(user_id=3)
+    worker = RedisTokenRevocationList("redis://unused", prefix="test", capacity=100)
+    worker._client = SimpleNamespace(
+        pipeline=lambda transaction: FakePipeline({"4": "1"}, {revoked["jti"]: revoked["exp"]})
+    )
+
+    async def scenario():
+        return [await worker.is_revoked(token) for token in (revoked, stale, live)]
+
+    assert asyncio.run(scenario()) == [True, True, False]
+    assert worker.stats()["loaded"] is False
+
+
+def test_unloaded_worker_fails_closed_without_redis():
+    worker = RedisTokenRevocationList("redis://127.0.0.1:1", prefix="test", capacity=100)
+
+    async def scenario():
+        try:
+            return await worker.is_revoked(claims(user_id=1))
+        finally:
+            await worker.stop()
+
+    assert asyncio.run(scenario())
+
+
+def test_tokens_carry_unique_jti():
+    data = {"sub": "1", "ep": 4}
+    tokens = [create_access_token(data), create_access_token(data), create_refresh_token(data)]
+    payloads = [decode_token(token) for token in tokens]
+    assert len({payload["jti"] for payload in payloads}) == 3
+    assert all(payload["ep"] == 4 for payload in payloads)
+    assert data == {"sub": "1", "ep": 4}
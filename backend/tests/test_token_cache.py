@@ -0,0 +1,75 @@
+"""
+Tests for the verified-JWT decode cache
+"""
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+# Add backend root (and the repository root for backend.app) to path
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
+sys.path.insert(0, str(backend_root.parent))
+
+from app.core.security import (
+    JWTHandler,
+    TokenDecodeCache,
+    create_access_token,
+    decode_token,
+    token_decode_cache,
+)
+
+
+class CountingVerifier:
+    def __init__(self, claims):
+        self.claims = claims
+        self.calls = 0
+
+    def __call__(self, token):
+        self.calls += 1
+        return None if self.claims is None else dict(self.claims)
+
+
+def test_verified_claims_are_cached_until_exp():
+    cache = TokenDecodeCache(maxsize=10)
+    verify = CountingVerifier({"sub": "1", "exp": time.time() + 600})
+    first = cache.decode("token", verify)
+    first["sub"] = "tampered"  # callers get copies
+    second = cache.decode("token", verify)
+    assert verify.calls == 1
+    assert second["sub"] == "1"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+
+def test_invalid_and_expired_tokens_are_not_cached():
+    cache = TokenDecodeCache(maxsize=10)
+    invalid = CountingVerifier(None)
+    expired = CountingVerifier({"sub": "1", "exp": time.time() - 1})
+    no_exp = CountingVerifier({"sub": "1"})
+    for verify in (invalid, expired, no_exp):
+        cache.decode("token", verify)
+        cache.decode("token", verify)
+        assert verify.calls == 2
+    assert cache.stats()["size"] == 0
+
+
+def test_lru_eviction():
+    cache = TokenDecodeCache(maxsize=2)
+    verify = CountingVerifier({"sub": "1", "exp": time.time() + 600})
+    for token in ("a", "b", "a", "c"):
+        cache.decode(token, verify)
+    cache.decode("a", verify)
+    cache.decode("b", verify)  # evicted by "c"
+    assert verify.calls == 4
+
+
+def test_tampered_token_is_rejected_after_valid_one_is_cached():
+    token_decode_cache.clear()
+    token = create_access_token({"sub": "5"}, expires_delta=timedelta(minutes=5))
+    assert decode_token(token)["sub"] == "5"
+    header, payload, signature = token.split(".")
+    forged = f"{header}.{payload}.{signature[:-4]}AAAA"
+    assert decode_token(forged) is None
+    assert JWTHandler.verify_token(forged) is None
+    assert decode_token(token) == JWTHandler.verify_token(token)
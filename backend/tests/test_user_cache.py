@@ -0,0 +1,102 @@
+"""
+Tests for the authenticated-user cache
+"""
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.core.cache import MemoryCacheBackend
+from app.core.user_cache import UserCache
+
+
+def make_user(user_id: int, **overrides):
+    fields = dict(
+        id=user_id,
+        username=f"user{user_id}",
+        full_name=None,
+        is_active=True,
+        is_superuser=False,
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def load(cache: UserCache, user_id: int, user):
+    async def loader():
+        return user
+
+    return asyncio.run(cache.load_async(user_id, loader))
+
+
+def test_lru_eviction():
+    """Least recently used entries are evicted past maxsize"""
+    cache = UserCache(maxsize=2, ttl=60)
+
+    async def scenario():
+        await cache.set(make_user(1))
+        await cache.set(make_user(2))
+        await cache.get(1)
+        await cache.set(make_user(3))
+        return [await cache.get(user_id) for user_id in (1, 2, 3)]
+
+    first, second, third = asyncio.run(scenario())
+    assert first is not None
+    assert second is None
+    assert third is not None
+
+
+def test_invalidate_clears_both_tiers():
+    """Invalidation drops the local and the shared entry"""
+    shared = MemoryCacheBackend()
+    cache = UserCache(maxsize=10, ttl=60, shared=shared)
+
+    async def scenario():
+        await cache.set(make_user(1, is_active=True))
+        await cache.invalidate(1)
+        return await cache.get(1)
+
+    assert asyncio.run(scenario()) is None
+    assert load(cache, 1, make_user(1, is_active=False)).is_active is False
+
+
+def test_shared_tier_warms_other_workers():
+    """A principal cached by one worker is served to another"""
+    shared = MemoryCacheBackend()
+    other = UserCache(ttl=60, shared=shared)
+
+    async def scenario():
+        await UserCache(ttl=60, shared=shared).set(make_user(5, is_superuser=True))
+        return await other.get(5)
+
+    principal = asyncio.run(scenario())
+    assert principal is not None and principal.is_superuser
+    assert other.shared_hits == 1
+
+
+def test_missing_user_is_not_cached():
+    """A loader returning None is retried next time"""
+    cache = UserCache(ttl=60)
+    assert load(cache, 9, None) is None
+    assert load(cache, 9, make_user(9)) is not None
+
+
+def test_load_async_awaits_loader_once():
+    """The async loader runs on a miss only"""
+    cache = UserCache(ttl=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return make_user(4)
+
+    async def scenario():
+        await cache.load_async(4, loader)
+        return await cache.load_async(4, loader)
+
+    assert asyncio.run(scenario()).id == 4
+    assert len(calls) == 1
@@ -0,0 +1,109 @@
+"""
+Shared fixtures for the RFI tests
+
+The RFI modules live in the project-root ``app`` tree while the core,
+db and user modules they import live in ``backend/app``. Both trees are
+composed here into one ``app`` package, the way they are deployed
+together, without running ``backend/app``'s package ``__init__`` files
+(they pull in the user models, which are not needed here).
+"""
+import asyncio
+import os
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+backend_root = project_root / "backend"
+sys.path.insert(0, str(project_root))
+
+# No Redis in the test run
+for backend_setting in ("CACHE_BACKEND", "EVENTS_BACKEND", "TOKEN_REVOCATION_BACKEND"):
+    os.environ.setdefault(backend_setting, "memory")
+
+COMPOSED_PACKAGES = (
+    "app",
+    "app.api",
+    "app.api.v1",
+    "app.api.v1.endpoints",
+    "app.crud",
+    "app.models",
+    "app.schemas",
+)
+
+for package_name in COMPOSED_PACKAGES:
+    relative = Path(*package_name.split("."))
+    package = types.ModuleType(package_name)
+    package.__path__ = [
+        str(root / relative) for root in (project_root, backend_root) if (root / relative).is_dir()
+    ]
+    sys.modules[package_name] = package
+    parent_name, _, child = package_name.rpartition(".")
+    if parent_name:
+        setattr(sys.modules[parent_name], child, package)
+
+from sqlalchemy import Column, Integer, Table, event  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.db.base_class import Base  # noqa: E402
+import app.models.rfi  # noqa: E402,F401
+
+
+def add_reference_tables(metadata) -> None:
+    """Stand in for the dbo/QC lookup tables the RFI foreign keys point at
+
+    Those tables belong to the wider QC database and have no models in
+    this tree; a table with just the referenced key columns is enough to
+    create the schema and satisfy the constraints.
+    """
+    for table in list(metadata.tables.values()):
+        for foreign_key in table.foreign_keys:
+            schema, table_name, column_name = foreign_key.target_fullname.rsplit(".", 2)
+            target = metadata.tables.get(f"{schema}.{table_name}")
+            if target is None:
+                target = Table(table_name, metadata, schema=schema)
+            if column_name not in target.c:
+                target.append_column(Column(column_name, Integer, primary_key=True))
+
+
+add_reference_tables(Base.metadata)
+
+
+class Project(Base):
+    """Target of ``GeneralRFI.project``"""
+
+    __table__ = Base.metadata.tables["dbo.Tbl_Project"]
+
+
+def attach_schemas(dbapi_connection, connection_record):
+    """SQLite has no schemas; attach an in-memory database per schema name"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("ATTACH ':memory:' AS QC")
+    cursor.execute("ATTACH ':memory:' AS dbo")
+    cursor.close()
+
+
+@pytest.fixture
+def run_db():
+    """Run ``scenario(db)`` against a fresh in-memory database (QC/dbo schemas attached)"""
+    pytest.importorskip("aiosqlite")
+
+    def run(scenario):
+        async def main():
+            engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+            event.listen(engine.sync_engine, "connect", attach_schemas)
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            try:
+                async with AsyncSession(engine, expire_on_commit=False) as db:
+                    return await scenario(db)
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,121 @@
+"""
+Test attachment image renditions (EXIF stripping, downscaling, LRU disk cache)
+"""
+import asyncio
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.attachment_images import (
+    ImagePipeline,
+    NotAnImage,
+    Rendition,
+    RenditionCache,
+    render_rendition,
+)
+from app.services.attachment_storage import LocalStorage
+
+RENDITIONS = {"thumb": Rendition("thumb", 64, 70), "web": Rendition("web", 400, 80)}
+
+
+def photo_bytes(tmp_path, size=(1200, 800), orientation=6) -> bytes:
+    """A JPEG 'taken' rotated, with GPS and camera EXIF"""
+    image = Image.linear_gradient("L").resize(size).convert("RGB")
+    exif = Image.Exif()
+    exif[0x0112] = orientation  # Orientation
+    exif[0x010F] = "PhoneMaker"  # Make
+    exif[0x8825] = {1: "N", 2: (35.0, 41.0, 0.0)}  # GPSInfo
+    path = tmp_path / "photo.jpg"
+    image.save(path, "JPEG", quality=95, exif=exif)
+    return path.read_bytes()
+
+
+async def chunks(data: bytes):
+    yield data
+
+
+def test_rendition_applies_orientation_and_strips_exif(tmp_path):
+    source = tmp_path / "source.jpg"
+    source.write_bytes(photo_bytes(tmp_path))
+    destination = tmp_path / "thumb.jpg"
+
+    size = render_rendition(str(source), str(destination), 300, 75)
+
+    with Image.open(destination) as thumb:
+        assert thumb.format == "JPEG"
+        assert thumb.size == size == (200, 300)  # rotated 90° by the orientation tag
+        assert not thumb.getexif()
+        assert "exif" not in thumb.info
+    assert destination.stat().st_size < source.stat().st_size
+
+
+def test_rendition_flattens_transparency(tmp_path):
+    source = tmp_path / "logo.png"
+    Image.new("RGBA", (50, 40), (255, 0, 0, 0)).save(source)
+    render_rendition(str(source), str(tmp_path / "out.jpg"), 100, 80)
+    with Image.open(tmp_path / "out.jpg") as image:
+        assert image.size == (50, 40)  # never upscaled
+        assert image.getpixel((10, 10)) == pytest.approx((255, 255, 255), abs=3)
+
+
+def test_not_an_image(tmp_path):
+    source = tmp_path / "report.pdf"
+    source.write_bytes(b"%PDF-1.4 not an image")
+    with pytest.raises(NotAnImage):
+        render_rendition(str(source), str(tmp_path / "out.jpg"), 100, 80)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = RenditionCache(tmp_path, max_bytes=2500)
+    now = 1_700_000_000
+    for number, sha in enumerate(("a" * 64, "b" * 64, "c" * 64)):
+        temp = cache.temp_path()
+        Path(temp).write_bytes(b"x" * 1000)
+        path = cache.commit(temp, sha, "thumb")
+        os.utime(path, (now + number, now + number))
+        if number == 1:
+            # "a" was used after "b" was written
+            os.utime(cache.path("a" * 64, "thumb"), (now + 5, now + 5))
+
+    assert cache.get("b" * 64, "thumb") is None
+    assert cache.get("a" * 64, "thumb") is not None
+    assert cache.get("c" * 64, "thumb") is not None
+
+
+def test_pipeline_renders_once_and_caches(tmp_path):
+    storage = LocalStorage(tmp_path / "blobs")
+    cache = RenditionCache(tmp_path / "renditions", max_bytes=10 * 2**20)
+    pipeline = ImagePipeline(storage, cache, RENDITIONS, workers=0)
+    data = photo_bytes(tmp_path)
+    renders = []
+    run = pipeline.pool.run
+
+    async def counting_run(fn, *args):
+        renders.append(args)
+        return await run(fn, *args)
+
+    pipeline.pool.run = counting_run
+
+    async def scenario():
+        blob = await storage.save(chunks(data))
+        paths = await asyncio.gather(
+            *(pipeline.rendition(blob.sha256, "web", size=blob.size) for _ in range(5))
+        )
+        again = await pipeline.rendition(blob.sha256, "web", size=blob.size)
+        await pipeline.delete(blob.sha256)
+        return blob, paths, again
+
+    blob, paths, again = asyncio.run(scenario())
+    assert len(renders) == 1
+    assert len(set(paths)) == 1 and again == paths[0]
+    assert blob.sha256 == hashlib.sha256(data).hexdigest()
+    assert not paths[0].exists()
+    assert list((tmp_path / "renditions" / ".tmp").iterdir()) == []
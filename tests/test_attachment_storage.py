@@ -0,0 +1,136 @@
+"""
+Test content-addressed attachment storage (local filesystem and S3 API)
+"""
+import asyncio
+import hashlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.attachment_storage import (
+    AttachmentTooLarge,
+    LocalStorage,
+    S3Storage,
+    blob_key,
+)
+
+CONTENT = b"inspection report " * 10000
+
+
+async def chunks(data: bytes, size: int = 4096):
+    for offset in range(0, len(data), size):
+        yield data[offset:offset + size]
+
+
+async def read_range(storage, key: str, start: int, end: int) -> bytes:
+    return b"".join([chunk async for chunk in storage.iter_range(key, start, end)])
+
+
+class NotFound(Exception):
+    """Shaped like botocore's ClientError for a missing key"""
+
+    def __init__(self):
+        super().__init__("Not Found")
+        self.response = {"Error": {"Code": "404"}}
+
+
+class FakeS3Client:
+    """In-memory stand-in for the boto3 S3 client methods the storage uses"""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = 0
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise NotFound()
+        return {"ContentLength": len(self.objects[Bucket, Key])}
+
+    def upload_fileobj(self, Fileobj, Bucket, Key):
+        self.uploads += 1
+        self.objects[Bucket, Key] = Fileobj.read()
+
+    def get_object(self, Bucket, Key, Range):
+        start, end = (int(part) for part in Range[len("bytes="):].split("-"))
+        return {"Body": io.BytesIO(self.objects[Bucket, Key][start:end + 1])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+
+def test_local_save_is_content_addressed(tmp_path):
+    """Blobs are stored once under their SHA-256"""
+    storage = LocalStorage(tmp_path, chunk_size=10000)
+
+    async def scenario():
+        first = await storage.save(chunks(CONTENT))
+        second = await storage.save(chunks(CONTENT, size=777))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    sha256 = hashlib.sha256(CONTENT).hexdigest()
+
+    assert (first.sha256, first.size, first.created) == (sha256, len(CONTENT), True)
+    assert second.key == first.key == blob_key(sha256)
+    assert not second.created
+    assert storage.local_path(first.key).read_bytes() == CONTENT
+    assert list((tmp_path / ".tmp").iterdir()) == []
+
+
+def test_local_oversized_upload_leaves_nothing(tmp_path):
+    storage = LocalStorage(tmp_path)
+    with pytest.raises(AttachmentTooLarge):
+        asyncio.run(storage.save(chunks(CONTENT), max_size=len(CONTENT) - 1))
+    assert [path for path in tmp_path.rglob("*") if path.is_file()] == []
+
+
+def test_local_range_and_delete(tmp_path):
+    storage = LocalStorage(tmp_path, chunk_size=1000)
+
+    async def scenario():
+        blob = await storage.save(chunks(CONTENT))
+        part = await read_range(storage, blob.key, 5, 4004)
+        await storage.delete(blob.key)
+        return blob, part, await storage.exists(blob.key)
+
+    blob, part, exists = asyncio.run(scenario())
+    assert part == CONTENT[5:4005]
+    assert not exists
+
+
+def test_s3_save_skips_existing_objects():
+    """The upload is spooled, hashed, and sent only for new content"""
+    client = FakeS3Client()
+    storage = S3Storage(client, "bucket", prefix="att/", chunk_size=1000)
+
+    async def scenario():
+        first = await storage.save(chunks(CONTENT))
+        second = await storage.save(chunks(CONTENT))
+        part = await read_range(storage, first.key, 100, 2599)
+        return first, second, part
+
+    first, second, part = asyncio.run(scenario())
+
+    assert client.uploads == 1
+    assert client.objects["bucket", "att/" + first.key] == CONTENT
+    assert first.created and not second.created
+    assert part == CONTENT[100:2600]
+
+
+def test_s3_delete_and_missing_object():
+    client = FakeS3Client()
+    storage = S3Storage(client, "bucket")
+
+    async def scenario():
+        blob = await storage.save(chunks(b"photo"))
+        before = await storage.exists(blob.key)
+        await storage.delete(blob.key)
+        return before, await storage.exists(blob.key)
+
+    assert asyncio.run(scenario()) == (True, False)
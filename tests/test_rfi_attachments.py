@@ -0,0 +1,122 @@
+"""
+Test attachment rows and the reference counting of their shared blobs
+"""
+import datetime
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.exc import IntegrityError
+
+from app.crud import rfi as crud_rfi
+from app.crud import rfi_attachment as crud_attachment
+from app.schemas.rfi import RFICreate
+from app.services.attachment_storage import LocalStorage, blob_key
+
+CONTENT = b"inspection photo"
+
+
+async def one_chunk(data: bytes):
+    yield data
+
+
+async def seed_rfi(db):
+    return await crud_rfi.create_rfi(
+        db,
+        rfi_in=RFICreate(RFI_no="RFI-0001", RFI_date=datetime.date(2024, 1, 1), id_pre=1),
+    )
+
+
+async def attach(db, store, rfi, filename="photo.jpg"):
+    blob = await store.save(one_chunk(CONTENT))
+    return await crud_attachment.create_attachment(
+        db, store=store, rfi_id=rfi.id_RFI, blob=blob,
+        filename=filename, content_type="image/jpeg",
+    )
+
+
+def test_blob_is_removed_with_its_last_reference(run_db, tmp_path):
+    store = LocalStorage(tmp_path)
+
+    async def scenario(db):
+        rfi = await seed_rfi(db)
+        first = await attach(db, store, rfi)
+        second = await attach(db, store, rfi, filename="copy.jpg")
+        path = store.local_path(blob_key(first.sha256))
+        kept = await crud_attachment.delete_attachment(db, store=store, attachment=first)
+        kept_exists = path.exists()
+        removed = await crud_attachment.delete_attachment(db, store=store, attachment=second)
+        return kept, kept_exists, removed, path.exists()
+
+    assert run_db(scenario) == (False, True, True, False)
+
+
+def test_upload_whose_blob_was_deleted_is_rejected(run_db, tmp_path):
+    """The blob of a deduplicated upload vanished before its row was written"""
+    store = LocalStorage(tmp_path)
+
+    async def scenario(db):
+        rfi = await seed_rfi(db)
+        existing = await attach(db, store, rfi)
+        blob = await store.save(one_chunk(CONTENT))  # deduplicated: created=False
+        await crud_attachment.delete_attachment(db, store=store, attachment=existing)
+        with pytest.raises(crud_attachment.BlobRemoved):
+            await crud_attachment.create_attachment(
+                db, store=store, rfi_id=rfi.id_RFI, blob=blob,
+                filename="late.jpg", content_type="image/jpeg",
+            )
+        return blob.created, await crud_attachment.get_attachments(db, rfi_id=rfi.id_RFI)
+
+    created, rows = run_db(scenario)
+    assert created is False
+    assert rows == []
+
+
+def test_failed_insert_removes_the_blob_it_created(run_db, tmp_path):
+    store = LocalStorage(tmp_path)
+
+    async def scenario(db):
+        rfi = await seed_rfi(db)
+        blob = await store.save(one_chunk(CONTENT))
+        with pytest.raises(IntegrityError):
+            await crud_attachment.create_attachment(
+                db, store=store, rfi_id=rfi.id_RFI, blob=blob,
+                filename=None, content_type="image/jpeg",
+            )
+        return blob.created, await store.exists(blob.key)
+
+    assert run_db(scenario) == (True, False)
+
+
+def test_release_after_rfi_delete_keeps_shared_content(run_db, tmp_path):
+    """Blobs of a deleted RFI stay while another RFI's attachment uses them"""
+    store = LocalStorage(tmp_path)
+
+    async def scenario(db):
+        rfi = await seed_rfi(db)
+        other = await crud_rfi.create_rfi(
+            db,
+            rfi_in=RFICreate(RFI_no="RFI-0002", RFI_date=datetime.date(2024, 1, 2), id_pre=1),
+        )
+        shared = await attach(db, store, rfi)
+        await attach(db, store, other)
+        hashes = await crud_attachment.get_attachment_hashes(db, rfi_id=rfi.id_RFI)
+        await db.delete(shared)  # what ON DELETE CASCADE does with the RFI
+        await db.commit()
+        released = [
+            await crud_attachment.release_blob(db, store=store, sha256=sha256)
+            for sha256 in hashes
+        ]
+        return hashes, released, await store.exists(blob_key(shared.sha256))
+
+    hashes, released, exists = run_db(scenario)
+    assert len(hashes) == 1
+    assert released == [False]
+    assert exists
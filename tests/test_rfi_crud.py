@@ -0,0 +1,169 @@
+"""
+Test RFI CRUD operations on an in-memory database
+"""
+import datetime
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+pytest.importorskip("aiosqlite")
+
+from pydantic import ValidationError
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import MISS, cache
+from app.crud import rfi as crud_rfi
+from app.schemas.rfi import RFIBulkReasonRequest, RFICreate
+
+
+async def seed(db: AsyncSession, count: int = 6) -> list:
+    return [
+        await crud_rfi.create_rfi(
+            db,
+            rfi_in=RFICreate(
+                RFI_no=f"RFI-{i:04d}",
+                RFI_date=datetime.date(2024, 1, i),
+                id_pre=1 + i % 2,
+                step="s1" if i % 3 else "s2",
+                tag_no=f"T-{i}",
+            ),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def test_search_filters_by_step_and_location(run_db):
+    async def scenario(db):
+        rfis = await seed(db)
+        rfis[0].id_loc = 7
+        await db.commit()
+        by_step = await crud_rfi.get_multi_with_filters(db, step="s2")
+        by_location = await crud_rfi.get_multi_with_filters(db, id_loc=7, step="s1")
+        return [r.RFI_no for r in by_step], [r.RFI_no for r in by_location]
+
+    by_step, by_location = run_db(scenario)
+    assert by_step == ["RFI-0003", "RFI-0006"]
+    assert by_location == ["RFI-0001"]
+
+
+def test_bulk_transition_reports_each_id(run_db, monkeypatch):
+    """One UPDATE for the pending ids; the others are not_found or already_closed"""
+    published = []
+
+    async def publish(event_type, rfi, **overrides):
+        published.append((event_type, rfi.RFI_no))
+
+    monkeypatch.setattr(crud_rfi, "publish_rfi_event", publish)
+
+    async def scenario(db):
+        rfis = await seed(db, count=4)
+        await crud_rfi.approve_rfi(db, rfi_id=rfis[1].id_RFI)
+        ids = [rfi.id_RFI for rfi in rfis]
+        published.clear()
+
+        updates = []
+
+        def count_updates(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("UPDATE"):
+                updates.append(statement)
+
+        sync_engine = db.bind.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", count_updates)
+        try:
+            outcomes = await crud_rfi.bulk_transition(
+                db, rfi_ids=[ids[0], ids[1], 999, ids[2], ids[0]],
+                action="reject", reason="leak", inspector="QC1",
+            )
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", count_updates)
+
+        db.expire_all()
+        rejected = await crud_rfi.get_rfi(db, rfi_id=ids[0])
+        untouched = await crud_rfi.get_rfi(db, rfi_id=ids[3])
+        return ids, outcomes, updates, rejected, untouched
+
+    ids, outcomes, updates, rejected, untouched = run_db(scenario)
+    assert outcomes == {
+        ids[0]: crud_rfi.BULK_UPDATED,
+        ids[1]: crud_rfi.BULK_ALREADY_CLOSED,
+        999: crud_rfi.BULK_NOT_FOUND,
+        ids[2]: crud_rfi.BULK_UPDATED,
+    }
+    assert len(updates) == 1 and "RETURNING" in updates[0].upper()
+    assert (rejected.status, rejected.rej, rejected.inspctr) == ("Rejected", True, "QC1")
+    assert rejected.note.startswith("Rejected: leak")
+    assert untouched.status != "Rejected"
+    assert sorted(published) == [("rejected", "RFI-0001"), ("rejected", "RFI-0003")]
+
+
+def test_bulk_transition_invalidates_cached_rfis(run_db):
+    async def scenario(db):
+        rfis = await seed(db, count=2)
+        scope = crud_rfi.project_scope(rfis[0].id_pre)
+        before = await cache.change_counter(scope)
+        key = crud_rfi.rfi_no_cache_key(rfis[0].RFI_no)
+        await cache.set(key, {"status": "Pending"})
+        await crud_rfi.bulk_transition(db, rfi_ids=[rfis[0].id_RFI], action="approve")
+        return before, await cache.change_counter(scope), await cache.get("rfi_no", key)
+
+    before, after, cached = run_db(scenario)
+    assert after > before
+    assert cached is MISS
+
+
+def test_bulk_reason_fits_the_note_column(run_db):
+    """The reason fits after its prefix; an older note is cut to 500 characters"""
+    with pytest.raises(ValidationError):
+        RFIBulkReasonRequest(ids=[1], reason="x" * 490)
+
+    async def scenario(db):
+        rfis = await seed(db, count=1)
+        rfis[0].note = "n" * 500
+        await db.commit()
+        await crud_rfi.bulk_transition(
+            db, rfi_ids=[rfis[0].id_RFI], action="cancel", reason="r" * 489
+        )
+        await db.refresh(rfis[0])
+        return rfis[0].note
+
+    note = run_db(scenario)
+    assert note == "Cancelled: " + "r" * 489
+
+
+def test_parse_list_fields():
+    """compact expands; id_RFI (and RFI_date for keyset) always come first"""
+    assert crud_rfi.parse_list_fields("compact") == list(crud_rfi.COMPACT_LIST_FIELDS)
+    assert crud_rfi.parse_list_fields(" tag_no, status,tag_no,") == ["id_RFI", "tag_no", "status"]
+    assert crud_rfi.parse_list_fields("tag_no", keyset=True) == ["id_RFI", "RFI_date", "tag_no"]
+    with pytest.raises(ValueError, match="Unknown fields: secret, row_version"):
+        crud_rfi.parse_list_fields("tag_no,secret,row_version")
+
+
+def test_sparse_rows_serialize_and_build_the_next_cursor(run_db):
+    """Keyset pages of Row tuples become JSON dicts and chain through their cursor"""
+    fields = crud_rfi.parse_list_fields("tag_no", keyset=True)
+
+    async def scenario(db):
+        rfis = await seed(db, count=3)
+        first = await crud_rfi.get_multi(db, limit=2, keyset=True, fields=fields)
+        cursor = crud_rfi.encode_cursor(first[-1])
+        rest = await crud_rfi.get_multi(
+            db, limit=2, keyset=True, fields=fields, after=crud_rfi.decode_cursor(cursor)
+        )
+        return rfis, first, cursor, rest
+
+    rfis, first, cursor, rest = run_db(scenario)
+    assert crud_rfi.rows_as_dicts(first, fields) == [
+        {"id_RFI": rfis[0].id_RFI, "RFI_date": "2024-01-01", "tag_no": "T-1"},
+        {"id_RFI": rfis[1].id_RFI, "RFI_date": "2024-01-02", "tag_no": "T-2"},
+    ]
+    assert cursor == crud_rfi.encode_cursor(rfis[1])
+    assert crud_rfi.rows_as_dicts(rest, fields) == [
+        {"id_RFI": rfis[2].id_RFI, "RFI_date": "2024-01-03", "tag_no": "T-3"},
+    ]
@@ -0,0 +1,126 @@
+"""
+Test printable RFI form rendering (PDF / DOCX) and batch merging
+"""
+import asyncio
+import io
+import sys
+import zipfile
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from docx import Document
+from PyPDF2 import PdfReader
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services import rfi_forms
+from app.services.rfi_forms import FormOptions, FormRenderer, form_record, render_form
+
+OPTIONS = FormOptions(font_path=None, dpi=72)
+
+
+def make_rfi(**overrides):
+    values = dict(
+        RFI_no="RFI-0001",
+        RFI_date=date(2024, 5, 1),
+        inspection_date=None,
+        id_pre=3,
+        tag_no="P-101A",
+        equipment_name="Pump <main> & spare",
+        Applicant="علی رضایی",
+        note="Hydrostatic test " * 200,
+        QC="QC engineer",
+        acc=False,
+        rej=True,
+        cancel=False,
+        out_of_service=True,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def docx_texts(data: bytes) -> list:
+    document = Document(io.BytesIO(data))
+    return [cell.text for table in document.tables for row in table.rows for cell in row.cells]
+
+
+def test_form_record_formats_values():
+    record = form_record(make_rfi())
+    assert record["RFI_date"] == "2024-05-01"
+    assert record["inspection_date"] == ""
+    assert record["id_pre"] == "3"
+    assert (record["result"], record["service"]) == ("Rejected", "Out of service")
+    assert record["Contractor"] == ""
+
+
+def test_docx_fills_and_escapes_placeholders():
+    texts = docx_texts(render_form(form_record(make_rfi()), "docx", OPTIONS))
+    assert "RFI-0001" in texts
+    assert "Pump <main> & spare" in texts
+    assert "علی رضایی" in texts
+    assert not any("{{" in text for text in texts)
+
+
+def test_custom_docx_template_with_split_runs(tmp_path):
+    """Placeholders that Word split over several runs are still filled"""
+    document = Document()
+    paragraph = document.add_paragraph("RFI ")
+    for piece in ("{{", "RFI_", "no}}", " / {{ tag_no }} / {{unknown}}"):
+        paragraph.add_run(piece)
+    path = tmp_path / "form.docx"
+    document.save(path)
+
+    options = FormOptions(font_path=None, docx_template=str(path))
+    data = render_form(form_record(make_rfi()), "docx", options)
+    text = Document(io.BytesIO(data)).paragraphs[0].text
+    assert text == "RFI RFI-0001 / P-101A / "
+
+
+def test_pdf_is_one_page():
+    data = render_form(form_record(make_rfi()), "pdf", OPTIONS)
+    reader = PdfReader(io.BytesIO(data))
+    assert len(reader.pages) == 1
+    assert float(reader.pages[0].mediabox.width) == pytest.approx(595, abs=1)  # A4 in points
+
+
+def test_templates_are_parsed_once():
+    rfi_forms._docx_template.cache_clear()
+    first = render_form(form_record(make_rfi()), "docx", OPTIONS)
+    render_form(form_record(make_rfi(RFI_no="RFI-0002")), "docx", OPTIONS)
+    assert rfi_forms._docx_template.cache_info().misses == 1
+    # fixed zip timestamps: the same record renders to the same bytes
+    assert render_form(form_record(make_rfi()), "docx", OPTIONS) == first
+    assert zipfile.ZipFile(io.BytesIO(first)).testzip() is None
+
+
+def test_render_merged_keeps_order_across_batches():
+    renderer = FormRenderer(OPTIONS, workers=0, batch_size=3)
+    seen = []
+
+    async def records():
+        for number in range(7):
+            yield form_record(make_rfi(RFI_no=f"RFI-{number}", note=""))
+
+    async def on_progress(forms):
+        seen.append(forms)
+
+    output = io.BytesIO()
+    result = asyncio.run(renderer.render_merged(records(), output, on_progress=on_progress))
+    assert result == (7, 7)
+    assert seen == [3, 6, 7]
+    assert len(PdfReader(output).pages) == 7
+
+
+def test_process_pool_renders_forms():
+    renderer = FormRenderer(OPTIONS, workers=1)
+    try:
+        documents = asyncio.run(
+            renderer.render_many([form_record(make_rfi(RFI_no=f"R{n}")) for n in range(3)], "docx")
+        )
+    finally:
+        renderer.close()
+    assert ["R0", "R1", "R2"] == [docx_texts(data)[1] for data in documents]
@@ -0,0 +1,83 @@
+"""
+Test bulk RFI import (validation, duplicates, constraint violations)
+"""
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy import func, select
+
+from app.crud import rfi as crud_rfi
+from app.models.rfi import GeneralRFI
+from app.services import rfi_import
+
+HEADER = "RFI_no,RFI_date,id_pre,tag_no\n"
+
+
+def csv_rows(*lines: str):
+    return rfi_import.iter_csv_rows(io.BytesIO((HEADER + "".join(lines)).encode()))
+
+
+async def count(db) -> int:
+    return (await db.execute(select(func.count()).select_from(GeneralRFI))).scalar_one()
+
+
+def test_import_reports_invalid_and_duplicate_rows(run_db):
+    async def scenario(db):
+        first = await rfi_import.import_rfis(db, csv_rows("R-1,2024-01-01,1,T-1\n"))
+        result = await rfi_import.import_rfis(
+            db,
+            csv_rows(
+                "R-1,2024-01-02,1,T-1\n",  # already in the database
+                "R-2,not a date,1,T-2\n",
+                "R-3,2024-01-03,1,T-3\n",
+                "R-3,2024-01-04,1,T-3\n",  # duplicated in the file
+            ),
+            batch_size=2,
+        )
+        return first, result, await count(db)
+
+    first, result, total = run_db(scenario)
+    assert first.imported == 1
+    assert (result.total_rows, result.imported, result.failed) == (4, 1, 3)
+    assert sorted((error.row, error.RFI_no) for error in result.errors) == [
+        (2, "R-1"), (3, "R-2"), (5, "R-3"),
+    ]
+    assert total == 2
+
+
+def test_constraint_violation_rejects_only_the_offending_row(run_db, monkeypatch):
+    """An RFI_no inserted after the duplicate lookup fails its row, not the import"""
+    async def no_existing(db, *, rfi_nos):
+        return set()
+
+    async def scenario(db):
+        await rfi_import.import_rfis(db, csv_rows("R-2,2024-01-01,1,T-2\n"))
+        # as if another import inserted R-2 between the lookup and the insert
+        monkeypatch.setattr(crud_rfi, "get_existing_rfi_nos", no_existing)
+        result = await rfi_import.import_rfis(
+            db,
+            csv_rows(
+                "R-1,2024-01-01,1,T-1\n",
+                "R-2,2024-01-02,1,T-2\n",
+                "R-3,2024-01-03,1,T-3\n",
+                "R-4,2024-01-04,1,T-4\n",
+            ),
+            batch_size=2,
+        )
+        return result, await count(db)
+
+    result, total = run_db(scenario)
+    assert (result.imported, result.failed) == (3, 1)
+    error = result.errors[0]
+    assert (error.row, error.RFI_no) == (3, "R-2")
+    assert error.errors[0].startswith("database: ")
+    assert total == 4
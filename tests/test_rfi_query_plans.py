@@ -0,0 +1,182 @@
+"""
+Query-plan regression tests for RFI CRUD queries
+
+Every statement a CRUD call issues is captured and re-run under EXPLAIN;
+the test fails if QC.Tbl_RFI is read with a sequential scan. Runs on
+in-memory SQLite by default, or against PostgreSQL when
+RFI_PLAN_DATABASE_URL is set (e.g. ``postgresql+asyncpg://...`` on a
+migrated database). On PostgreSQL ``enable_seqscan`` is switched off so a
+seq scan in the plan means no index can serve the query, whatever the
+table size.
+"""
+import asyncio
+import datetime
+import json
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.crud import rfi as crud_rfi
+from app.db.base_class import Base
+from app.schemas.rfi import RFICreate
+
+DATABASE_URL = os.getenv("RFI_PLAN_DATABASE_URL", "sqlite+aiosqlite://")
+TABLE = "Tbl_RFI"
+
+# Query shapes that must be index-backed. Unfiltered listings and
+# statistics over the whole table are full scans by nature and are not
+# listed.
+CRUD_CALLS = {
+    "get_rfi": lambda db: crud_rfi.get_rfi(db, rfi_id=2),
+    "get_rfi_by_no": lambda db: crud_rfi.get_rfi_by_no(db, rfi_no="RFI-0002"),
+    "get_rfis_by_tag": lambda db: crud_rfi.get_rfis_by_tag(db, tag_no="P-101A"),
+    "get_multi_keyset": lambda db: crud_rfi.get_multi(
+        db, keyset=True, after=(datetime.date(2024, 1, 5), 5), limit=10
+    ),
+    "filter_project_status_dates": lambda db: crud_rfi.get_multi_with_filters(
+        db,
+        id_pre=1,
+        status="Pending",
+        date_from=datetime.date(2024, 1, 1),
+        date_to=datetime.date(2024, 1, 31),
+    ),
+    "filter_project": lambda db: crud_rfi.get_multi_with_filters(db, id_pre=1),
+    "filter_dates_keyset": lambda db: crud_rfi.get_multi_with_filters(
+        db,
+        keyset=True,
+        date_from=datetime.date(2024, 1, 1),
+        date_to=datetime.date(2024, 1, 31),
+    ),
+    "pending": lambda db: crud_rfi.get_pending_inspections(db),
+    "pending_keyset": lambda db: crud_rfi.get_pending_inspections(
+        db, keyset=True, after=(datetime.date(2024, 1, 5), 5)
+    ),
+    "statistics_project": lambda db: crud_rfi.get_statistics(db, project_id=1),
+}
+
+
+@contextmanager
+def capture_statements(sync_engine):
+    """Record (statement, parameters) for every SELECT sent to the driver"""
+    statements: List[Tuple[str, object]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _pg_seq_scans(plan: dict) -> List[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") == TABLE:
+        found.append(f"Seq Scan on {TABLE}")
+    for child in plan.get("Plans", ()):
+        found.extend(_pg_seq_scans(child))
+    return found
+
+
+async def seq_scans(conn, dialect: str, statement: str, parameters) -> List[str]:
+    """Sequential scans of QC.Tbl_RFI in the plan of one statement"""
+    if dialect == "postgresql":
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return _pg_seq_scans(plan[0]["Plan"])
+
+    # SQLite: "SCAN QC.Tbl_RFI" is a full table scan, "SEARCH ..." and
+    # "SCAN QC.Tbl_RFI USING [COVERING] INDEX ..." go through an index
+    result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return [
+        detail
+        for *_, detail in result
+        if detail.split(" ")[:1] == ["SCAN"]
+        and detail.split(" ")[1].split(".")[-1] == TABLE
+        and "USING" not in detail
+    ]
+
+
+async def _seed(db: AsyncSession) -> None:
+    for i in range(1, 21):
+        rfi = await crud_rfi.create_rfi(
+            db,
+            rfi_in=RFICreate(
+                RFI_no=f"RFI-{i:04d}",
+                RFI_date=datetime.date(2024, 1, i),
+                id_pre=1 + i % 2,
+                status="Pending" if i % 3 else "Approved",
+                tag_no="P-101A" if i % 4 == 0 else f"T-{i}",
+                equipment_name="Pump",
+            ),
+        )
+        if i % 3 == 0:
+            await crud_rfi.approve_rfi(db, rfi_id=rfi.id_RFI)
+
+
+async def _collect_plans() -> dict:
+    engine = create_async_engine(DATABASE_URL, poolclass=StaticPool)
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        @event.listens_for(engine.sync_engine, "connect")
+        def _attach_schemas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("ATTACH ':memory:' AS QC")
+            cursor.execute("ATTACH ':memory:' AS dbo")
+            cursor.close()
+
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    plans = {}
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            if dialect == "sqlite":
+                await _seed(db)
+            conn = await db.connection()
+            if dialect == "postgresql":
+                await conn.exec_driver_sql("SET enable_seqscan = off")
+            for name, call in CRUD_CALLS.items():
+                # Keep db.get() from answering out of the identity map
+                db.expunge_all()
+                with capture_statements(engine.sync_engine) as statements:
+                    await call(db)
+                assert statements, f"{name} issued no SELECT"
+                plans[name] = [
+                    scan
+                    for statement, parameters in statements
+                    for scan in await seq_scans(conn, dialect, statement, parameters)
+                ]
+            await db.rollback()
+    finally:
+        await engine.dispose()
+    return plans
+
+
+@pytest.fixture(scope="module")
+def plans():
+    return asyncio.run(_collect_plans())
+
+
+@pytest.mark.parametrize("name", list(CRUD_CALLS))
+def test_crud_query_uses_index(plans, name):
+    """The CRUD query is served by an index, not a sequential scan"""
+    assert plans[name] == []
@@ -0,0 +1,67 @@
+"""
+Test full-text query normalization and the non-PostgreSQL fallback
+"""
+import datetime
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+pytest.importorskip("aiosqlite")
+
+from app.crud import rfi as crud_rfi
+from app.schemas.rfi import RFICreate
+from app.services import rfi_search
+
+
+def test_normalize_query_folds_arabic_letters():
+    """Arabic yeh and kaf become their Persian forms"""
+    assert rfi_search.normalize_query("كيف") == "کیف"
+
+
+def test_normalize_query_splits_on_zwnj_and_collapses_spaces():
+    """ZWNJ is a word break; runs of whitespace become one space"""
+    assert rfi_search.normalize_query("  می\u200cرود \t pump ") == "می رود pump"
+
+
+async def seed(db, notes):
+    for i, (note, equipment_name) in enumerate(notes, start=1):
+        await crud_rfi.create_rfi(
+            db,
+            rfi_in=RFICreate(
+                RFI_no=f"RFI-{i:04d}",
+                RFI_date=datetime.date(2024, 1, i),
+                id_pre=1,
+                tag_no=f"T-{i}",
+                note=note,
+                equipment_name=equipment_name,
+            ),
+        )
+
+
+def test_fulltext_fallback_matches_note_or_equipment_name(run_db):
+    """Outside PostgreSQL the normalized query is a case-insensitive substring"""
+    async def scenario(db):
+        await seed(db, [
+            ("Leak at pump seal", None),
+            (None, "Feed PUMP P-101"),
+            ("Valve replaced", "Valve V-7"),
+            ("نشتی پمپ اصلی", None),
+        ])
+        pumps = await rfi_search.fulltext_search(db, "pump")
+        paged = await rfi_search.fulltext_search(db, "pump", skip=1, limit=1)
+        # Arabic yeh in the query still finds the Persian spelling
+        persian = await rfi_search.fulltext_search(db, "اصلي")
+        return pumps, paged, persian
+
+    pumps, paged, persian = run_db(scenario)
+    assert [(rfi.RFI_no, rank, snippet) for rfi, rank, snippet in pumps] == [
+        ("RFI-0001", 0.0, "Leak at pump seal"),
+        ("RFI-0002", 0.0, None),
+    ]
+    assert [rfi.RFI_no for rfi, _, _ in paged] == ["RFI-0002"]
+    assert [rfi.RFI_no for rfi, _, _ in persian] == ["RFI-0004"]
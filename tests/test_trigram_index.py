@@ -0,0 +1,43 @@
+"""
+Test the in-memory trigram index used as the fuzzy search fallback
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.trigram_index import TrigramIndex, similarity, trigrams
+
+
+def test_trigrams_match_pg_trgm():
+    """Words are lower-cased and padded like pg_trgm's show_trgm()"""
+    assert trigrams("Cat") == {"  c", " ca", "cat", "at "}
+    assert trigrams("P-101") == {"  p", " p ", "  1", " 10", "101", "01 "}
+
+
+def test_similarity_bounds():
+    """Identical strings score 1, disjoint strings score 0"""
+    assert similarity(trigrams("pump"), trigrams("PUMP")) == 1.0
+    assert similarity(trigrams("pump"), trigrams("valve")) == 0.0
+
+
+def test_index_tolerates_tag_typos():
+    """A mistyped tag still ranks the right RFI first"""
+    index = TrigramIndex()
+    index.add(1, "P-101A")
+    index.add(2, "V-205B")
+    index.add(3, "P-102C")
+
+    scores = index.search("P-1O1A")
+    assert max(scores, key=scores.get) == 1
+    assert 2 not in scores
+
+
+def test_index_matches_substrings():
+    """Substrings match even below the similarity threshold"""
+    index = TrigramIndex()
+    index.add(1, "Centrifugal pump for cooling water")
+
+    assert 1 in index.search("cooling", threshold=0.9)